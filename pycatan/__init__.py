@@ -10,12 +10,13 @@ Architecture:
 - players: Human and AI player implementations
 - visualizations: Console and web display interfaces
 - config: Board definitions and mappings
+- sim: Headless high-throughput game simulation
 """
 
 # Core game components
 from pycatan.core import (
     Game, Board, DefaultBoard, Player, Tile, TileType, Point, Building,
-    ResCard, DevCard, Harbor, Statuses
+    ResCard, DevCard, Harbor, Statuses, Move, MoveType
 )
 
 # Game management
@@ -47,6 +48,11 @@ from pycatan.config import (
     BoardDefinition, PointMapper, board_definition
 )
 
+# Headless simulation
+from pycatan.sim import (
+    SimulationEngine, GameResult, random_policy, greedy_policy
+)
+
 # Complete game experience
 from pycatan.real_game import RealGame
 
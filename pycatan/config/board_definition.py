@@ -13,7 +13,7 @@ ALL other modules should use this as the single source of truth for:
 This ensures consistency across Game, WebVisualization, JavaScript, and user input.
 """
 
-from typing import Dict, List, Tuple, Optional, NamedTuple
+from typing import Dict, Iterable, List, Tuple, Optional, NamedTuple, Sequence
 from dataclasses import dataclass
 import json
 
@@ -44,6 +44,9 @@ class BoardDefinition:
     This class provides the single source of truth for all coordinate
     mappings and board geometry. All other systems should use this
     instead of their own coordinate conversion logic.
+    
+    Lookups are answered from dicts and tuples built once when the
+    definition is loaded, so every conversion is O(1).
     """
     
     def __init__(self):
@@ -56,7 +59,40 @@ class BoardDefinition:
             # Fallback to hardcoded initialization
             self._initialize_hexes()
             self._initialize_points() 
+            # Adjacencies are worked out with coordinate lookups
+            self._build_lookups()
             self._calculate_adjacencies()
+        self._build_lookups()
+    
+    def _build_lookups(self):
+        """Build the lookup tables for every coordinate conversion."""
+        # coords -> id
+        self._point_ids: Dict[Tuple[int, int], int] = {
+            tuple(p.game_coords): point_id for point_id, p in self.points.items()
+        }
+        self._hex_ids: Dict[Tuple[int, int], int] = {
+            tuple(h.game_coords): hex_id for hex_id, h in self.hexes.items()
+        }
+        
+        # id -> coords and adjacencies
+        self._point_coords: Dict[int, Tuple[int, int]] = {}
+        self._adjacent_points: Dict[int, Tuple[int, ...]] = {}
+        self._adjacent_point_sets: Dict[int, frozenset] = {}
+        self._adjacent_hexes: Dict[int, Tuple[int, ...]] = {}
+        for point_id, p in self.points.items():
+            self._point_coords[point_id] = tuple(p.game_coords)
+            self._adjacent_points[point_id] = tuple(p.adjacent_points)
+            self._adjacent_point_sets[point_id] = frozenset(p.adjacent_points)
+            self._adjacent_hexes[point_id] = tuple(p.adjacent_hexes)
+        
+        self._hex_coords: Dict[int, Tuple[int, int]] = {}
+        self._hex_points: Dict[int, Tuple[int, ...]] = {}
+        for hex_id, h in self.hexes.items():
+            self._hex_coords[hex_id] = tuple(h.game_coords)
+            self._hex_points[hex_id] = tuple(h.adjacent_points)
+        
+        self._all_point_ids = tuple(sorted(self.points))
+        self._all_hex_ids = tuple(sorted(self.hexes))
             
     def _load_from_file(self, filename: str = None) -> bool:
         """Load board definition from JSON file."""
@@ -254,10 +290,10 @@ class BoardDefinition:
             adjacent_hex_coords = self._get_hex_coords_for_point(row, col)
             for hex_coord in adjacent_hex_coords:
                 # Find hex with these coordinates
-                for hex_id, hex_def in self.hexes.items():
-                    if hex_def.game_coords == hex_coord:
-                        point_def.adjacent_hexes.append(hex_id)
-                        hex_def.adjacent_points.append(point_id)
+                hex_id = self._hex_ids.get(tuple(hex_coord))
+                if hex_id is not None:
+                    point_def.adjacent_hexes.append(hex_id)
+                    self.hexes[hex_id].adjacent_points.append(point_id)
             
             # Find adjacent points using board connectivity rules
             point_def.adjacent_points = self._get_connected_point_ids(row, col)
@@ -357,15 +393,11 @@ class BoardDefinition:
     
     def point_id_to_game_coords(self, point_id: int) -> Optional[Tuple[int, int]]:
         """Convert point ID (1-54) to game coordinates [row, col]."""
-        point_def = self.points.get(point_id)
-        return point_def.game_coords if point_def else None
+        return self._point_coords.get(point_id)
     
     def game_coords_to_point_id(self, row: int, col: int) -> Optional[int]:
         """Convert game coordinates [row, col] to point ID (1-54)."""
-        for point_id, point_def in self.points.items():
-            if point_def.game_coords == (row, col):
-                return point_id
-        return None
+        return self._point_ids.get((row, col))
     
     def coords_to_point_id(self, row: int, col: int) -> Optional[int]:
         """Alias for game_coords_to_point_id for backward compatibility."""
@@ -378,15 +410,11 @@ class BoardDefinition:
     
     def hex_id_to_game_coords(self, hex_id: int) -> Optional[Tuple[int, int]]:
         """Convert hex ID (1-19) to game coordinates [row, col]."""
-        hex_def = self.hexes.get(hex_id)
-        return hex_def.game_coords if hex_def else None
+        return self._hex_coords.get(hex_id)
     
     def game_coords_to_hex_id(self, row: int, col: int) -> Optional[int]:
         """Convert game coordinates [row, col] to hex ID (1-19)."""
-        for hex_id, hex_def in self.hexes.items():
-            if hex_def.game_coords == (row, col):
-                return hex_id
-        return None
+        return self._hex_ids.get((row, col))
     
     def hex_id_to_axial_coords(self, hex_id: int) -> Optional[Tuple[int, int]]:
         """Convert hex ID to axial coordinates [q, r] for web display."""
@@ -395,34 +423,52 @@ class BoardDefinition:
     
     def get_adjacent_point_ids(self, point_id: int) -> List[int]:
         """Get all point IDs directly connected to the given point."""
-        point_def = self.points.get(point_id)
-        return point_def.adjacent_points.copy() if point_def else []
+        return list(self._adjacent_points.get(point_id, ()))
     
     def get_adjacent_hex_ids(self, point_id: int) -> List[int]:
         """Get all hex IDs that border the given point."""
-        point_def = self.points.get(point_id)
-        return point_def.adjacent_hexes.copy() if point_def else []
+        return list(self._adjacent_hexes.get(point_id, ()))
     
     def get_hex_border_points(self, hex_id: int) -> List[int]:
         """Get all point IDs that border the given hex."""
-        hex_def = self.hexes.get(hex_id)
-        return hex_def.adjacent_points.copy() if hex_def else []
+        return list(self._hex_points.get(hex_id, ()))
     
     def is_valid_road_placement(self, point_id_1: int, point_id_2: int) -> bool:
         """Check if a road can be placed between two points."""
         if point_id_1 == point_id_2:
             return False
         
-        adjacent_points = self.get_adjacent_point_ids(point_id_1)
-        return point_id_2 in adjacent_points
+        return point_id_2 in self._adjacent_point_sets.get(point_id_1, ())
     
     def get_all_point_ids(self) -> List[int]:
         """Get all valid point IDs (1-54)."""
-        return sorted(self.points.keys())
+        return list(self._all_point_ids)
     
     def get_all_hex_ids(self) -> List[int]:
         """Get all valid hex IDs (1-19)."""
-        return sorted(self.hexes.keys())
+        return list(self._all_hex_ids)
+    
+    # ===== BATCH CONVERSIONS =====
+    
+    def game_coords_to_point_ids(self, coords: Iterable[Sequence[int]]) -> List[Optional[int]]:
+        """Convert a list of game coordinates [row, col] to point IDs (None where invalid)."""
+        point_ids = self._point_ids
+        return [point_ids.get((c[0], c[1])) for c in coords]
+    
+    def point_ids_to_game_coords(self, point_ids: Iterable[int]) -> List[Optional[Tuple[int, int]]]:
+        """Convert a list of point IDs to game coordinates (None where invalid)."""
+        point_coords = self._point_coords
+        return [point_coords.get(point_id) for point_id in point_ids]
+    
+    def game_coords_to_hex_ids(self, coords: Iterable[Sequence[int]]) -> List[Optional[int]]:
+        """Convert a list of game coordinates [row, col] to hex IDs (None where invalid)."""
+        hex_ids = self._hex_ids
+        return [hex_ids.get((c[0], c[1])) for c in coords]
+    
+    def hex_ids_to_game_coords(self, hex_ids: Iterable[int]) -> List[Optional[Tuple[int, int]]]:
+        """Convert a list of hex IDs to game coordinates (None where invalid)."""
+        hex_coords = self._hex_coords
+        return [hex_coords.get(hex_id) for hex_id in hex_ids]
     
     # ===== EXPORT FUNCTIONS FOR OTHER SYSTEMS =====
     
@@ -8,6 +8,13 @@ This module contains the fundamental game rules and state management:
 - Card: Resource and development cards
 - Building: Settlement, city, and road structures
 - Statuses: Game action result codes
+- Move: Fully parameterised moves for headless play
+- GameRandom: Per-game random number streams
+- Hand: Count-based resource card hand
+- BoardTopology: Numbered points, edges and tiles of a board layout
+- LegalMoveGenerator: Fully parameterised legal moves for a player
+- UndoToken: The changes made by a move, for Game.undo
+- ZobristKeys, TranspositionTable: Position hashing and a bounded cache keyed on it
 """
 
 from .game import Game
@@ -21,6 +28,13 @@ from .building import Building
 from .card import ResCard, DevCard
 from .harbor import Harbor
 from .statuses import Statuses
+from .move import Move, MoveType
+from .rng import GameRandom
+from .hand import Hand
+from .topology import BoardTopology
+from .legal_moves import LegalMoveGenerator
+from .journal import UndoToken
+from .zobrist import ZobristKeys, TranspositionTable
 
 __all__ = [
     'Game',
@@ -35,4 +49,13 @@ __all__ = [
     'DevCard',
     'Harbor',
     'Statuses',
+    'Move',
+    'MoveType',
+    'GameRandom',
+    'Hand',
+    'BoardTopology',
+    'LegalMoveGenerator',
+    'UndoToken',
+    'ZobristKeys',
+    'TranspositionTable',
 ]
@@ -6,6 +6,9 @@ from .tile_type import TileType
 from .card import ResCard, DevCard
 from .tile import Tile
 from .point import Point
+from .longest_road import RoadNetwork
+from .topology import BoardTopology
+from .dirty import DIRTY_BUILDINGS, DIRTY_ROADS, DIRTY_ROBBER, DIRTY_PLAYER
 
 # used to shuffle the deck of tiles
 import random
@@ -32,68 +35,333 @@ class Board(object):
         self.points = ()
         # The roads
         self.roads = []
+        # The roads touching each point
+        # point -> [road, ...]
+        self.point_roads = {}
+        # The roads belonging to each player
+        # player number -> [road, ...]
+        self.player_roads = {}
         # The locations of the harbors
         self.harbors = []
         # The location of the robber
         # going r, i
         self.robber = None
+        # The buildings that get cards for each roll
+        # token number -> [[tile, owner, card type, number of cards], ...]
+        # kept up to date as buildings are added and upgraded
+        self._yield_index = {}
+        # The entries in _yield_index for each point with a building
+        self._point_yields = {}
+        # The road network of each player, used for the longest road
+        # player number -> RoadNetwork
+        self.road_networks = {}
+        # The numbered points and edges of the board, see BoardTopology
+        # Set once the points have been added
+        self._topology = None
+        self._point_nums = {}
+        self._tile_nums = {}
+        self._point_list = []
+        self._tile_list = []
+        # Where each player's buildings and roads are, as bitmasks where
+        # bit n is point n (or edge n for roads)
+        # player number -> mask
+        self.settlement_masks = {}
+        self.city_masks = {}
+        self.road_masks = {}
+        # the points at either end of each player's roads
+        self.road_point_masks = {}
+        # every point with a settlement/city, and every edge with a road
+        self.occupied_mask = 0
+        self.road_mask = 0
 
     # gives the players cards for a certain roll
     def add_yield(self, roll):
         
         # Track resources distributed: {player_name: [resource_names]}
         distribution = {}
+        players = self.game.players
 
-        for r in self.points:
-            for p in r:
-                # Check there is a building on the point
-                if p.building != None:
-                    building = p.building
-                    tiles = p.tiles
-
-                    # checks if any tiles have the right number
-                    for current_tile in tiles:
-
-                        # makes sure the robber isn't there
-                        if self.robber == current_tile.position:
-                            # skips this tile
-                            continue
-
-                        if current_tile.token_num == roll:
-                            # adds the card to the player's inventory
-                            owner = building.owner
-                            # gets the card type
-                            card_type = Board.get_card_from_tile(current_tile.type)
-                            
-                            if card_type:
-                                cards_to_add = []
-                                # adds two if it is a city
-                                if building.type == Building.BUILDING_CITY:
-                                    cards_to_add = [card_type, card_type]
-                                else:
-                                    cards_to_add = [card_type]
-                                    
-                                self.game.players[owner].add_cards(cards_to_add)
-                                
-                                # Record distribution
-                                player_name = f"Player {owner + 1}"
-                                if player_name not in distribution:
-                                    distribution[player_name] = []
-                                
-                                for card in cards_to_add:
-                                    distribution[player_name].append(card.name.split('.')[-1] if hasattr(card, 'name') else str(card))
+        # only looks at the buildings next to a tile with this number
+        for tile, owner, card_type, multiplier in self._yield_index.get(roll, ()):
+
+            # makes sure the robber isn't there
+            if self.robber == tile.position:
+                # skips this tile
+                continue
+
+            # adds two if it is a city
+            cards_to_add = [card_type] * multiplier
+            players[owner].add_cards(cards_to_add)
+
+            # Record distribution
+            player_name = f"Player {owner + 1}"
+            if player_name not in distribution:
+                distribution[player_name] = []
+            distribution[player_name].extend([card_type.name] * multiplier)
         
         return distribution
 
-
     # adds a Building object to the board
     def add_building(self, building, point):
+        self.game.record(self._restore_building, point, point.building)
+        # removes whatever yielded from this point before
+        if point.building != None:
+            self._unindex_yields(point)
+            self._set_building_bit(point.building, point, False)
         point.building = building
+        self._index_yields(point)
+        self._set_building_bit(building, point, True)
+
+        # the building may cut other players' roads
+        for owner, network in self.road_networks.items():
+            if owner != building.owner and network.block_point(point):
+                self.game.record_attr(self.game.players[owner], "longest_road_length")
+                self.game.players[owner].longest_road_length = network.longest
+                self.game.dirty |= DIRTY_PLAYER << owner
+
+    # puts back the building that was on a point before add_building
+    # used to undo add_building
+    def _restore_building(self, point, old_building):
+        building = point.building
+        self._unindex_yields(point)
+        self._set_building_bit(building, point, False)
+        point.building = old_building
+        if old_building != None:
+            self._index_yields(point)
+            self._set_building_bit(old_building, point, True)
+
+        # the other players' roads may go through the point again
+        for owner, network in self.road_networks.items():
+            if owner != building.owner and network.block_point(point):
+                self.game.dirty |= DIRTY_PLAYER << owner
+
+    # sets or clears a building's bit in its owner's mask
+    # and updates the game's hash
+    def _set_building_bit(self, building, point, is_set):
+        num = self.get_point_num(point)
+        bit = 1 << num
+        self.game.hash ^= self.game.zobrist.building[num][building.owner][building.type]
+        self.game.dirty |= DIRTY_BUILDINGS | (DIRTY_PLAYER << building.owner)
+        masks = self.city_masks if building.type == Building.BUILDING_CITY else self.settlement_masks
+        mask = masks.get(building.owner, 0)
+        if is_set:
+            masks[building.owner] = mask | bit
+            self.occupied_mask |= bit
+        else:
+            masks[building.owner] = mask & ~bit
+            self.occupied_mask &= ~bit
+
+    # gets a mask of a player's settlements and cities
+    def get_building_mask(self, owner):
+        return self.settlement_masks.get(owner, 0) | self.city_masks.get(owner, 0)
+
+    # gets the numbered layout of the board
+    def get_topology(self):
+        if self._topology == None:
+            self._topology = BoardTopology.for_board(self)
+        return self._topology
+
+    # gets the number of a point, counting along each row
+    def get_point_num(self, point):
+        if not self._point_nums:
+            num = 0
+            for row in self.points:
+                for p in row:
+                    self._point_nums[p] = num
+                    num += 1
+        return self._point_nums[point]
+
+    # gets the number of a tile, counting along each row
+    def get_tile_num(self, tile):
+        if not self._tile_nums:
+            num = 0
+            for row in self.tiles:
+                for t in row:
+                    self._tile_nums[t] = num
+                    num += 1
+        return self._tile_nums[tile]
+
+    # gets a point from its number
+    def get_point(self, num):
+        if not self._point_list:
+            self._point_list = [p for row in self.points for p in row]
+        return self._point_list[num]
+
+    # gets a tile from its number
+    def get_tile(self, num):
+        if not self._tile_list:
+            self._tile_list = [t for row in self.tiles for t in row]
+        return self._tile_list[num]
+
+    # makes a copy of the board for a forked game
+    # the tiles and the board's topology never change, so they are shared,
+    # while the points, buildings, roads and harbors are copied
+    def fork(self, game):
+        board = object.__new__(type(self))
+        board.__dict__.update(self.__dict__)
+        board.game = game
+
+        # copies the points, keeping the links between them
+        old_points = [p for row in self.points for p in row]
+        new_points = [Point(tiles=p.tiles, position=p.position) for p in old_points]
+        point_map = dict(zip(old_points, new_points))
+        for old, new in zip(old_points, new_points):
+            new.connected_points = [point_map[q] for q in old.connected_points]
+            if old.building != None:
+                new.building = Building(owner=old.building.owner, type=old.building.type, point_one=new)
+
+        rows = []
+        num = 0
+        for row in self.points:
+            rows.append(tuple(new_points[num:num + len(row)]))
+            num += len(row)
+        board.points = tuple(rows)
+        board._point_nums = {p: i for i, p in enumerate(new_points)}
+        board._point_list = new_points
+
+        board.harbors = [
+            Harbor(point_one=point_map[h.point_one], point_two=point_map[h.point_two], type=h.type)
+            for h in self.harbors
+        ]
+
+        # copies the roads and the road indexes
+        board.roads = []
+        board.point_roads = {}
+        board.player_roads = {}
+        for r in self.roads:
+            road = Building(owner=r.owner, type=Building.BUILDING_ROAD,
+                            point_one=point_map[r.point_one], point_two=point_map[r.point_two])
+            board.roads.append(road)
+            board.point_roads.setdefault(road.point_one, []).append(road)
+            board.point_roads.setdefault(road.point_two, []).append(road)
+            board.player_roads.setdefault(road.owner, []).append(road)
+        board.road_networks = {o: n.fork(point_map) for o, n in self.road_networks.items()}
+
+        # copies the yield entries, since upgrading a settlement changes them
+        entries = {}
+        for point_entries in self._point_yields.values():
+            for entry in point_entries:
+                entries[id(entry)] = entry[:]
+        board._yield_index = {
+            token: [entries[id(e)] for e in token_entries]
+            for token, token_entries in self._yield_index.items()
+        }
+        board._point_yields = {
+            point_map[p]: [entries[id(e)] for e in point_entries]
+            for p, point_entries in self._point_yields.items()
+        }
+
+        # the masks are ints, so only the dicts need copying
+        board.settlement_masks = dict(self.settlement_masks)
+        board.city_masks = dict(self.city_masks)
+        board.road_masks = dict(self.road_masks)
+        board.road_point_masks = dict(self.road_point_masks)
+
+        return board
+
+    # gets the players with a settlement or city on one of a tile's points
+    def get_players_on_tile(self, tile):
+        tile_mask = self.get_topology().tile_point_masks[self.get_tile_num(tile)]
+        owners = set(self.settlement_masks) | set(self.city_masks)
+        return [o for o in sorted(owners) if self.get_building_mask(o) & tile_mask]
+
+    # adds the yield entries for the building on a point
+    # each entry is [tile, owner, card type, number of cards]
+    def _index_yields(self, point):
+        building = point.building
+        multiplier = 2 if building.type == Building.BUILDING_CITY else 1
+        entries = []
+
+        for tile in point.tiles:
+            card_type = Board.get_card_from_tile(tile.type)
+            if card_type and tile.token_num:
+                entry = [tile, building.owner, card_type, multiplier]
+                self._yield_index.setdefault(tile.token_num, []).append(entry)
+                entries.append(entry)
+
+        self._point_yields[point] = entries
+
+    # removes the yield entries for the building on a point
+    # entries are removed by identity, since two buildings of the same
+    # owner on a tile have equal entries
+    def _unindex_yields(self, point):
+        for entry in self._point_yields.pop(point, []):
+            entries = self._yield_index[entry[0].token_num]
+            del entries[next(i for i, e in enumerate(entries) if e is entry)]
+            if not entries:
+                del self._yield_index[entry[0].token_num]
 
     # adds a Building object, which must be a road
     # since roads record their own position and are not in self.points
     def add_road(self, road):
+        network = self.get_road_network(road.owner)
+        self.game.record(self._remove_last_road, road, network.save(),
+                         self.road_masks.get(road.owner), self.road_point_masks.get(road.owner))
         self.roads.append(road)
+        self.point_roads.setdefault(road.point_one, []).append(road)
+        self.point_roads.setdefault(road.point_two, []).append(road)
+        self.player_roads.setdefault(road.owner, []).append(road)
+        # adds the road to the masks
+        a = self.get_point_num(road.point_one)
+        b = self.get_point_num(road.point_two)
+        edge = self.get_topology().edge_ids[(a, b)]
+        edge_bit = 1 << edge
+        self.game.hash ^= self.game.zobrist.road[edge][road.owner]
+        self.game.dirty |= DIRTY_ROADS | (DIRTY_PLAYER << road.owner)
+        self.road_masks[road.owner] = self.road_masks.get(road.owner, 0) | edge_bit
+        self.road_point_masks[road.owner] = self.road_point_masks.get(road.owner, 0) | (1 << a) | (1 << b)
+        self.road_mask |= edge_bit
+        # updates the owner's longest road
+        self.game.record_attr(self.game.players[road.owner], "longest_road_length")
+        self.game.players[road.owner].longest_road_length = network.add_road(road.point_one, road.point_two)
+
+    # removes the road added last, putting back its owner's masks and road network
+    # used to undo add_road
+    def _remove_last_road(self, road, saved_network, road_mask, road_point_mask):
+        self.roads.pop()
+        for p in (road.point_one, road.point_two):
+            roads = self.point_roads[p]
+            roads.pop()
+            if not roads:
+                del self.point_roads[p]
+        roads = self.player_roads[road.owner]
+        roads.pop()
+        if not roads:
+            del self.player_roads[road.owner]
+
+        a = self.get_point_num(road.point_one)
+        b = self.get_point_num(road.point_two)
+        edge = self.get_topology().edge_ids[(a, b)]
+        self.road_mask &= ~(1 << edge)
+        self.game.hash ^= self.game.zobrist.road[edge][road.owner]
+        self.game.dirty |= DIRTY_ROADS | (DIRTY_PLAYER << road.owner)
+        for masks, mask in ((self.road_masks, road_mask), (self.road_point_masks, road_point_mask)):
+            if mask == None:
+                del masks[road.owner]
+            else:
+                masks[road.owner] = mask
+        self.road_networks[road.owner].restore(saved_network)
+
+    # gets the roads touching a point
+    def get_roads_at(self, point):
+        return self.point_roads.get(point, [])
+
+    # gets the roads belonging to a player
+    def get_player_roads(self, owner):
+        return self.player_roads.get(owner, [])
+
+    # gets the road between two points, or None if there is not one
+    def get_road(self, point_one, point_two):
+        for r in self.point_roads.get(point_one, []):
+            if r.point_one is point_two or r.point_two is point_two:
+                return r
+        return None
+
+    # gets the road network for a player, creating it if they have no roads yet
+    def get_road_network(self, owner):
+        if owner not in self.road_networks:
+            self.road_networks[owner] = RoadNetwork(owner)
+        return self.road_networks[owner]
 
     # upgrades an existing settlement to a city
     def upgrade_settlement(self, player, point):
@@ -126,13 +394,30 @@ class Board(object):
 
         # removes the cards
         self.game.players[player].remove_cards(needed_cards)
+        self.game.record(self._downgrade_city, point)
         # changes the settlement to a city
+        self._set_building_bit(building, point, False)
         building.type = Building.BUILDING_CITY
+        self._set_building_bit(building, point, True)
+        # cities get two cards per roll
+        for entry in self._point_yields.get(point, []):
+            entry[3] = 2
         # adds another victory point
+        self.game.record_attr(self.game.players[player], "victory_points")
         self.game.players[player].victory_points += 1
 
         return Statuses.ALL_GOOD
 
+    # changes a city back to a settlement
+    # used to undo upgrade_settlement
+    def _downgrade_city(self, point):
+        building = point.building
+        self._set_building_bit(building, point, False)
+        building.type = Building.BUILDING_SETTLEMENT
+        self._set_building_bit(building, point, True)
+        for entry in self._point_yields.get(point, []):
+            entry[3] = 1
+
     # gets all the buildings on the board
     def get_buildings(self):
 
@@ -146,14 +431,26 @@ class Board(object):
 
     # moves the robber to a givne coord
     def move_robber(self, tile_pos):
+        self.game.record(self.move_robber, self.robber)
+        self.game.hash ^= self.get_robber_key()
         self.robber = tile_pos
+        self.game.hash ^= self.get_robber_key()
+        self.game.dirty |= DIRTY_ROBBER
+
+    # gets the game's hash key for where the robber is
+    def get_robber_key(self):
+        if self.robber == None:
+            return 0
+        r, i = self.robber
+        return self.game.zobrist.robber[self.get_tile_num(self.tiles[r][i])]
 
     def __repr__(self):
         return ("Board Object")
 
     # Get a shuffled deck of the correct number of each type of tile in a board
+    # rng is the generator to shuffle with, the random module if not given
     @staticmethod
-    def get_shuffled_tile_deck():
+    def get_shuffled_tile_deck(rng=None):
         deck = []
         # sets up all_tiles
         for i in range(4):
@@ -172,11 +469,11 @@ class Board(object):
                 deck.append(TileType.Desert)
 
         # shuffles the deck
-        random.shuffle(deck)
+        (rng or random).shuffle(deck)
         return deck
 
     @staticmethod
-    def get_shuffled_tile_nums():
+    def get_shuffled_tile_nums(rng=None):
         nums = []
         # Get 2 of each number, most of the time
         for i in range(2):
@@ -191,7 +488,7 @@ class Board(object):
                     # Adds two of everything else
                     else:
                         nums.append(x)
-        random.shuffle(nums)
+        (rng or random).shuffle(nums)
         return nums
 
     # returns the card associated with the tile
@@ -5,7 +5,6 @@ from .tile_type import TileType
 from .harbor import Harbor, HarborType
 
 import math
-import random
 
 # The default, tileagonal board filled with random tiles and tokens
 class DefaultBoard(Board):
@@ -13,9 +12,12 @@ class DefaultBoard(Board):
     def __init__(self, game):
         super(DefaultBoard, self).__init__(game)
 
+        # Shuffles with the game's board stream
+        rng = game.rng.board
+
         # Set tiles
-        tile_deck = Board.get_shuffled_tile_deck()
-        token_deck = Board.get_shuffled_tile_nums()
+        tile_deck = Board.get_shuffled_tile_deck(rng)
+        token_deck = Board.get_shuffled_tile_nums(rng)
         temp_tiles = []
         for r in range(5):
             temp_tiles.append([])
@@ -69,7 +71,7 @@ class DefaultBoard(Board):
             HarborType.Any
         ]
         # Shuffles the harbors
-        random.shuffle(harbor_types)
+        rng.shuffle(harbor_types)
         # Run loop until harbor_types is empty
         while harbor_types:
             # Create a new harbor
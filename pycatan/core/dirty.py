@@ -0,0 +1,12 @@
+# The parts of a game that get_full_state builds separately, as bits of Game.dirty
+# Every change to the game sets the bits of the parts it touches, and
+# get_full_state only rebuilds the parts of its cached GameState whose
+# bits are set, then clears them
+DIRTY_BUILDINGS = 1
+DIRTY_ROADS = 2
+DIRTY_ROBBER = 4
+# player n's bit is DIRTY_PLAYER << n, and covers their hand, development
+# cards, knights, settlements, cities, roads, road length and awards
+DIRTY_PLAYER = 8
+# every part, for a game whose state has never been built
+DIRTY_ALL = -1
@@ -4,15 +4,38 @@ from .statuses import Statuses
 from .card import ResCard, DevCard
 from .building import Building
 from .harbor import Harbor
+from .rng import GameRandom
+from .move import MoveType
+from .journal import UndoToken, MISSING, restore_attr
+from .zobrist import ZobristKeys, AWARDS
+from .dirty import DIRTY_BUILDINGS, DIRTY_ROADS, DIRTY_ROBBER, DIRTY_PLAYER, DIRTY_ALL
+from .topology import BoardTopology
 from pycatan.config.board_definition import board_definition
 
-import random
 import math
 
 class Game:
 
     # initializes the  game
-    def __init__(self, num_of_players=3, on_win=None, starting_board=False):
+    # rng can be a GameRandom, or anything GameRandom accepts as a seed
+    # (an int, a random.Random or a NumPy Generator)
+    def __init__(self, num_of_players=3, on_win=None, starting_board=False, rng=None):
+        # the changes made by the move being applied, see apply
+        # None when no move is being applied, so nothing is recorded
+        self.journal = None
+        # the parts of the game changed since get_full_state last built them
+        # see dirty.py
+        self.dirty = DIRTY_ALL
+        # the parts of the GameState get_full_state last built, which are
+        # shared with every GameState it returns, so they are never changed
+        # in place but replaced by newly built ones
+        self._snapshot = None
+        # the random outcomes (dice, steals and development card draws) of
+        # the moves being made, see record_outcome
+        # None when nobody is collecting them, so nothing is recorded
+        self.outcomes = None
+        # the random number streams for this game
+        self.rng = rng if isinstance(rng, GameRandom) else GameRandom(rng)
         # creates a board
         self.board = DefaultBoard(game=self);
         # creates players
@@ -35,12 +58,226 @@ class Game:
             # Add 14 knight cards
             self.dev_deck.append(DevCard.Knight)
         # Shuffle the developement deck
-        random.shuffle(self.dev_deck)
+        self.rng.deck.shuffle(self.dev_deck)
         # the longest road owner and largest army owner
         self.longest_road_owner = None
         self.largest_army = None
         # whether the game has finished or not
         self.has_ended = False
+        # the player who won, once the game has ended
+        self.winner = None
+        # the Zobrist hash of the position, kept up to date as the game changes
+        # see get_hash
+        topology = self.board.get_topology()
+        self.zobrist = ZobristKeys.for_size(topology.num_points, topology.num_edges,
+                                            topology.num_tiles, num_of_players)
+        self.hash = self.compute_hash()
+
+    # makes an independent copy of the game, for trying out moves
+    # the parts of the board that never change (tiles, token numbers and
+    # the board's layout) are shared, and everything else is copied
+    def fork(self):
+        game = Game.__new__(Game)
+        game.__dict__.update(self.__dict__)
+        game.rng = self.rng.fork()
+        game.players = [p.fork(game) for p in self.players]
+        game.dev_deck = self.dev_deck[:]
+        game.board = self.board.fork(game)
+        game.journal = None
+        game.outcomes = None
+        return game
+
+    # makes a game from a GameState, such as one from get_full_state
+    # restores the board layout, harbors, robber, buildings, roads, hands,
+    # development cards, knights played and the award holders
+    # the state does not say which development cards have been played, so
+    # the deck is every card nobody holds, less one knight per knight played
+    @staticmethod
+    def from_state(state, rng=None):
+        from .tile_type import TileType
+        from .harbor import HarborType
+
+        players_state = state.players_state
+        game = Game(num_of_players=len(players_state), rng=rng)
+        board = game.board
+
+        # the layout of the board
+        tile_types = {t.name.lower(): t for t in TileType}
+        for info in state.board_state.tiles:
+            r, i = info['position']
+            tile = board.tiles[r][i]
+            tile.type = tile_types[info['type']]
+            tile.token_num = info['token']
+        board.robber = list(state.board_state.robber_position)
+
+        harbor_types = {t.name.lower(): t for t in HarborType}
+        harbors = []
+        for info in state.board_state.harbors:
+            one = board_definition.point_id_to_game_coords(info['point_one'])
+            two = board_definition.point_id_to_game_coords(info['point_two'])
+            harbors.append(Harbor(
+                point_one=board.points[one[0]][one[1]],
+                point_two=board.points[two[0]][two[1]],
+                type=harbor_types[info['resource']]))
+        board.harbors = harbors
+
+        # the state is taken to be legal, so roads are added without checking
+        # they connect, since a road can be cut off by a later settlement
+        for n, player_state in enumerate(players_state):
+            player = game.players[n]
+            for r, i in list(player_state.settlements) + list(player_state.cities):
+                player.build_settlement(board.points[r][i], is_starting=True)
+            for r, i in player_state.cities:
+                player.add_cards([ResCard.Wheat] * 2 + [ResCard.Ore] * 3)
+                board.upgrade_settlement(n, board.points[r][i])
+            for r1, i1, r2, i2 in player_state.roads:
+                board.add_road(Building(owner=n, type=Building.BUILDING_ROAD,
+                                        point_one=board.points[r1][i1], point_two=board.points[r2][i2]))
+
+        # cards and awards
+        res_cards = {c.name.lower(): c for c in ResCard}
+        dev_cards = {c.name.lower(): c for c in DevCard}
+        for n, player_state in enumerate(players_state):
+            player = game.players[n]
+            player.add_cards([res_cards[c] for c in player_state.cards])
+            for card in player_state.dev_cards:
+                player.add_dev_card(dev_cards[card])
+                game.dev_deck.remove(dev_cards[card])
+            player.set_knight_cards(player_state.knights_played)
+            for _ in range(player_state.knights_played):
+                game.dev_deck.remove(DevCard.Knight)
+            if player_state.has_longest_road:
+                game.set_award("longest_road_owner", n)
+            if player_state.has_largest_army:
+                game.set_award("largest_army", n)
+
+        game.hash = game.compute_hash()
+        return game
+
+    # applies a Move, where points and tiles are given by number
+    # returns an UndoToken that can be passed to undo to reverse the move
+    # a move the game rejects makes no changes, and its token has no changes to undo
+    # if undoable is False the changes are not recorded, which is faster
+    # when the move will never be undone
+    # the random number streams are not rewound by undo, so after undoing a
+    # roll or a steal the next roll or steal will be different
+    def apply(self, move, undoable=True):
+        if not undoable and self.journal == None:
+            status, result = self._apply_move(move)
+            return UndoToken(move, status, result, [])
+
+        outer = self.journal
+        self.journal = []
+        try:
+            status, result = self._apply_move(move)
+        finally:
+            changes = self.journal
+            self.journal = outer
+
+        if status != Statuses.ALL_GOOD:
+            self._undo_changes(changes)
+            changes = []
+        elif outer != None:
+            # applied while another move is being applied, so the outer move
+            # undoes these changes too
+            outer.extend(changes)
+
+        return UndoToken(move, status, result, changes)
+
+    # reverses a move applied with apply
+    # moves must be undone in the opposite order to the order they were applied
+    def undo(self, token):
+        self._undo_changes(token.changes)
+        token.changes = []
+
+    # undoes a list of changes, from last to first
+    def _undo_changes(self, changes):
+        outer = self.journal
+        self.journal = None
+        try:
+            for undo, args in reversed(changes):
+                undo(*args)
+        finally:
+            self.journal = outer
+
+    # records how to undo a change, if a move is being applied
+    # calling undo(*args) should reverse the change
+    def record(self, undo, *args):
+        if self.journal != None:
+            self.journal.append((undo, args))
+
+    # records a random outcome, if outcomes are being collected
+    # outcomes are lists of plain values, such as ['dice', 3, 4],
+    # ['steal', player, victim, card name] or ['draw', player, card name]
+    def record_outcome(self, *outcome):
+        if self.outcomes != None:
+            self.outcomes.append(list(outcome))
+
+    # records the current value of an attribute before it is changed,
+    # if a move is being applied
+    def record_attr(self, obj, name):
+        if self.journal != None:
+            self.journal.append((restore_attr, (obj, name, getattr(obj, name, MISSING))))
+
+    # makes the changes for a move
+    # returns the status and what the move produced (the roll, or a stolen card)
+    def _apply_move(self, move):
+        player = move.player
+        args = move.args
+        board = self.board
+
+        if move.type == MoveType.ROLL_DICE:
+            roll = self.get_roll()
+            if roll != 7:
+                self.add_yield_for_roll(roll)
+            return (Statuses.ALL_GOOD, roll)
+
+        elif move.type == MoveType.END_TURN:
+            return (Statuses.ALL_GOOD, None)
+
+        elif move.type in (MoveType.PLACE_STARTING_SETTLEMENT, MoveType.BUILD_SETTLEMENT):
+            is_starting = move.type == MoveType.PLACE_STARTING_SETTLEMENT
+            return (self.add_settlement(player, board.get_point(args[0]), is_starting), None)
+
+        elif move.type in (MoveType.PLACE_STARTING_ROAD, MoveType.BUILD_ROAD):
+            is_starting = move.type == MoveType.PLACE_STARTING_ROAD
+            return (self.add_road(player, board.get_point(args[0]), board.get_point(args[1]), is_starting), None)
+
+        elif move.type == MoveType.BUILD_CITY:
+            return (self.add_city(board.get_point(args[0]), player), None)
+
+        elif move.type == MoveType.BUY_DEV_CARD:
+            return (self.build_dev(player), None)
+
+        elif move.type == MoveType.USE_DEV_CARD:
+            card = args[0]
+            if card == DevCard.Knight:
+                card_args = {'robber_pos': board.get_tile(args[1]).position, 'victim': args[2]}
+            elif card == DevCard.Road:
+                card_args = {
+                    'road_one': {'start': board.get_point(args[1]), 'end': board.get_point(args[2])},
+                    'road_two': {'start': board.get_point(args[3]), 'end': board.get_point(args[4])}
+                }
+            elif card == DevCard.Monopoly:
+                card_args = {'card_type': args[1]}
+            elif card == DevCard.YearOfPlenty:
+                card_args = {'card_one': args[1], 'card_two': args[2]}
+            else:
+                card_args = {}
+            status = self.use_dev_card(player, card, card_args)
+            return (status, card_args.get('stolen_card'))
+
+        elif move.type == MoveType.TRADE_BANK:
+            give, count, receive = args
+            return (self.trade_to_bank(player, [give] * count, receive), None)
+
+        elif move.type == MoveType.DISCARD_CARDS:
+            return (self.players[player].remove_cards([args[0]]) or Statuses.ALL_GOOD, None)
+
+        elif move.type == MoveType.ROBBER_MOVE:
+            return self.move_robber(board.get_tile(args[0]), player, args[1])
+
+        return (Statuses.ERR_INPUT, None)
 
     # creates a new settlement belong to the player at the coodinates
     def add_settlement(self, player, point, is_starting=False):
@@ -48,8 +285,12 @@ class Game:
         status = self.players[player].build_settlement(point=point, is_starting=is_starting)
         # If successful, check if the player has now won
         if status == Statuses.ALL_GOOD:
+            # the settlement may have cut another player's longest road
+            self.set_longest_road()
             if self.players[player].get_VP() >= 10:
                 # End the game
+                self.record_attr(self, "has_ended")
+                self.record_attr(self, "winner")
                 self.has_ended = True
                 self.winner = player
 
@@ -80,9 +321,11 @@ class Game:
         # removes the cards
         self.players[player].remove_cards(needed_cards)
 
-        self.players[player].add_dev_card(self.dev_deck[0]) 
+        self.record_outcome("draw", player, self.dev_deck[0].name)
+        self.players[player].add_dev_card(self.dev_deck[0])
         # removes that dev card from the deck
-        del self.dev_deck[0]  # Commented out: not removing from deck in debug mode
+        self.record(self.dev_deck.insert, 0, self.dev_deck[0])
+        del self.dev_deck[0]
         return Statuses.ALL_GOOD
 
     # gives players the proper cards for a given roll
@@ -122,32 +365,30 @@ class Game:
         stolen_card = None
         if victim != None:
             # checks the victim has a settlement on the tile
-            has_settlement = False
-            # Use tile.points directly - these are the 6 points surrounding the hex tile
-            # (NOT get_connected_points which returns points connected to a point!)
-            points = tile.points
-            for p in points:
-                if p != None and p.building != None:
-                    # Check the victim owns the settlement/city
-                    if p.building.owner == victim:
-                        has_settlement = True
-
-            if not has_settlement:
+            if not victim in self.board.get_players_on_tile(tile):
                 return (Statuses.ERR_INPUT, None)
 
         # moves the robber (pass tile position, not tile object)
         self.board.move_robber(tile.position)
         # takes a random card from the victim
-        if victim != None and len(self.players[victim].cards) > 0:
-            # removes a random card from the victim
-            index = round(random.random() * (len(self.players[victim].cards) - 1))
-            stolen_card = self.players[victim].cards[index]
-            self.players[victim].remove_cards([stolen_card])
-            # adds it to the player
-            self.players[player].add_cards([stolen_card])
+        if victim != None:
+            stolen_card = self.steal_card(player, victim)
 
         return (Statuses.ALL_GOOD, stolen_card)
 
+    # moves a random card from the victim's hand to the player's hand
+    # returns the card, or None if the victim has no cards
+    def steal_card(self, player, victim):
+        cards = self.players[victim].cards
+        if len(cards) == 0:
+            return None
+
+        stolen_card = cards[self.rng.steal.randrange(len(cards))]
+        self.record_outcome("steal", player, victim, stolen_card.name)
+        self.players[victim].remove_cards([stolen_card])
+        self.players[player].add_cards([stolen_card])
+        return stolen_card
+
     # trades cards from a player to the bank
     # either by 4 for 1 or using a harbor
     def trade_to_bank(self, player, cards, request):
@@ -164,7 +405,6 @@ class Game:
             # checks if the player has a settlement on the right type of harbor
             has_harbor = False
             harbor_types = self.players[player].get_connected_harbor_types()
-            print(harbor_types)
             for h_type in harbor_types:
                 if Harbor.get_card_from_harbor_type(h_type) == card_type and len(cards) == 2:
                     has_harbor = True
@@ -184,25 +424,83 @@ class Game:
         return Statuses.ALL_GOOD
 
     # gives the longest road to the correct player
+    # the players' road lengths are kept up to date by the board,
+    # so this only compares them
     def set_longest_road(self):
-        # The length of the current longest road segment
-        longest = 0
+        lengths = [p.longest_road_length for p in self.players]
+        longest = max(lengths)
         owner = self.longest_road_owner
 
-        for p in self.players:
-            # longest road needs to be longer than anbody else's
-            # and at least 5 road segments long
-            if p.longest_road_length > longest and p.longest_road_length >= 5:
-                longest = p.longest_road_length
-                owner = self.players.index(p)
+        # the current owner keeps it unless someone is now longer,
+        # which can happen if the owner's road is cut by a settlement
+        if owner == None or lengths[owner] < longest or lengths[owner] < 5:
+            leaders = [i for i in range(len(lengths)) if lengths[i] == longest]
+            # longest road needs to be at least 5 road segments long,
+            # and is set aside if more than one player ties for it
+            if longest >= 5 and len(leaders) == 1:
+                owner = leaders[0]
+            else:
+                owner = None
 
         if self.longest_road_owner != owner:
-            self.longest_road_owner = owner
+            self.set_award("longest_road_owner", owner)
             # checks if the player has won now that they has longest road
-            if self.players[owner].get_VP() >= 10:
+            if owner != None and self.players[owner].get_VP() >= 10:
+                self.record_attr(self, "has_ended")
+                self.record_attr(self, "winner")
                 self.has_ended = True
                 self.winner = owner
 
+    # gives an award (longest_road_owner or largest_army) to a player, or to nobody
+    def set_award(self, award, owner):
+        old = getattr(self, award)
+        self.record(self.set_award, award, old)
+        # the holders' victory points change as well as the award
+        for p in (old, owner):
+            if p != None:
+                self.dirty |= DIRTY_PLAYER << p
+        self.hash ^= self.zobrist.award_key(award, old) ^ self.zobrist.award_key(award, owner)
+        setattr(self, award, owner)
+
+    # gets the Zobrist hash of the position
+    # covers the buildings, roads, robber, every player's hand, development
+    # cards, knights played and the award holders
+    # whose turn it is and the phase of the game are kept outside Game, and
+    # can be mixed in by passing them here
+    def get_hash(self, player=None, phase=None):
+        if player == None and phase == None:
+            return self.hash
+        return self.hash ^ self.zobrist.turn_key(player, phase)
+
+    # works out the hash of the position from scratch
+    # get_hash should always give the same value, since the hash is kept up
+    # to date by every method that changes the game
+    def compute_hash(self):
+        keys = self.zobrist
+        board = self.board
+        topology = board.get_topology()
+        h = board.get_robber_key()
+
+        for point in [p for row in board.points for p in row]:
+            if point.building != None:
+                h ^= keys.building[board.get_point_num(point)][point.building.owner][point.building.type]
+
+        for road in board.roads:
+            edge = topology.edge_ids[(board.get_point_num(road.point_one), board.get_point_num(road.point_two))]
+            h ^= keys.road[edge][road.owner]
+
+        for p in self.players:
+            for card, count in enumerate(p.cards.counts):
+                h ^= keys.hand_key(p.num, card, count)
+            for card in DevCard:
+                h ^= keys.dev_key(p.num, card.value, p.dev_cards.count(card))
+            h ^= keys.knights_key(p.num, p.knight_cards)
+
+        for award in AWARDS:
+            h ^= keys.award_key(award, getattr(self, award))
+
+        return h
+
     # changes a settlement on the board for a city
     def add_city(self, point, player):
         # Upgrade settlement to city using the point object
@@ -211,6 +509,8 @@ class Game:
         if status == Statuses.ALL_GOOD:
             # checks if the player won
             if self.players[player].get_VP() >= 10:
+                self.record_attr(self, "has_ended")
+                self.record_attr(self, "winner")
                 self.has_ended = True
                 self.winner = player
 
@@ -279,6 +579,7 @@ class Game:
             # builds the roads
             for r in road_names:
                 self.board.add_road(Building(point_one=args[r]["start"], point_two=args[r]["end"], owner=player, type=Building.BUILDING_ROAD))
+            self.set_longest_road()
 
             # Don't return here - let it continue to remove the card at the end
 
@@ -307,20 +608,20 @@ class Game:
                 return result
 
             # adds one to the player's knight count
-            (self.players[player]).knight_cards += 1
+            self.players[player].set_knight_cards(self.players[player].knight_cards + 1)
 
             # checks for the largest army
             if self.largest_army == None:
                 # if nobody has the largest army, the player needs at least 3 cards
                 if self.players[player].knight_cards >= 3:
-                    self.largest_army = player
+                    self.set_award("largest_army", player)
 
             else:
                 # the player needs to have more than anybody else
                 current_longest = self.players[self.largest_army].knight_cards
 
                 if self.players[player].knight_cards > current_longest:
-                    self.largest_army = player
+                    self.set_award("largest_army", player)
 
         elif card == DevCard.Monopoly:
             # gets the type of card
@@ -362,9 +663,11 @@ class Game:
 
     # simulates 2 dice rolling
     def get_roll(self):
-        return round(random.random() * 6) + round(random.random() * 6)
+        dice = self.rng.roll_dice()
+        self.record_outcome("dice", *dice)
+        return sum(dice)
 
-    def get_full_state(self):
+    def get_full_state(self, player_names=None):
         """
         Get the complete current state of the game.
         
@@ -372,17 +675,37 @@ class Game:
         and returns it in a GameState object for use by the
         GameManager and visualization systems.
         
+        The parts of the state are cached between calls, and only the
+        parts the game has changed since the last call are built again
+        (see dirty.py). The PlayerState, BoardState and the lists and dicts
+        in them are shared with earlier GameStates when they have not
+        changed, so they should be treated as read-only.
+        
+        Args:
+            player_names: Name of each player, "Player <n>" if not given
+        
         Returns:
             GameState: Complete current game state
         """
         from pycatan.management.actions import GameState, PlayerState, BoardState, GamePhase, TurnPhase
         
-        # Create player states
-        players_state = []
+        dirty = self.dirty
+        snapshot = self._snapshot
+        if snapshot == None:
+            snapshot = {}
+            dirty = DIRTY_ALL
+        if player_names == None:
+            player_names = [f"Player {i}" for i in range(len(self.players))]  # Default names
+        
+        # Create the states of the players that have changed
+        players_state = list(snapshot.get('players', ()))
         for i, player in enumerate(self.players):
-            player_state = PlayerState(
+            name = player_names[i] if i < len(player_names) else f"Player {i}"
+            if not dirty & (DIRTY_PLAYER << i) and players_state[i].name == name:
+                continue
+            players_state[i:i + 1] = [PlayerState(
                 player_id=i,
-                name=f"Player {i}",  # Default name - can be enhanced later
+                name=name,
                 cards=[card.name.lower() for card in player.cards],  # Convert enum to string
                 dev_cards=[card.name.lower() for card in player.dev_cards],
                 settlements=self._get_player_settlements(player),
@@ -393,17 +716,22 @@ class Game:
                 has_longest_road=(self.longest_road_owner == i),
                 has_largest_army=(self.largest_army == i),
                 knights_played=player.knight_cards
+            )]
+        
+        # Create the board state, if any part of it has changed
+        board_state = snapshot.get('board')
+        if dirty & (DIRTY_BUILDINGS | DIRTY_ROADS | DIRTY_ROBBER):
+            robber_changed = dirty & DIRTY_ROBBER
+            board_state = BoardState(
+                tiles=self._get_tiles_info() if robber_changed else board_state.tiles,
+                robber_position=tuple(self._get_robber_position()) if robber_changed else board_state.robber_position,
+                harbors=self._get_ports_info() if dirty == DIRTY_ALL else board_state.harbors,
+                buildings=self._get_all_buildings() if dirty & DIRTY_BUILDINGS else board_state.buildings,
+                roads=self._get_all_roads() if dirty & DIRTY_ROADS else board_state.roads
             )
-            players_state.append(player_state)
         
-        # Create board state
-        board_state = BoardState(
-            tiles=self._get_tiles_info(),
-            robber_position=tuple(self._get_robber_position()),
-            harbors=self._get_ports_info(),
-            buildings=self._get_all_buildings(),
-            roads=self._get_all_roads()
-        )
+        self._snapshot = {'players': players_state, 'board': board_state}
+        self.dirty = 0
         
         # Create and return game state
         return GameState(
@@ -412,33 +740,28 @@ class Game:
             current_player=0,  # Basic - managed by GameManager
             game_phase=GamePhase.NORMAL_PLAY,  # Default to normal play
             turn_phase=TurnPhase.PLAYER_ACTIONS,  # Default to player actions
-            players_state=players_state,
+            players_state=list(players_state),
             board_state=board_state
         )
 
     def _get_player_settlements(self, player):
         """Get list of settlement coordinates for a player."""
-        settlements = []
-        for point in self.board.points:
-            for p in point:
-                if p and p.building and p.building.type == 0 and p.building.owner == player.num:  # BUILDING_SETTLEMENT = 0
-                    settlements.append(p.position)
-        return settlements
+        return self._get_positions(self.board.settlement_masks.get(player.num, 0))
 
     def _get_player_cities(self, player):
         """Get list of city coordinates for a player."""
-        cities = []
-        for point in self.board.points:
-            for p in point:
-                if p and p.building and p.building.type == 2 and p.building.owner == player.num:  # BUILDING_CITY = 2
-                    cities.append(p.position)
-        return cities
+        return self._get_positions(self.board.city_masks.get(player.num, 0))
+
+    def _get_positions(self, mask):
+        """Get the coordinates of the points in a bitmask of point numbers."""
+        board = self.board
+        return [board.get_point(num).position for num in BoardTopology.from_mask(mask)]
 
     def _get_player_roads(self, player):
         """Get list of road connections for a player."""
         roads = []
-        for road in self.board.roads:
-            if road and road.owner == player.num and road.type == 1:  # BUILDING_ROAD = 1
+        for road in self.board.get_player_roads(player.num):
+            if road and road.type == 1:  # BUILDING_ROAD = 1
                 # Roads connect two points
                 start_pos = road.point_one.position if road.point_one else [0, 0]
                 end_pos = road.point_two.position if road.point_two else [0, 0]
@@ -0,0 +1,97 @@
+from .card import ResCard
+
+# the resource cards, indexed by their value
+RES_CARDS = tuple(sorted(ResCard, key=lambda c: c.value))
+
+# A player's resource cards, stored as one counter per resource type
+# Adding, removing, checking and counting cards are all O(1) per card,
+# and the hand can still be used like a list of ResCards
+# (len, iteration, indexing, count, index and `in`)
+class Hand:
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, cards=()):
+        # the number of cards of each type, indexed by ResCard value
+        self.counts = [0] * len(RES_CARDS)
+        # the total number of cards
+        self.total = 0
+        for c in cards:
+            self.add(c)
+
+    # adds n cards of one type
+    def add(self, card, n=1):
+        self.counts[card.value] += n
+        self.total += n
+
+    # removes n cards of one type
+    # does not check the hand has them, use has() first
+    def remove(self, card, n=1):
+        self.counts[card.value] -= n
+        self.total -= n
+
+    # checks the hand has every card in a list
+    # repeated cards must all be in the hand
+    def has(self, cards):
+        counts = self.counts
+        needed = [0] * len(counts)
+        for c in cards:
+            needed[c.value] += 1
+            if needed[c.value] > counts[c.value]:
+                return False
+        return True
+
+    # removes all the cards of one type, returning how many there were
+    def take_all(self, card):
+        n = self.counts[card.value]
+        self.remove(card, n)
+        return n
+
+    # returns a copy of the hand
+    def copy(self):
+        hand = Hand()
+        hand.counts = self.counts[:]
+        hand.total = self.total
+        return hand
+
+    # list-compatible methods
+    # the cards are ordered by type, in ResCard value order
+
+    def count(self, card):
+        return self.counts[card.value]
+
+    def index(self, card):
+        if self.counts[card.value] == 0:
+            raise ValueError("%s is not in hand" % card)
+        return sum(self.counts[:card.value])
+
+    def __len__(self):
+        return self.total
+
+    def __contains__(self, card):
+        return self.counts[card.value] > 0
+
+    def __iter__(self):
+        for card, n in zip(RES_CARDS, self.counts):
+            for _ in range(n):
+                yield card
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.total
+        if index < 0 or index >= self.total:
+            raise IndexError("hand index out of range")
+        for card, n in zip(RES_CARDS, self.counts):
+            if index < n:
+                return card
+            index -= n
+
+    def __eq__(self, other):
+        if isinstance(other, Hand):
+            return self.counts == other.counts
+        if isinstance(other, (list, tuple)):
+            return len(other) == self.total and Hand(other).counts == self.counts
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
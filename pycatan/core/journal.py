@@ -0,0 +1,32 @@
+# Used as the old value of an attribute that did not exist before it was set
+MISSING = object()
+
+# The changes made by a single move, so that the move can be undone
+# Returned by Game.apply and passed to Game.undo
+# Each change is stored as (function, args), where calling function(*args)
+# reverses it, and the changes are undone from last to first
+class UndoToken:
+
+    __slots__ = ("move", "status", "result", "changes")
+
+    def __init__(self, move, status, result, changes):
+        # the move that was applied
+        self.move = move
+        # the status the game gave the move
+        self.status = status
+        # what the move produced, if anything
+        # the roll for ROLL_DICE, or the stolen card for robber moves and knights
+        self.result = result
+        # how to undo each change the move made
+        self.changes = changes
+
+    def __repr__(self):
+        return "UndoToken(%s, %s, %d changes)" % (self.move, self.status, len(self.changes))
+
+# sets an attribute back to an old value, deleting it if it did not exist
+def restore_attr(obj, name, value):
+    if value is MISSING:
+        if hasattr(obj, name):
+            delattr(obj, name)
+    else:
+        setattr(obj, name, value)
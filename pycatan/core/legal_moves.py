@@ -0,0 +1,252 @@
+from .topology import BoardTopology
+from .move import Move, MoveType
+from .card import ResCard, DevCard
+from .harbor import Harbor
+
+# All resource cards, in a fixed order
+RESOURCES = (ResCard.Wood, ResCard.Brick, ResCard.Ore, ResCard.Sheep, ResCard.Wheat)
+
+# Cards needed for each purchase
+SETTLEMENT_COST = [ResCard.Wood, ResCard.Brick, ResCard.Sheep, ResCard.Wheat]
+CITY_COST = [ResCard.Wheat, ResCard.Wheat, ResCard.Ore, ResCard.Ore, ResCard.Ore]
+ROAD_COST = [ResCard.Wood, ResCard.Brick]
+DEV_CARD_COST = [ResCard.Wheat, ResCard.Ore, ResCard.Sheep]
+
+# Generates every legal, fully parameterised move for a player
+# Points and tiles in moves are given by number (see BoardTopology),
+# and the moves give exactly the same results as the checks in Player and Game
+# Placements are worked out with bitmasks over the board's topology,
+# rather than by trying every point and edge
+class LegalMoveGenerator:
+
+    def __init__(self, game):
+        self.game = game
+        board = game.board
+        # the fixed layout of the board, shared with other games
+        self.topology = board.get_topology()
+        # the points and tiles of this game, by number
+        self.points = [p for row in board.points for p in row]
+        self.tiles = [t for row in board.tiles for t in row]
+        # the card each harbor trades (None for 3:1 harbors) and a mask of its points
+        self.harbors = [
+            (Harbor.get_card_from_harbor_type(h.type),
+             BoardTopology.to_mask([board.get_point_num(h.point_one), board.get_point_num(h.point_two)]))
+            for h in board.harbors
+        ]
+
+    # gets every legal move before the dice are rolled
+    def pre_roll_moves(self, player):
+        return [Move(MoveType.ROLL_DICE, player)] + self.dev_card_moves(player)
+
+    # gets every legal move after the dice have been rolled
+    def turn_moves(self, player):
+        moves = []
+        moves.extend(self.settlement_moves(player))
+        moves.extend(self.city_moves(player))
+        moves.extend(self.road_moves(player))
+
+        if self.game.dev_deck and self.game.players[player].has_cards(DEV_CARD_COST):
+            moves.append(Move(MoveType.BUY_DEV_CARD, player))
+
+        moves.extend(self.dev_card_moves(player))
+        moves.extend(self.bank_trade_moves(player))
+        moves.append(Move(MoveType.END_TURN, player))
+        return moves
+
+    # gets the legal settlement placements for a player
+    def settlement_moves(self, player, is_starting=False):
+        if is_starting:
+            move_type = MoveType.PLACE_STARTING_SETTLEMENT
+            candidates = (1 << self.topology.num_points) - 1
+        else:
+            move_type = MoveType.BUILD_SETTLEMENT
+            if not self.game.players[player].has_cards(SETTLEMENT_COST):
+                return []
+            # settlements must be next to one of the player's roads
+            candidates = self.game.board.road_point_masks.get(player, 0)
+
+        # the point and all the points next to it must be empty
+        candidates &= ~self._blocked_points()
+        return [Move(move_type, player, (i,)) for i in BoardTopology.from_mask(candidates)]
+
+    # gets the settlements a player can upgrade to cities
+    def city_moves(self, player):
+        if not self.game.players[player].has_cards(CITY_COST):
+            return []
+
+        settlements = self.game.board.settlement_masks.get(player, 0)
+        return [Move(MoveType.BUILD_CITY, player, (i,)) for i in BoardTopology.from_mask(settlements)]
+
+    # gets the legal road placements for a player
+    def road_moves(self, player, is_starting=False):
+        if not is_starting and not self.game.players[player].has_cards(ROAD_COST):
+            return []
+
+        move_type = MoveType.PLACE_STARTING_ROAD if is_starting else MoveType.BUILD_ROAD
+        return [Move(move_type, player, edge) for edge in self.road_edges(player)]
+
+    # gets every (point, point) edge where a player could build a road
+    def road_edges(self, player):
+        edges = self.topology.edges
+        return [edges[e] for e in BoardTopology.from_mask(self._road_edge_mask(player))]
+
+    # gets the legal development card plays for a player
+    def dev_card_moves(self, player):
+        moves = []
+        dev_cards = set(self.game.players[player].dev_cards)
+
+        if DevCard.Knight in dev_cards:
+            for tile, victim in self.robber_targets(player):
+                moves.append(Move(MoveType.USE_DEV_CARD, player, (DevCard.Knight, tile, victim)))
+
+        if DevCard.Road in dev_cards:
+            for road_one, road_two in self.road_building_pairs(player):
+                moves.append(Move(MoveType.USE_DEV_CARD, player, (DevCard.Road,) + road_one + road_two))
+
+        if DevCard.Monopoly in dev_cards:
+            for card in RESOURCES:
+                moves.append(Move(MoveType.USE_DEV_CARD, player, (DevCard.Monopoly, card)))
+
+        if DevCard.YearOfPlenty in dev_cards:
+            for i, card_one in enumerate(RESOURCES):
+                for card_two in RESOURCES[i:]:
+                    moves.append(Move(MoveType.USE_DEV_CARD, player, (DevCard.YearOfPlenty, card_one, card_two)))
+
+        return moves
+
+    # gets the pairs of roads a player could build with a Road Building card
+    # the second road may only be connected through the first one
+    def road_building_pairs(self, player):
+        topology = self.topology
+        edges = topology.edges
+        valid_mask = self._road_edge_mask(player)
+        # edges that are free but not connected to the player
+        isolated_mask = ~valid_mask & ~self.game.board.road_mask & ((1 << topology.num_edges) - 1)
+        valid = BoardTopology.from_mask(valid_mask)
+        pairs = []
+
+        for n, e in enumerate(valid):
+            # two roads that could each be built now
+            for other in valid[n + 1:]:
+                pairs.append((edges[e], edges[other]))
+
+            # a second road that is only connected through the first one
+            for a in edges[e]:
+                for other in BoardTopology.from_mask(topology.point_edge_masks[a] & isolated_mask):
+                    pairs.append((edges[e], edges[other]))
+
+        return pairs
+
+    # gets the legal trades with the bank, at every ratio the player has access to
+    def bank_trade_moves(self, player):
+        p = self.game.players[player]
+        if len(p.cards) < 2:
+            return []
+
+        # works out which ratios are available for each resource
+        buildings = self.game.board.get_building_mask(player)
+        has_any_harbor = False
+        harbor_cards = set()
+        for card, mask in self.harbors:
+            if buildings & mask:
+                if card == None:
+                    has_any_harbor = True
+                else:
+                    harbor_cards.add(card)
+
+        moves = []
+        for give in RESOURCES:
+            count = p.cards.count(give)
+            ratios = [4]
+            if has_any_harbor:
+                ratios.append(3)
+            if give in harbor_cards:
+                ratios.append(2)
+
+            for ratio in ratios:
+                if count >= ratio:
+                    for receive in RESOURCES:
+                        if receive != give:
+                            moves.append(Move(MoveType.TRADE_BANK, player, (give, ratio, receive)))
+
+        return moves
+
+    # gets the cards a player can discard, one card at a time
+    def discard_moves(self, player):
+        cards = self.game.players[player].cards
+        return [Move(MoveType.DISCARD_CARDS, player, (card,)) for card in RESOURCES if card in cards]
+
+    # gets the legal robber placements and steal targets after a 7
+    def robber_moves(self, player):
+        return [Move(MoveType.ROBBER_MOVE, player, target) for target in self.robber_targets(player)]
+
+    # gets every (tile, victim) pair the robber can be moved to by a player
+    # the robber must move to a different tile, and players next to the
+    # tile with at least one card can be stolen from
+    # victim is None if there is nobody to steal from
+    def robber_targets(self, player):
+        game = self.game
+        robber = game.board.robber
+
+        # players who can be stolen from, and where their buildings are
+        others = [
+            (q, game.board.get_building_mask(q))
+            for q in range(len(game.players))
+            if q != player and len(game.players[q].cards) > 0
+        ]
+
+        targets = []
+        for t, tile_mask in enumerate(self.topology.tile_point_masks):
+            if self.tiles[t].position == robber:
+                continue
+
+            victims = [q for q, buildings in others if buildings & tile_mask]
+            if victims:
+                targets.extend((t, q) for q in victims)
+            else:
+                targets.append((t, None))
+
+        return targets
+
+    # gets the players that can be stolen from once the robber has been moved
+    # each move gives the robber's current tile and the victim
+    def steal_moves(self, player):
+        game = self.game
+        robber = game.board.robber
+
+        for t, tile in enumerate(self.tiles):
+            if tile.position == robber:
+                tile_mask = self.topology.tile_point_masks[t]
+                return [
+                    Move(MoveType.ROBBER_MOVE, player, (t, q))
+                    for q in range(len(game.players))
+                    if q != player and len(game.players[q].cards) > 0
+                    and game.board.get_building_mask(q) & tile_mask
+                ]
+
+        return []
+
+    # gets a mask of the edges a player could build a road on
+    # a road must start from one of the player's buildings, or from one of
+    # their roads as long as it does not go through another player's building
+    def _road_edge_mask(self, player):
+        board = self.game.board
+        point_edge_masks = self.topology.point_edge_masks
+
+        anchors = board.get_building_mask(player) | (board.road_point_masks.get(player, 0) & ~board.occupied_mask)
+        mask = 0
+        for i in BoardTopology.from_mask(anchors):
+            mask |= point_edge_masks[i]
+
+        return mask & ~board.road_mask
+
+    # gets a mask of the points where no settlement can be built
+    # since they, or a point next to them, already have a building
+    def _blocked_points(self):
+        occupied = self.game.board.occupied_mask
+        neighbour_masks = self.topology.point_neighbour_masks
+
+        blocked = occupied
+        for i in BoardTopology.from_mask(occupied):
+            blocked |= neighbour_masks[i]
+        return blocked
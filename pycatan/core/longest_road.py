@@ -0,0 +1,161 @@
+# Tracks the longest road of a single player
+# The player's roads are kept as a graph of edges between points, split
+# into connected components. Adding a road or blocking a point only
+# recalculates the component it touches, and each recalculation is an
+# iterative depth first search over bitmasks of the edges already used
+class RoadNetwork:
+
+    def __init__(self, owner):
+        # the player number this network belongs to
+        self.owner = owner
+        # the points at each end of every road, indexed by edge number
+        self.edges = []
+        # point -> [(edge number, point at the other end), ...]
+        self.adjacent = {}
+        # the component each edge is in
+        self.edge_component = []
+        # component id -> bitmask of the edges in it
+        self.components = {}
+        # component id -> length of the longest road in it
+        self.component_lengths = {}
+        # the longest road segment over all components
+        self.longest = 0
+        # used to give components unique ids
+        self._next_component = 0
+
+    # adds a road between two points
+    # returns the new longest road length
+    def add_road(self, point_one, point_two):
+        edge = len(self.edges)
+        self.edges.append((point_one, point_two))
+        self.adjacent.setdefault(point_one, []).append((edge, point_two))
+        self.adjacent.setdefault(point_two, []).append((edge, point_one))
+
+        # finds the components this road joins together
+        joined = set()
+        for p in (point_one, point_two):
+            for e, _ in self.adjacent[p]:
+                if e != edge:
+                    joined.add(self.edge_component[e])
+
+        # merges them into a single component
+        component = self._next_component
+        self._next_component += 1
+        mask = 1 << edge
+        self.edge_component.append(component)
+        for c in joined:
+            mask |= self.components.pop(c)
+            del self.component_lengths[c]
+        self.components[component] = mask
+        if joined:
+            e = 0
+            m = mask
+            while m:
+                if m & 1:
+                    self.edge_component[e] = component
+                m >>= 1
+                e += 1
+
+        self._update_component(component)
+        return self.longest
+
+    # makes a copy of the network for a forked game
+    # point_map maps each point to the point that replaces it
+    def fork(self, point_map):
+        network = RoadNetwork(self.owner)
+        network.edges = [(point_map[a], point_map[b]) for a, b in self.edges]
+        network.adjacent = {
+            point_map[p]: [(e, point_map[q]) for e, q in adjacent]
+            for p, adjacent in self.adjacent.items()
+        }
+        network.edge_component = self.edge_component[:]
+        network.components = dict(self.components)
+        network.component_lengths = dict(self.component_lengths)
+        network.longest = self.longest
+        network._next_component = self._next_component
+        return network
+
+    # saves the state of the network, so that it can be put back with restore
+    def save(self):
+        return (len(self.edges), self.edge_component[:], dict(self.components),
+                dict(self.component_lengths), self.longest, self._next_component)
+
+    # puts back a state returned by save, removing any roads added since
+    # the points must not have been blocked or unblocked since the save
+    def restore(self, saved):
+        num_edges, edge_component, components, component_lengths, longest, next_component = saved
+        while len(self.edges) > num_edges:
+            # the newest road is always the last one next to each of its points
+            for p in self.edges.pop():
+                adjacent = self.adjacent[p]
+                adjacent.pop()
+                if not adjacent:
+                    del self.adjacent[p]
+        self.edge_component = edge_component
+        self.components = components
+        self.component_lengths = component_lengths
+        self.longest = longest
+        self._next_component = next_component
+
+    # should be called when another player builds on a point
+    # since a road cannot continue through another player's settlement or city
+    # returns whether the longest road length changed
+    def block_point(self, point):
+        if point not in self.adjacent:
+            return False
+
+        old_longest = self.longest
+        # only the component running through this point can change
+        component = self.edge_component[self.adjacent[point][0][0]]
+        self._update_component(component)
+        return self.longest != old_longest
+
+    # recalculates the longest road in a component
+    def _update_component(self, component):
+        old_length = self.component_lengths.get(component, 0)
+        length = self._longest_path(self.components[component])
+        self.component_lengths[component] = length
+
+        if length >= self.longest:
+            self.longest = length
+        elif old_length == self.longest:
+            # this component may have held the longest road
+            self.longest = max(self.component_lengths.values())
+
+    # checks if another player has a building on the point
+    def is_blocked(self, point):
+        return point.building != None and point.building.owner != self.owner
+
+    # finds the longest trail using only the edges in a mask
+    # no edge can be used twice, and the trail cannot pass through a blocked point
+    def _longest_path(self, mask):
+        adjacent = self.adjacent
+        is_blocked = self.is_blocked
+
+        # a trail can start at either end of any edge in the component
+        starts = set()
+        e = 0
+        m = mask
+        while m:
+            if m & 1:
+                starts.update(self.edges[e])
+            m >>= 1
+            e += 1
+
+        longest = 0
+        for start in starts:
+            # each entry is (point, edges used so far, length)
+            stack = [(start, 0, 0)]
+            while stack:
+                point, used, length = stack.pop()
+                if length > longest:
+                    longest = length
+                # can only continue through a blocked point if the trail starts there
+                if length > 0 and is_blocked(point):
+                    continue
+                for edge, other in adjacent[point]:
+                    bit = 1 << edge
+                    if not used & bit:
+                        stack.append((other, used | bit, length + 1))
+
+        return longest
@@ -0,0 +1,53 @@
+from enum import Enum
+from typing import NamedTuple, Tuple, Any
+
+# The different kinds of moves a player can make
+# Mirrors the ActionType names used by the GameManager
+class MoveType(Enum):
+
+    # setup phase
+    PLACE_STARTING_SETTLEMENT = 0
+    PLACE_STARTING_ROAD = 1
+
+    # before/after the dice roll
+    ROLL_DICE = 2
+    END_TURN = 3
+
+    # building
+    BUILD_SETTLEMENT = 4
+    BUILD_CITY = 5
+    BUILD_ROAD = 6
+
+    # development cards
+    BUY_DEV_CARD = 7
+    USE_DEV_CARD = 8
+
+    # trading with the bank, either 4:1 or through a harbor
+    TRADE_BANK = 9
+
+    # after a 7 is rolled
+    DISCARD_CARDS = 10
+    ROBBER_MOVE = 11
+
+# a single, fully parameterised move
+# points and tiles are given as flat indexes (0-53 and 0-18),
+# in the same row by row order as Board.points and Board.tiles
+#
+# args for each move type:
+#   PLACE_STARTING_SETTLEMENT, BUILD_SETTLEMENT, BUILD_CITY: (point,)
+#   PLACE_STARTING_ROAD, BUILD_ROAD: (point_one, point_two)
+#   USE_DEV_CARD: (DevCard.Knight, tile, victim)
+#                 (DevCard.Road, point_one, point_two, point_three, point_four)
+#                 (DevCard.Monopoly, ResCard)
+#                 (DevCard.YearOfPlenty, ResCard, ResCard)
+#   TRADE_BANK: (ResCard given, number given, ResCard received)
+#   DISCARD_CARDS: (ResCard,)
+#   ROBBER_MOVE: (tile, victim)
+#   ROLL_DICE, END_TURN, BUY_DEV_CARD: ()
+#
+# victim is None when there is nobody to steal from
+class Move(NamedTuple):
+
+    type: MoveType
+    player: int
+    args: Tuple[Any, ...] = ()
@@ -1,6 +1,8 @@
 from .building import Building
 from .statuses import Statuses
 from .card import ResCard, DevCard
+from .hand import Hand
+from .dirty import DIRTY_PLAYER
 
 import math
 
@@ -17,9 +19,9 @@ class Player:
         self.starting_roads = []
         # the number of victory points
         self.victory_points = 0
-        # the cards the player has
-        # each will be a number corresponding with the static variables CARD_<type>
-        self.cards = []
+        # the resource cards the player has
+        # stored as a count of each ResCard, but can be used like a list
+        self.cards = Hand()
         # the development cards this player has
         self.dev_cards = []
         # the number of knight cards the player has played
@@ -27,49 +29,37 @@ class Player:
         # the longest road segment this player has
         self.longest_road_length = 0
 
+    # makes a copy of the player for a forked game
+    def fork(self, game):
+        player = Player.__new__(Player)
+        player.__dict__.update(self.__dict__)
+        player.game = game
+        player.cards = self.cards.copy()
+        player.dev_cards = self.dev_cards[:]
+        player.starting_roads = self.starting_roads[:]
+        return player
+
     # builds a settlement belonging to this player
     def build_settlement(self, point, is_starting=False):
 
-        if not is_starting:
-            # makes sure the player has the cards to build a settlements
-            cards_needed = [
-                ResCard.Wood,
-                ResCard.Brick,
-                ResCard.Sheep,
-                ResCard.Wheat
-            ]
+        # makes sure the player has the cards to build a settlements
+        cards_needed = [
+            ResCard.Wood,
+            ResCard.Brick,
+            ResCard.Sheep,
+            ResCard.Wheat
+        ]
 
+        if not is_starting:
             # checks the player has the cards
             if not self.has_cards(cards_needed):
                 return Statuses.ERR_CARDS
 
-            # checks it is connected to a road owned by the player
-            connected_by_road = False
-            # gets the roads
-            roads = self.game.board.roads
-
-            for r in roads:
-                # checks if the road is connected
-                if r.point_one is point or r.point_two is point:
-                    # checks this player owns the road
-                    if r.owner == self.num:
-                        connected_by_road = True
-
-            if not connected_by_road:
-                return Statuses.ERR_ISOLATED
-
-        # checks that a building does not already exist there
-        if point.building != None:
-            return Statuses.ERR_BLOCKED
-
-        # checks all other settlements are at least 2 away
-        # gets the connecting point's coords
-        points = point.connected_points
-        for p in points:
+        # checks the location is valid
+        location_status = self.settlement_location_is_valid(point=point, is_starting=is_starting)
 
-            # checks if the point is occupied
-            if p.building != None:
-                return Statuses.ERR_BLOCKED
+        if not location_status == Statuses.ALL_GOOD:
+            return location_status
 
         if not is_starting:
             # removes the cards
@@ -82,32 +72,37 @@ class Player:
             point_one = point),
             point = point)
         # adds a victory point
+        self.game.record_attr(self, "victory_points")
         self.victory_points += 1
 
         return Statuses.ALL_GOOD
 
     # checks if the player has all of the cards given in an array
+    # repeated cards must all be in the player's hand
     def has_cards(self, cards):
-
-        # needs to duplicate the cards, and then delete them once found
-        # otherwise checking if the player has multiple of the same card
-        # will return true with only one card
-
-        # cards_dup stands for cards duplicate
-        cards_dup = self.cards[:]
-        for c in cards:
-            if cards_dup.count(c) == 0:
-                return False
-            else:
-                index = cards_dup.index(c)
-                del cards_dup[index]
-
-        return True
+        return self.cards.has(cards)
 
     # adds some cards to a player's hand
     def add_cards(self, cards):
+        self.game.record(self._take_cards, list(cards))
+        for c in cards:
+            self._change_card_count(c, 1)
+
+    # removes cards without checking the player has them
+    # used to undo add_cards
+    def _take_cards(self, cards):
         for c in cards:
-            self.cards.append(c)
+            self._change_card_count(c, -1)
+
+    # adds n cards of one type to the hand (or removes them, if n is negative)
+    # keeping the game's hash up to date
+    def _change_card_count(self, card, n):
+        value = card.value
+        count = self.cards.counts[value]
+        keys = self.game.zobrist
+        self.game.hash ^= keys.hand_key(self.num, value, count) ^ keys.hand_key(self.num, value, count + n)
+        self.game.dirty |= DIRTY_PLAYER << self.num
+        self.cards.add(card, n)
 
     # removes cards from a player's hand
     def remove_cards(self, cards):
@@ -117,13 +112,14 @@ class Player:
 
         else:
             # removes the cards
+            self.game.record(self.add_cards, list(cards))
             for c in cards:
-                index = self.cards.index(c)
-                del self.cards[index]
+                self._change_card_count(c, -1)
 
     #adds a development card
     def add_dev_card(self, dev_card):
-        self.dev_cards.append(dev_card)
+        self.game.record(self._remove_dev_card_at, len(self.dev_cards))
+        self._insert_dev_card(len(self.dev_cards), dev_card)
 
     # removes a dev card
     def remove_dev_card(self, card):
@@ -132,64 +128,76 @@ class Player:
             if self.dev_cards[i] == card:
 
                 # deletes the card
-                del self.dev_cards[i]
+                self.game.record(self._insert_dev_card, i, card)
+                self._remove_dev_card_at(i)
                 return Statuses.ALL_GOOD
 
         # error if the player does not have the cards
         return Statuses.ERR_CARDS
 
-    # checks a road location is valid
-    def road_location_is_valid(self, start, end):
-        # checks the two points are connected
-        connected = False
-        # gets the points connected to start
-        points = start.connected_points
-
-        for p in points:
-            if end == p:
-                connected = True
-                break
-
-        if not connected:
-            return Statuses.ERR_NOT_CON
-
-        connected_by_road = False
-        for road in self.game.board.roads:
-            # checks the road does not already exists with these points
-            if road.point_one == start or road.point_two == start:
-                if road.point_one == end or road.point_two == end:
-                    return Statuses.ERR_BLOCKED
-
-        # check this player has a settlement on one of these points or a connecting road
-        is_connected = False
+    # adds a dev card at a position in dev_cards, keeping the game's hash up to date
+    def _insert_dev_card(self, i, card):
+        self._hash_dev_card(card, 1)
+        self.dev_cards.insert(i, card)
+
+    # removes the dev card at a position in dev_cards, keeping the game's hash up to date
+    def _remove_dev_card_at(self, i):
+        self._hash_dev_card(self.dev_cards[i], -1)
+        del self.dev_cards[i]
+
+    # updates the game's hash for a change in how many of one dev card the player has
+    def _hash_dev_card(self, card, n):
+        count = self.dev_cards.count(card)
+        keys = self.game.zobrist
+        self.game.hash ^= keys.dev_key(self.num, card.value, count) ^ keys.dev_key(self.num, card.value, count + n)
+        self.game.dirty |= DIRTY_PLAYER << self.num
+
+    # sets the number of knight cards the player has played
+    def set_knight_cards(self, count):
+        self.game.record(self.set_knight_cards, self.knight_cards)
+        keys = self.game.zobrist
+        self.game.hash ^= keys.knights_key(self.num, self.knight_cards) ^ keys.knights_key(self.num, count)
+        self.game.dirty |= DIRTY_PLAYER << self.num
+        self.knight_cards = count
+
+    # checks a settlement location is valid
+    # does not check the player has the cards
+    def settlement_location_is_valid(self, point, is_starting=False):
+        board = self.game.board
+        num = board.get_point_num(point)
 
-        if start.building != None:
-            # checks if this player owns the settlement/city
-            if start.building.owner == self.num:
-                is_connected = True
+        if not is_starting:
+            # checks it is connected to a road owned by the player
+            if not board.road_point_masks.get(self.num, 0) & (1 << num):
+                return Statuses.ERR_ISOLATED
 
-        # does the same for the other point
-        elif end.building != None:
-            if end.building.owner == self.num:
-                is_connected = True
+        # checks that a building does not already exist there
+        # and all other settlements are at least 2 away
+        nearby = (1 << num) | board.get_topology().point_neighbour_masks[num]
+        if board.occupied_mask & nearby:
+            return Statuses.ERR_BLOCKED
 
-        # then checks if there is a road connecting them
-        roads = self.game.board.roads
-        points = [start, end]
+        return Statuses.ALL_GOOD
 
-        for r in roads:
-            for p in points:
-                if r.point_one == p or r.point_two == p:
+    # checks a road location is valid
+    def road_location_is_valid(self, start, end):
+        board = self.game.board
+        a = board.get_point_num(start)
+        b = board.get_point_num(end)
 
-                    # checks that there is not another player's settlement here, so that it's not going through it
-                    if p.building == None:
-                        is_connected = True
+        # checks the two points are connected
+        edge = board.get_topology().edge_ids.get((a, b))
+        if edge == None:
+            return Statuses.ERR_NOT_CON
 
-                    # if theere is a settlement/city there, the road can be built if this player owns it
-                    elif p.building.owner == self.num:
-                        is_connected = True
+        # checks the road does not already exist with these points
+        if board.road_mask & (1 << edge):
+            return Statuses.ERR_BLOCKED
 
-        if not is_connected:
+        # check this player has a settlement on one of these points or a connecting road
+        # a connecting road can not go through another player's settlement/city
+        connections = board.get_building_mask(self.num) | (board.road_point_masks.get(self.num, 0) & ~board.occupied_mask)
+        if not connections & ((1 << a) | (1 << b)):
             return Statuses.ERR_ISOLATED
 
         return Statuses.ALL_GOOD
@@ -222,8 +230,6 @@ class Player:
         road = Building(owner=self.num, type=Building.BUILDING_ROAD, point_one=start, point_two=end)
         (self.game).board.add_road(road)
 
-        self.get_longest_road(new_road=road)
-
         return Statuses.ALL_GOOD
 
     # returns an array of all the harbors the player has access to
@@ -239,81 +245,21 @@ class Player:
             if b.owner == self.num:
                 # checks if the building is connected to any harbors
                 for h in all_harbors:
-                    print(h)
-                    print(b.point)
                     if h.point_one is b.point or h.point_two is b.point:
-                        print("A")
                         # adds the type
                         if harbors.count(h.type) == 0:
                             harbors.append(h.type)
 
         return harbors
 
-    # gets the longest road segment this player has which includes the road given
-    # should be called whenever a new road is build
-    # since this player's longest road will only change if a new road is build
-    def get_longest_road(self, new_road):
-
-        # gets the roads that belong to this player
-        roads = self.get_roads()
-        del roads[roads.index(new_road)]
-
-        # checks for longest road
-        self.check_connected_roads(road=new_road, all_roads=roads, length=1)
-
-    # checks the roads for connected roads, and then checks those roads until there are no more
-    def check_connected_roads(self, road, all_roads, length):
-
-        # do both point one and two
-        points = [
-            road.point_one,
-            road.point_two
-        ]
-
-        for p in points:
-            # gets the connected roads
-            connected = self.get_connected_roads(point=p, roads=all_roads)
-            # if there are no new connected roads
-            if len(connected) == 0:
-                # if this is the longest road so far
-                if length > self.longest_road_length:
-                    # records the length
-                    self.longest_road_length = length
-                    # self.begin_celebration()
-
-            # if there are connected roads
-            else:
-                # check each of them for connections if they have not been used
-                for c in connected:
-                    # checks it hasn't used this road before
-                    if all_roads.count(c) > 0:
-                        # copies all usable roads
-                        c_roads = all_roads[:]
-                        # removes this road from them
-                        del c_roads[c_roads.index(c)]
-                        # checks for connected roads to this road
-                        self.check_connected_roads(c, c_roads, length + 1)
-
-    # returns which roads in the roads array are connected to the point
-    def get_connected_roads(self, point, roads):
-        con_roads = []
-        for r in roads:
-            if r.point_one == point or r.point_two == point:
-                con_roads.append(r)
-
-        return con_roads
+    # gets the longest road segment this player has
+    # kept up to date by the board as roads and buildings are added
+    def get_longest_road(self):
+        return self.game.board.get_road_network(self.num).longest
 
     # returns an array of all the roads belonging to this player
     def get_roads(self):
-        # gets all the roads on the board
-        all_roads = (self.game).board.roads
-        # filters out roads that do not belong to this player
-        roads = []
-        for r in all_roads:
-            if r.owner == self.num:
-                roads.append(r)
-
-        return roads
+        return self.game.board.get_player_roads(self.num)[:]
 
     # checks if the player has some development cards
     def has_dev_cards(self, cards):
@@ -0,0 +1,129 @@
+import copy
+import random
+
+# the faces of a single die
+DIE_FACES = (1, 2, 3, 4, 5, 6)
+
+# Random number streams for a single game
+# Each part of the game that needs randomness draws from its own stream,
+# so one game's randomness never depends on another game, or on the
+# order in which different parts of the game used random numbers
+class GameRandom:
+
+    # the number of dice rolls generated at a time
+    DICE_BUFFER_SIZE = 256
+
+    # the names of the child streams
+    STREAMS = ("dice", "board", "deck", "steal", "policy")
+
+    # seed can be:
+    #   None: every stream uses the module-level random generator,
+    #         so random.seed() still controls the game
+    #   an int: a new generator is seeded with it
+    #   a random.Random: used as the parent generator
+    #   a NumPy Generator: used as the parent generator, and dice are
+    #                      rolled in vectorized batches with NumPy
+    def __init__(self, seed=None):
+        self._numpy_dice = None
+        self._dice_buffer = []
+        self.seed = seed if isinstance(seed, int) else None
+
+        if seed is None:
+            # shares the global generator, as games did before streams existed
+            for name in GameRandom.STREAMS:
+                setattr(self, name, random)
+            return
+
+        if isinstance(seed, int):
+            parent = random.Random(seed)
+        elif isinstance(seed, random.Random):
+            parent = seed
+        elif hasattr(seed, "integers"):
+            # NumPy Generator
+            import numpy
+            child_seeds = seed.integers(0, 2 ** 63, size=len(GameRandom.STREAMS) + 1).tolist()
+            parent = random.Random(child_seeds[-1])
+            self._numpy_dice = numpy.random.default_rng(child_seeds[0])
+        else:
+            raise TypeError("Cannot create game random streams from %r" % (seed,))
+
+        # each stream gets its own generator, seeded from the parent
+        for name in GameRandom.STREAMS:
+            setattr(self, name, random.Random(parent.getrandbits(64)))
+
+    # makes a copy of the streams for a forked game
+    # the copy gives the same numbers as the original from this point on
+    def fork(self):
+        rng = GameRandom.__new__(GameRandom)
+        rng.__dict__.update(self.__dict__)
+        for name in GameRandom.STREAMS:
+            stream = getattr(self, name)
+            # unseeded games share the module-level generator
+            if stream is not random:
+                # skips seeding the new generator, since its state is replaced
+                stream_copy = random.Random.__new__(random.Random)
+                stream_copy.setstate(stream.getstate())
+                setattr(rng, name, stream_copy)
+        if self._numpy_dice is not None:
+            rng._numpy_dice = copy.deepcopy(self._numpy_dice)
+        rng._dice_buffer = self._dice_buffer[:]
+        return rng
+
+    # gets the state of every stream, for saving the game
+    # the state is made of plain values: the seed, a tuple of each stream's
+    # random.Random state (None for streams sharing the module-level
+    # generator), the dice rolled ahead, and the NumPy dice generator's state
+    def getstate(self):
+        streams = tuple(None if getattr(self, name) is random else getattr(self, name).getstate()
+                        for name in GameRandom.STREAMS)
+        numpy_state = self._numpy_dice.bit_generator.state if self._numpy_dice is not None else None
+        return (self.seed, streams, list(self._dice_buffer), numpy_state)
+
+    # sets the state of every stream to one from getstate
+    # the streams then give the same numbers as when the state was got
+    def setstate(self, state):
+        seed, streams, dice_buffer, numpy_state = state
+        self.seed = seed
+        for name, stream_state in zip(GameRandom.STREAMS, streams):
+            if stream_state is None:
+                setattr(self, name, random)
+            else:
+                stream = random.Random.__new__(random.Random)
+                stream.setstate(stream_state)
+                setattr(self, name, stream)
+        self._dice_buffer = [tuple(roll) for roll in dice_buffer]
+        self._numpy_dice = None
+        if numpy_state is not None:
+            import numpy
+            self._numpy_dice = numpy.random.default_rng()
+            self._numpy_dice.bit_generator.state = numpy_state
+
+    # gets what is pickled, for sending a game to another process
+    # the module-level generator cannot be pickled, so streams that share it
+    # are pickled as new generators seeded from it; random.seed() still
+    # controls what the copy gives
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in GameRandom.STREAMS:
+            if state[name] is random:
+                state[name] = random.Random(random.getrandbits(64))
+        return state
+
+    # rolls two dice, returning both values
+    def roll_dice(self):
+        if not self._dice_buffer:
+            self._refill_dice()
+        return self._dice_buffer.pop()
+
+    # rolls a batch of dice at once
+    def _refill_dice(self):
+        size = GameRandom.DICE_BUFFER_SIZE
+        if self._numpy_dice is not None:
+            rolls = self._numpy_dice.integers(1, 7, size=(size, 2)).tolist()
+            self._dice_buffer = [tuple(r) for r in rolls]
+        else:
+            faces = self.dice.choices(DIE_FACES, k=size * 2)
+            self._dice_buffer = list(zip(faces[::2], faces[1::2]))
+
+    def __repr__(self):
+        return "GameRandom(seed=%s)" % self.seed
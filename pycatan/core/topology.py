@@ -0,0 +1,120 @@
+from pycatan.config.board_definition import board_definition
+
+# The fixed layout of a board: which points, edges and tiles are next to each other
+# Points, edges and tiles are numbered so that sets of them can be stored as
+# integer bitmasks, where bit n is set if point/edge/tile n is in the set
+# Points and tiles are numbered in row order, so point n is the board
+# definition's point id n + 1, and tile n is hex id n + 1
+# The topology only holds numbers, never Point or Tile objects, so it can be
+# shared between every game played on a board with the same layout
+class BoardTopology:
+
+    # topologies that have already been built, by board layout
+    _cache = {}
+
+    # point_neighbours gives the points connected to each point
+    # tile_points gives the points around each tile
+    def __init__(self, layout, point_neighbours, tile_points):
+        # the type of board, the number of points in each row and the number of tiles in each row
+        self.layout = layout
+        self.num_points = len(point_neighbours)
+        self.num_tiles = len(tile_points)
+
+        # the points connected to each point
+        self.point_neighbours = tuple(tuple(sorted(n)) for n in point_neighbours)
+        self.point_neighbour_masks = tuple(
+            BoardTopology.to_mask(n) for n in self.point_neighbours
+        )
+
+        # the edges, where roads are built, as (lower point, higher point)
+        edges = []
+        for i, neighbours in enumerate(self.point_neighbours):
+            for j in neighbours:
+                if i < j:
+                    edges.append((i, j))
+        self.edges = tuple(edges)
+        self.num_edges = len(edges)
+        # (point, point) -> edge number, in either order
+        self.edge_ids = {}
+        for e, (i, j) in enumerate(edges):
+            self.edge_ids[(i, j)] = e
+            self.edge_ids[(j, i)] = e
+
+        # the edges touching each point
+        point_edges = [[] for _ in range(self.num_points)]
+        for e, (i, j) in enumerate(edges):
+            point_edges[i].append(e)
+            point_edges[j].append(e)
+        self.point_edges = tuple(tuple(e) for e in point_edges)
+        self.point_edge_masks = tuple(BoardTopology.to_mask(e) for e in self.point_edges)
+
+        # the points around each tile, and the tiles around each point
+        self.tile_points = tuple(tuple(sorted(p)) for p in tile_points)
+        self.tile_point_masks = tuple(BoardTopology.to_mask(p) for p in self.tile_points)
+        point_tiles = [[] for _ in range(self.num_points)]
+        for t, points in enumerate(self.tile_points):
+            for p in points:
+                point_tiles[p].append(t)
+        self.point_tiles = tuple(tuple(t) for t in point_tiles)
+
+    # gets the topology for a board
+    # boards with the same layout share the same topology
+    @staticmethod
+    def for_board(board):
+        layout = BoardTopology.get_layout(board)
+        topology = BoardTopology._cache.get(layout)
+        if topology == None:
+            if layout[0] == "DefaultBoard":
+                topology = BoardTopology.from_definition(board_definition, layout)
+            else:
+                topology = BoardTopology.from_board(board)
+            BoardTopology._cache[layout] = topology
+        return topology
+
+    # builds a topology from the adjacency data of a BoardDefinition
+    @staticmethod
+    def from_definition(definition, layout=None):
+        point_ids = sorted(definition.get_all_point_ids())
+        hex_ids = sorted(definition.get_all_hex_ids())
+        point_neighbours = [
+            [q - 1 for q in definition.get_adjacent_point_ids(p)] for p in point_ids
+        ]
+        tile_points = [
+            [p - 1 for p in definition.get_hex_border_points(h)] for h in hex_ids
+        ]
+        return BoardTopology(layout, point_neighbours, tile_points)
+
+    # builds a topology from the Point and Tile objects of a board
+    @staticmethod
+    def from_board(board):
+        points = [p for row in board.points for p in row]
+        tiles = [t for row in board.tiles for t in row]
+        index = {id(p): i for i, p in enumerate(points)}
+        point_neighbours = [[index[id(q)] for q in p.connected_points] for p in points]
+        tile_points = [[index[id(p)] for p in t.points if p != None] for t in tiles]
+        return BoardTopology(BoardTopology.get_layout(board), point_neighbours, tile_points)
+
+    # the shape of a board, used to tell if two boards share a topology
+    @staticmethod
+    def get_layout(board):
+        return (type(board).__name__,
+                tuple(len(row) for row in board.points),
+                tuple(len(row) for row in board.tiles))
+
+    # converts numbers to a bitmask
+    @staticmethod
+    def to_mask(numbers):
+        mask = 0
+        for n in numbers:
+            mask |= 1 << n
+        return mask
+
+    # gets the numbers in a bitmask, lowest first
+    @staticmethod
+    def from_mask(mask):
+        numbers = []
+        while mask:
+            low = mask & -mask
+            numbers.append(low.bit_length() - 1)
+            mask ^= low
+        return numbers
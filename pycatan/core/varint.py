@@ -0,0 +1,26 @@
+# Unsigned LEB128 varints, for the binary formats of games and sessions
+# each byte holds seven bits of the number, lowest first, with the top
+# bit set on every byte but the last
+
+# appends a non-negative int to out as a varint
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+# reads a varint from data at pos
+# returns the number and the position after it
+def read_varint(data, pos):
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
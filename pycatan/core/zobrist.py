@@ -0,0 +1,180 @@
+from collections import OrderedDict
+
+# the number of counts that have a key stored in a table
+# larger counts (not possible in a normal game) work out their key when needed
+TABLE_COUNTS = 20
+
+# the awards a player can hold
+AWARDS = ("longest_road_owner", "largest_army")
+
+# a number for each kind of key, so different kinds never share keys
+KINDS = {"building": 1, "road": 2, "robber": 3, "hand": 4, "dev": 5,
+         "knights": 6, "award": 7, "turn": 8, "phase": 9}
+
+MASK_64 = (1 << 64) - 1
+
+# mixes an integer into a well spread 64 bit number (splitmix64)
+def _mix(x):
+    x = (x + 0x9E3779B97F4A7C15) & MASK_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return x ^ (x >> 31)
+
+# The random 64 bit keys used to hash game positions
+# A position's hash is the XOR of the keys for everything in it, so each
+# change to the game only needs to XOR out the old key and XOR in the new one
+# Keys for things that are absent (no building, an empty hand, no award
+# holder) are 0, so a game with nothing on the board hashes to its robber key
+# Keys are worked out from a fixed seed, so hashes are the same between runs
+# and between processes
+class ZobristKeys:
+
+    # keys that have already been made, by board size and number of players
+    _cache = {}
+
+    def __init__(self, num_points, num_edges, num_tiles, num_players, seed=0):
+        self.seed = seed
+        # building[point][owner][building type]
+        self.building = [
+            [[self.key("building", p, o, t) for t in range(3)] for o in range(num_players)]
+            for p in range(num_points)
+        ]
+        # road[edge][owner]
+        self.road = [[self.key("road", e, o) for o in range(num_players)] for e in range(num_edges)]
+        # robber[tile]
+        self.robber = [self.key("robber", t) for t in range(num_tiles)]
+        # hand[player][resource card value][count]
+        self.hand = [
+            [[self.count_key("hand", p, c, n) for n in range(TABLE_COUNTS)] for c in range(5)]
+            for p in range(num_players)
+        ]
+        # dev[player][development card value][count]
+        self.dev = [
+            [[self.count_key("dev", p, c, n) for n in range(TABLE_COUNTS)] for c in range(5)]
+            for p in range(num_players)
+        ]
+        # knights[player][number of knights played]
+        self.knights = [
+            [self.count_key("knights", p, n) for n in range(TABLE_COUNTS)]
+            for p in range(num_players)
+        ]
+        # award[award index][owner], for the AWARDS
+        self.award = [[self.key("award", a, o) for o in range(num_players)] for a in range(len(AWARDS))]
+
+    # gets the keys for a board size and number of players
+    # games of the same size share their keys
+    @staticmethod
+    def for_size(num_points, num_edges, num_tiles, num_players):
+        size = (num_points, num_edges, num_tiles, num_players)
+        keys = ZobristKeys._cache.get(size)
+        if keys == None:
+            keys = ZobristKeys(*size)
+            ZobristKeys._cache[size] = keys
+        return keys
+
+    # makes the key for a kind of feature and its indexes
+    def key(self, kind, *indexes):
+        h = _mix(self.seed ^ (KINDS[kind] << 56))
+        for i in indexes:
+            h = _mix(h ^ (i + 1))
+        return h
+
+    # makes the key for a count, where a count of 0 has the key 0
+    def count_key(self, kind, *indexes):
+        if indexes[-1] == 0:
+            return 0
+        return self.key(kind, *indexes)
+
+    # gets the key for a player having count resource cards of one type
+    def hand_key(self, player, card, count):
+        if count < TABLE_COUNTS:
+            return self.hand[player][card][count]
+        return self.count_key("hand", player, card, count)
+
+    # gets the key for a player holding count development cards of one type
+    def dev_key(self, player, card, count):
+        if count < TABLE_COUNTS:
+            return self.dev[player][card][count]
+        return self.count_key("dev", player, card, count)
+
+    # gets the key for a player having played count knights
+    def knights_key(self, player, count):
+        if count < TABLE_COUNTS:
+            return self.knights[player][count]
+        return self.count_key("knights", player, count)
+
+    # gets the key for an award holder, which is 0 if nobody holds it
+    def award_key(self, award, owner):
+        if owner == None:
+            return 0
+        return self.award[AWARDS.index(award)][owner]
+
+    # gets the key for whose turn it is and the phase of the game
+    # these are not part of Game, so they are mixed in by Game.get_hash
+    def turn_key(self, player, phase=None):
+        key = 0
+        if player != None:
+            key ^= self.key("turn", player)
+        if phase != None:
+            key ^= self.key("phase", getattr(phase, "value", phase))
+        return key
+
+
+# A bounded table of values stored by position hash
+# Each value can be stored with a depth (how deeply the position was searched)
+# A value for a hash already in the table only replaces the old one if its
+# depth is at least as large, and when the table is full the least recently
+# used entry is removed to make space
+class TranspositionTable:
+
+    def __init__(self, max_size=100000):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        # the largest number of entries the table holds
+        self.max_size = max_size
+        # hash -> (value, depth), most recently used last
+        self._entries = OrderedDict()
+        # counts of lookups that found and did not find an entry
+        self.hits = 0
+        self.misses = 0
+
+    # gets the value stored for a hash, or default if there is none
+    # if min_depth is given, entries searched less deeply than it are ignored
+    def get(self, key, default=None, min_depth=0):
+        entry = self._entries.get(key)
+        if entry == None or entry[1] < min_depth:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    # stores a value for a hash
+    # an existing entry for the hash is only replaced by one with at least its depth
+    # returns whether the value was stored
+    def put(self, key, value, depth=0):
+        entries = self._entries
+        old = entries.get(key)
+        if old != None:
+            if depth < old[1]:
+                return False
+            entries[key] = (value, depth)
+            entries.move_to_end(key)
+            return True
+
+        if len(entries) >= self.max_size:
+            entries.popitem(last=False)
+        entries[key] = (value, depth)
+        return True
+
+    # removes every entry
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
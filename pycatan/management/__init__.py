@@ -5,6 +5,9 @@ This module handles game flow orchestration and coordination:
 - GameManager: Turn management and game flow control
 - Actions: Action types and data structures
 - LogEvents: Event logging system for tracking game history
+- ActionJournal: Append-only journal of executed actions and their random outcomes
+- ReplayEngine: Rebuilds and verifies journaled games without users or visualizations
+- Checkpoint: Saved game sessions, see GameManager.checkpoint and restore
 """
 
 from .game_manager import GameManager
@@ -13,12 +16,16 @@ from .actions import (
     ActionType,
     ActionResult,
     GameState,
+    StateDelta,
     PlayerState,
     BoardState,
     GamePhase,
     TurnPhase,
 )
 from .log_events import LogEntry, EventType
+from .action_journal import ActionJournal, JournalRecord, read_journal, iter_journal
+from .replay import ReplayEngine, VerificationResult, Divergence
+from .checkpoint import Checkpoint
 
 __all__ = [
     'GameManager',
@@ -26,10 +33,19 @@ __all__ = [
     'ActionType',
     'ActionResult',
     'GameState',
+    'StateDelta',
     'PlayerState',
     'BoardState',
     'GamePhase',
     'TurnPhase',
     'LogEntry',
     'EventType',
+    'ActionJournal',
+    'JournalRecord',
+    'read_journal',
+    'iter_journal',
+    'ReplayEngine',
+    'VerificationResult',
+    'Divergence',
+    'Checkpoint',
 ]
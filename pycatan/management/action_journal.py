@@ -0,0 +1,258 @@
+"""
+Action Journal - Append-only record of the actions executed in a game
+
+This module contains ActionJournal, which appends every Action a
+GameManager executes successfully to a JSONL file, together with the random
+outcomes the action had (dice, steals and development card draws). With
+those outcomes a game can be rebuilt exactly by a ReplayEngine, without
+the random number streams that produced it.
+
+File format (one JSON object per line):
+- the first line is a header: the journal version, the game id, the number
+  of players, the seed if there was one, and the game's state and hash
+  when the journal started, the state as a StateDelta from an empty GameState
+- every other line is a JournalRecord
+
+Records can hold the game's hash after their action (see Game.get_hash),
+which lets a ReplayEngine verify that a replay stays on the recorded game.
+
+Lines are written by a background thread in batches, so appending an action
+only costs serializing it. Everything appended is on disk once flush() or
+close() returns.
+"""
+
+import json
+import queue
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .actions import Action, GameState
+
+
+# Version written to new journals, and the only one that can be read
+JOURNAL_VERSION = 1
+
+
+@dataclass
+class JournalRecord:
+    """One successfully executed action and what chance decided during it."""
+    seq: int  # Position of the action in the journal, from 0
+    action_type: str  # ActionType name
+    player_id: int
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    game_phase: str = ""  # GamePhase name when the action was executed
+    outcomes: List[List[Any]] = field(default_factory=list)  # See Game.record_outcome
+    state_hash: Optional[int] = None  # Game.get_hash() after the action
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'seq': self.seq,
+            'action_type': self.action_type,
+            'player_id': self.player_id,
+            'parameters': self.parameters,
+            'game_phase': self.game_phase,
+            'outcomes': self.outcomes,
+            'state_hash': self.state_hash
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'JournalRecord':
+        """Make a record from a dict made by to_dict."""
+        return cls(
+            seq=data['seq'],
+            action_type=data['action_type'],
+            player_id=data['player_id'],
+            parameters=data.get('parameters', {}),
+            game_phase=data.get('game_phase', ''),
+            outcomes=data.get('outcomes', []),
+            state_hash=data.get('state_hash')
+        )
+
+
+class ActionJournal:
+    """
+    Appends JournalRecords to a file through a buffered background writer.
+
+    A journal is opened with the game's state at the time, and then has
+    each executed action appended with append(). The file is written by a
+    daemon thread, which writes whatever has been appended in one batch.
+    """
+
+    def __init__(self, path: str, initial_state: GameState, game_id: str = "",
+                 seed: Optional[int] = None, state_hash: Optional[int] = None,
+                 buffer_size: int = 1 << 16):
+        """
+        Open a new journal, replacing any file at path.
+
+        Args:
+            path: File to write
+            initial_state: State of the game before the first action appended
+            game_id: Id of the game
+            seed: Seed of the game's random streams, if it had one
+            state_hash: Game.get_hash() of the game in initial_state
+            buffer_size: Size in bytes of the file's write buffer
+        """
+        self.path = path
+        self._seq = 0
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._file = open(path, 'w', encoding='utf-8', buffering=buffer_size)
+
+        header = {
+            'journal': JOURNAL_VERSION,
+            'game_id': game_id,
+            'num_players': len(initial_state.players_state),
+            'seed': seed,
+            'created_at': datetime.now().isoformat(),
+            'state': initial_state.diff(GameState()).to_dict(),
+            'state_hash': state_hash
+        }
+        self._queue.put(_dumps(header))
+
+        self._thread = threading.Thread(target=self._write_loop, name=f"journal-{game_id}", daemon=True)
+        self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        """Whether the journal has been closed."""
+        return self._file.closed
+
+    def append(self, action: Action, game_phase: str = "", outcomes: Optional[List[List[Any]]] = None,
+               state_hash: Optional[int] = None) -> JournalRecord:
+        """
+        Append an executed action.
+
+        The action is serialized straight away, so it can be changed
+        afterwards without changing what is written.
+
+        Args:
+            action: The action, which was executed successfully
+            game_phase: GamePhase name when the action was executed
+            outcomes: Random outcomes of the action, see Game.record_outcome
+            state_hash: Game.get_hash() after the action
+
+        Returns:
+            JournalRecord: The record appended
+
+        Raises:
+            ValueError: If the journal has been closed
+        """
+        if self.closed:
+            raise ValueError("Cannot append to a closed journal")
+        record = JournalRecord(
+            seq=self._seq,
+            action_type=action.action_type.name,
+            player_id=action.player_id,
+            parameters=action.parameters,
+            game_phase=game_phase,
+            outcomes=outcomes or [],
+            state_hash=state_hash
+        )
+        self._queue.put(_dumps(record.to_dict()))
+        self._seq += 1
+        return record
+
+    def flush(self) -> None:
+        """
+        Wait until everything appended has been written to the file.
+
+        Raises:
+            OSError: If the background writer failed
+        """
+        self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self) -> None:
+        """Write everything appended, then stop the writer and close the file."""
+        if self.closed:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _write_loop(self) -> None:
+        """Write lines as they are appended, a batch at a time, until closed."""
+        while True:
+            lines = [self._queue.get()]
+            # take everything else already waiting, so it is written together
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = lines[-1] is None
+            try:
+                if self._error is None:
+                    self._file.write(''.join(line + '\n' for line in lines if line is not None))
+                    self._file.flush()
+            except OSError as e:
+                self._error = e
+            finally:
+                for _ in lines:
+                    self._queue.task_done()
+            if done:
+                return
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    """Serialize a line, writing anything JSON does not know as a string."""
+    return json.dumps(data, separators=(',', ':'), default=str)
+
+
+def read_journal(path: str) -> Tuple[Dict[str, Any], List[JournalRecord]]:
+    """
+    Read a journal written by ActionJournal.
+
+    Args:
+        path: The journal file
+
+    Returns:
+        Tuple[Dict[str, Any], List[JournalRecord]]: The header and the records
+
+    Raises:
+        ValueError: If the file is not a journal, or is of another version
+    """
+    records = iter_journal(path)
+    header = next(records)
+    return header, list(records)
+
+
+def iter_journal(path: str) -> Iterator[Any]:
+    """
+    Read a journal lazily: first its header, then each JournalRecord.
+
+    A last line cut short, as by a crash while it was being written, is
+    ignored.
+
+    Raises:
+        ValueError: If the file is not a journal, or is of another version
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.readline()
+        try:
+            header = json.loads(first)
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or 'journal' not in header:
+            raise ValueError(f"{path} is not an action journal")
+        if header['journal'] != JOURNAL_VERSION:
+            raise ValueError(f"Unsupported journal version {header['journal']}; "
+                             f"this version reads {JOURNAL_VERSION}")
+        yield header
+
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            yield JournalRecord.from_dict(json.loads(line))
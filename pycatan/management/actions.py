@@ -6,7 +6,7 @@ state, and results in the PyCatan simulation framework.
 """
 
 from enum import Enum, auto
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, replace
 from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
 
@@ -180,6 +180,242 @@ class GameState:
     def get_current_player_state(self) -> Optional[PlayerState]:
         """Get state for the current player."""
         return self.get_player_state(self.current_player)
+    
+    def diff(self, prev: 'GameState') -> 'StateDelta':
+        """
+        Get the changes from an earlier state to this one.
+        
+        Parts that are the same object in both states (as they are between
+        states from Game.get_full_state when that part has not changed)
+        are skipped without being compared. Diffing against an empty
+        GameState() gives a delta holding the whole state.
+        
+        Args:
+            prev: The earlier state
+            
+        Returns:
+            StateDelta: Changes that turn prev into this state
+        """
+        delta = StateDelta()
+        
+        for name in _DELTA_FIELDS:
+            value = getattr(self, name)
+            if value != getattr(prev, name):
+                delta.fields[name] = value
+        
+        # Players, by changed field
+        if len(self.players_state) != len(prev.players_state):
+            delta.num_players = len(self.players_state)
+        for i, player in enumerate(self.players_state):
+            old = prev.players_state[i] if i < len(prev.players_state) else None
+            if player is old:
+                continue
+            changes = {f.name: getattr(player, f.name) for f in fields(PlayerState)
+                       if old is None or getattr(player, f.name) != getattr(old, f.name)}
+            if changes:
+                delta.players[i] = changes
+        
+        board, old_board = self.board_state, prev.board_state
+        if board is old_board:
+            return delta
+        
+        # Buildings, by point id
+        if board.buildings is not old_board.buildings:
+            for point_id, building in board.buildings.items():
+                if old_board.buildings.get(point_id) != building:
+                    delta.buildings[point_id] = building
+            delta.removed_buildings = [p for p in old_board.buildings if p not in board.buildings]
+        
+        # Roads are only ever added to or taken from the end, so only the
+        # roads after the part both lists share are sent
+        if board.roads is not old_board.roads:
+            shared = 0
+            for new, old in zip(board.roads, old_board.roads):
+                if new != old:
+                    break
+                shared += 1
+            delta.roads = board.roads[shared:]
+            delta.removed_roads = [_road_key(road) for road in old_board.roads[shared:]]
+        
+        # The robber, and the tiles and harbors if they are not just the
+        # earlier ones with the robber moved
+        if tuple(board.robber_position) != tuple(old_board.robber_position):
+            delta.robber = tuple(board.robber_position)
+        if board.tiles is not old_board.tiles and \
+                board.tiles != _move_robber(old_board.tiles, board.robber_position):
+            delta.tiles = board.tiles
+        if board.harbors is not old_board.harbors and board.harbors != old_board.harbors:
+            delta.harbors = board.harbors
+        
+        return delta
+
+
+# GameState fields a StateDelta carries as they are
+# The players and board are diffed by part, and the action history is not sent
+_DELTA_FIELDS = (
+    'game_id', 'turn_number', 'current_player', 'game_phase', 'turn_phase',
+    'dev_cards_available', 'resource_cards_available', 'dice_rolled',
+    'pending_trades', 'pending_actions', 'players_must_discard',
+    'robber_moved', 'steal_pending',
+)
+
+
+def _road_key(road: Dict[str, Any]) -> List[int]:
+    """Get the point ids a road joins, which identify it."""
+    return [road['start_point_id'], road['end_point_id']]
+
+
+def _move_robber(tiles: List[Dict[str, Any]], position) -> List[Dict[str, Any]]:
+    """Get tiles with has_robber set for the robber's position, sharing the tiles that do not change."""
+    position = list(position)
+    moved = []
+    for tile in tiles:
+        has_robber = list(tile['position']) == position
+        moved.append(tile if tile.get('has_robber') == has_robber else {**tile, 'has_robber': has_robber})
+    return moved
+
+
+@dataclass
+class StateDelta:
+    """
+    The changes between two GameStates, from GameState.diff.
+    
+    Only what changed is held: the game fields that differ, the changed
+    fields of each player, buildings placed or upgraded, roads added, and
+    where the robber moved to. to_dict() gives a compact JSON-serialisable
+    form, so a client holding the earlier state can be sent this instead
+    of the whole state.
+    """
+    fields: Dict[str, Any] = field(default_factory=dict)  # GameState field -> new value
+    players: Dict[int, Dict[str, Any]] = field(default_factory=dict)  # player -> changed fields
+    num_players: Optional[int] = None  # New number of players, if it changed
+    buildings: Dict[int, Dict[str, Any]] = field(default_factory=dict)  # point id -> new building
+    removed_buildings: List[int] = field(default_factory=list)
+    roads: List[Dict[str, Any]] = field(default_factory=list)  # Roads added at the end
+    removed_roads: List[List[int]] = field(default_factory=list)  # [start, end] point ids
+    robber: Optional[tuple] = None  # New robber position, if it moved
+    tiles: Optional[List[Dict[str, Any]]] = None  # New tiles, if not just the robber moved
+    harbors: Optional[List[Dict[str, Any]]] = None  # New harbors, if they changed
+    
+    def is_empty(self) -> bool:
+        """Whether the two states were the same."""
+        return self == StateDelta()
+    
+    def apply(self, state: GameState) -> GameState:
+        """
+        Apply the changes to a state.
+        
+        The state is not changed. The new state shares every part of it
+        the delta does not change.
+        
+        Args:
+            state: The state the delta was made from
+            
+        Returns:
+            GameState: The state the delta was made to
+        """
+        players = list(state.players_state)
+        if self.num_players is not None:
+            del players[self.num_players:]
+        for i, changes in self.players.items():
+            if i < len(players):
+                players[i] = replace(players[i], **changes)
+            else:
+                players.append(PlayerState(**changes))
+        
+        board = state.board_state
+        if (self.buildings or self.removed_buildings or self.roads or self.removed_roads
+                or self.robber is not None or self.tiles is not None or self.harbors is not None):
+            buildings = board.buildings
+            if self.buildings or self.removed_buildings:
+                buildings = dict(buildings)
+                for point_id in self.removed_buildings:
+                    del buildings[point_id]
+                buildings.update(self.buildings)
+            
+            roads = board.roads
+            if self.roads or self.removed_roads:
+                removed = {tuple(key) for key in self.removed_roads}
+                roads = [road for road in roads if tuple(_road_key(road)) not in removed] + list(self.roads)
+            
+            robber = board.robber_position if self.robber is None else tuple(self.robber)
+            if self.tiles is not None:
+                tiles = self.tiles
+            elif self.robber is not None:
+                tiles = _move_robber(board.tiles, robber)
+            else:
+                tiles = board.tiles
+            
+            board = BoardState(
+                tiles=tiles,
+                robber_position=robber,
+                harbors=board.harbors if self.harbors is None else self.harbors,
+                buildings=buildings,
+                roads=roads
+            )
+        
+        return replace(state, players_state=players, board_state=board, **self.fields)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert to a JSON-serialisable dict, leaving out what did not change.
+        
+        Returns:
+            Dict[str, Any]: The delta, with enums as their names
+        """
+        data: Dict[str, Any] = {}
+        if self.fields:
+            data['fields'] = {name: value.name if isinstance(value, Enum) else value
+                              for name, value in self.fields.items()}
+            if 'players_must_discard' in self.fields:
+                data['fields']['players_must_discard'] = {
+                    str(p): n for p, n in self.fields['players_must_discard'].items()}
+        if self.players:
+            data['players'] = {str(i): changes for i, changes in self.players.items()}
+        if self.num_players is not None:
+            data['num_players'] = self.num_players
+        if self.buildings:
+            data['buildings'] = {str(p): b for p, b in self.buildings.items()}
+        for name in ('removed_buildings', 'roads', 'removed_roads'):
+            if getattr(self, name):
+                data[name] = getattr(self, name)
+        for name in ('robber', 'tiles', 'harbors'):
+            if getattr(self, name) is not None:
+                data[name] = getattr(self, name)
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StateDelta':
+        """
+        Make a delta from a dict made by to_dict, such as after a JSON round trip.
+        
+        Args:
+            data: The dict from to_dict
+            
+        Returns:
+            StateDelta: The delta
+        """
+        values = dict(data.get('fields', {}))
+        for name, enum in (('game_phase', GamePhase), ('turn_phase', TurnPhase)):
+            if name in values:
+                values[name] = enum[values[name]]
+        if values.get('dice_rolled') is not None:
+            values['dice_rolled'] = tuple(values['dice_rolled'])
+        if 'players_must_discard' in values:
+            values['players_must_discard'] = {int(p): n for p, n in values['players_must_discard'].items()}
+        robber = data.get('robber')
+        return cls(
+            fields=values,
+            players={int(i): changes for i, changes in data.get('players', {}).items()},
+            num_players=data.get('num_players'),
+            buildings={int(p): b for p, b in data.get('buildings', {}).items()},
+            removed_buildings=list(data.get('removed_buildings', [])),
+            roads=list(data.get('roads', [])),
+            removed_roads=list(data.get('removed_roads', [])),
+            robber=None if robber is None else tuple(robber),
+            tiles=data.get('tiles'),
+            harbors=data.get('harbors')
+        )
 
 
 @dataclass
@@ -0,0 +1,146 @@
+"""
+Checkpoint - Saved GameManager sessions
+
+This module contains Checkpoint, everything needed to carry on a game
+session from where it was saved: the game itself, the deck's order, the
+state of every random number stream, and the GameManager's turn, phase,
+discard and robber state. GameManager.checkpoint and GameManager.restore
+write and read them.
+
+A checkpoint is laid out as:
+- magic b'PCK', version
+- the GameState as a StateDelta from an empty GameState, as JSON
+  compressed with zlib, including the turn and phase fields and the
+  discard and robber state
+- the development deck, one byte per card from the top
+- the random number streams, see GameRandom.getstate: for each stream a
+  flag byte, then its Mersenne Twister words and any pending gauss value;
+  then the dice rolled ahead; then any NumPy dice generator's state as JSON
+- the remaining GameManager fields as JSON
+each part prefixed by its length in bytes, as a varint.
+"""
+
+import json
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pycatan.core.card import DevCard
+from pycatan.core.rng import GameRandom
+from pycatan.core.varint import read_varint, write_varint
+from .actions import GameState, StateDelta
+
+
+# Version written to new checkpoints, and the only one that can be read
+CHECKPOINT_VERSION = 1
+CHECKPOINT_MAGIC = b'PCK'
+
+# Flags for each random number stream
+STREAM_SHARED = 0  # Uses the module-level generator, which is not saved
+STREAM_OWN = 1
+STREAM_OWN_GAUSS = 2  # Has a pending value for random.gauss
+
+# A random.Random state: its version, then 624 words and a position
+MT_STATE = struct.Struct('<B625I')
+GAUSS = struct.Struct('<d')
+
+DEV_CARDS = {c.value: c for c in DevCard}
+
+
+@dataclass
+class Checkpoint:
+    """A saved game session, see GameManager.checkpoint."""
+    state: GameState  # Includes the GameManager's phase, discard and robber fields
+    dev_deck: List[DevCard]  # From the top of the deck
+    rng_state: Tuple[Any, ...]  # From GameRandom.getstate
+    setup_turn_progress: Dict[str, bool] = field(default_factory=lambda: {'settlement': False, 'road': False})
+    has_ended: bool = False
+    winner: Optional[int] = None
+
+    def to_bytes(self) -> bytes:
+        """Encode the checkpoint."""
+        seed, streams, dice_buffer, numpy_state = self.rng_state
+        rng = bytearray()
+        for stream in streams:
+            if stream is None:
+                rng.append(STREAM_SHARED)
+                continue
+            version, words, gauss = stream
+            rng.append(STREAM_OWN if gauss is None else STREAM_OWN_GAUSS)
+            rng += MT_STATE.pack(version, *words)
+            if gauss is not None:
+                rng += GAUSS.pack(gauss)
+        write_varint(rng, len(dice_buffer))
+        for one, two in dice_buffer:
+            rng += bytes((one, two))
+        rng += json.dumps(numpy_state).encode('utf-8')
+
+        extras = {
+            'seed': seed,
+            'setup_turn_progress': self.setup_turn_progress,
+            'has_ended': self.has_ended,
+            'winner': self.winner
+        }
+
+        out = bytearray(CHECKPOINT_MAGIC)
+        out.append(CHECKPOINT_VERSION)
+        state = json.dumps(self.state.diff(GameState()).to_dict(), separators=(',', ':'))
+        for part in (zlib.compress(state.encode('utf-8')), bytes(c.value for c in self.dev_deck),
+                     bytes(rng), json.dumps(extras).encode('utf-8')):
+            write_varint(out, len(part))
+            out += part
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Checkpoint':
+        """
+        Decode a checkpoint made by to_bytes.
+
+        Raises:
+            ValueError: If the data is not a checkpoint, or is of another version
+        """
+        if bytes(data[:3]) != CHECKPOINT_MAGIC:
+            raise ValueError("Not a game checkpoint")
+        if len(data) < 4 or data[3] != CHECKPOINT_VERSION:
+            version = data[3] if len(data) > 3 else None
+            raise ValueError(f"Unsupported checkpoint version {version}; "
+                             f"this version reads {CHECKPOINT_VERSION}")
+
+        parts = []
+        pos = 4
+        for _ in range(4):
+            length, pos = read_varint(data, pos)
+            parts.append(data[pos:pos + length])
+            pos += length
+        state_data, deck_data, rng_data, extras_data = parts
+        extras = json.loads(extras_data)
+
+        streams = []
+        pos = 0
+        while len(streams) < len(GameRandom.STREAMS):
+            flag = rng_data[pos]
+            pos += 1
+            if flag == STREAM_SHARED:
+                streams.append(None)
+                continue
+            version, *words = MT_STATE.unpack_from(rng_data, pos)
+            pos += MT_STATE.size
+            gauss = None
+            if flag == STREAM_OWN_GAUSS:
+                gauss, = GAUSS.unpack_from(rng_data, pos)
+                pos += GAUSS.size
+            streams.append((version, tuple(words), gauss))
+        count, pos = read_varint(rng_data, pos)
+        dice_buffer = [(rng_data[pos + 2 * i], rng_data[pos + 2 * i + 1]) for i in range(count)]
+        numpy_state = json.loads(bytes(rng_data[pos + 2 * count:]))
+
+        return cls(
+            state=StateDelta.from_dict(json.loads(zlib.decompress(state_data))).apply(GameState()),
+            dev_deck=[DEV_CARDS[value] for value in deck_data],
+            rng_state=(extras['seed'], tuple(streams), dice_buffer, numpy_state),
+            setup_turn_progress=extras['setup_turn_progress'],
+            has_ended=extras['has_ended'],
+            winner=extras['winner']
+        )
+
@@ -5,16 +5,23 @@ This module contains the GameManager class that orchestrates the entire
 game flow, manages turns, coordinates between users and the game state.
 """
 
-from typing import List, Optional, Dict, Any
-import uuid
+from typing import List, Optional, Dict, Any, Tuple
+import asyncio
+import os
 import random
+import threading
+import uuid
 from datetime import datetime
 
 from .actions import Action, ActionResult, GameState, GamePhase, TurnPhase, ActionType
+from .action_journal import ActionJournal
+from .checkpoint import Checkpoint
 from pycatan.players.user import User, UserList, validate_user_list, UserInputError
 from pycatan.core.game import Game
 from pycatan.core.statuses import Statuses
 from pycatan.core.card import DevCard
+from pycatan.core.move import Move, MoveType
+from pycatan.core.legal_moves import LegalMoveGenerator
 from .log_events import EventType, create_log_entry
 
 
@@ -37,7 +44,9 @@ class GameManager:
         Args:
             users: List of User objects for this game
             game_config: Optional configuration for the game (board layout, rules, etc.)
-            random_seed: Optional seed for random number generator (for reproducible games)
+            random_seed: Optional seed for this game's random number streams (for reproducible games).
+                Without one a seed is drawn from the system, so the game still has
+                its own streams, which checkpoint() can save
             
         Raises:
             ValueError: If users list is invalid
@@ -45,10 +54,6 @@ class GameManager:
         # Validate users
         validate_user_list(users)
         
-        # Set random seed if provided (for reproducible games)
-        if random_seed is not None:
-            random.seed(random_seed)
-        
         # Store game metadata
         self.game_id = str(uuid.uuid4())
         self.created_at = datetime.now()
@@ -62,7 +67,10 @@ class GameManager:
         self.visualization_manager = None
         
         # Create the underlying game instance
-        self.game = Game(num_of_players=self.num_players)
+        # The seed only affects this game's own random streams (board, dice, deck, steals)
+        if random_seed is None:
+            random_seed = random.SystemRandom().getrandbits(64)
+        self.game = Game(num_of_players=self.num_players, rng=random_seed)
         
         # Initialize game state
         self._current_game_state = GameState(
@@ -77,6 +85,12 @@ class GameManager:
         self._is_running = False
         self._is_paused = False
         
+        # Notified when the game is started, paused, resumed or ended, so the
+        # game loop and anything else waiting on a paused game sleeps until then
+        self._flow_changed = threading.Condition()
+        # Futures of asyncio tasks waiting on a paused game, with their loops
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        
         # Action history and pending operations
         self._action_history: List[Action] = []
         self._pending_actions: List[Action] = []
@@ -87,6 +101,12 @@ class GameManager:
         # Setup phase progress tracking
         self._setup_turn_progress = {'settlement': False, 'road': False}
         
+        # Generates fully parameterised legal moves for the game
+        self.legal_moves = LegalMoveGenerator(self.game)
+        
+        # Journal the executed actions are appended to (see start_journal)
+        self.journal: Optional[ActionJournal] = None
+        
     @property
     def is_running(self) -> bool:
         """Whether the game is currently running."""
@@ -117,13 +137,11 @@ class GameManager:
         Returns:
             GameState: Complete current game state
         """
-        # Get the base state from the Game object
-        game_state = self.game.get_full_state()
-        
-        # Update player names with user names
-        for i, user in enumerate(self.users):
-            if i < len(game_state.players_state):
-                game_state.players_state[i].name = getattr(user, 'name', f'Player {i + 1}')
+        # Get the base state from the Game object, with the users' names
+        # The players' states are shared with earlier states, so the names
+        # are passed in rather than set on them
+        player_names = [getattr(user, 'name', f'Player {i + 1}') for i, user in enumerate(self.users)]
+        game_state = self.game.get_full_state(player_names)
         
         # Update with GameManager-specific information
         game_state.game_id = self.game_id
@@ -189,6 +207,140 @@ class GameManager:
                 
         return actions
 
+    def get_legal_moves(self, player_id: Optional[int] = None) -> List[Move]:
+        """
+        Get every legal, fully parameterised move for the current game state.
+        
+        Unlike get_available_actions, each move gives the exact points, roads,
+        tiles and cards it uses, so users do not need to try coordinates to
+        find out what is legal. Points and tiles are numbered from 0 in row
+        order (board definition ID - 1).
+        
+        Args:
+            player_id: Player to get the moves for, defaults to the current player.
+                       Other players act during the discard phase.
+            
+        Returns:
+            List[Move]: The legal moves, or an empty list if the player cannot act
+        """
+        if player_id is None:
+            player_id = self.current_player_id
+        
+        moves = self.legal_moves
+        phase = self._current_game_state.game_phase
+        turn_phase = self._current_game_state.turn_phase
+        is_current = player_id == self.current_player_id
+        
+        if phase in [GamePhase.SETUP_FIRST_ROUND, GamePhase.SETUP_SECOND_ROUND]:
+            if not is_current:
+                return []
+            if not self._setup_turn_progress['settlement']:
+                return moves.settlement_moves(player_id, is_starting=True)
+            if not self._setup_turn_progress['road']:
+                return moves.road_moves(player_id, is_starting=True)
+            return [Move(MoveType.END_TURN, player_id)]
+        
+        if phase != GamePhase.NORMAL_PLAY:
+            return []
+        
+        if turn_phase == TurnPhase.DISCARD_PHASE:
+            if len(self.game.players[player_id].cards) > 7:
+                return moves.discard_moves(player_id)
+            return []
+        
+        if not is_current:
+            return []
+        
+        if turn_phase == TurnPhase.ROBBER_MOVE:
+            return moves.robber_moves(player_id)
+        if turn_phase == TurnPhase.ROBBER_STEAL:
+            return moves.steal_moves(player_id)
+        if not self._current_game_state.dice_rolled:
+            return moves.pre_roll_moves(player_id)
+        return moves.turn_moves(player_id)
+
+    def get_game_flow(self, victory_points_to_win: int = 10, max_turns: int = 1000):
+        """
+        Get a GameFlow on a fork of the game, at the current decision.
+
+        The flow can be played forward without changing this game, which
+        lets search-based users try out moves. After a robber move that is
+        waiting for a STEAL_CARD action, the flow continues as if the steal
+        had already happened.
+
+        Args:
+            victory_points_to_win: Victory points the flow treats as a win
+            max_turns: Number of normal-play turns after which the flow is finished
+
+        Returns:
+            GameFlow: The flow, whose game is a fork of this game
+        """
+        from pycatan.sim.flow import GameFlow
+
+        return GameFlow.from_state(
+            self.game.fork(),
+            self._current_game_state,
+            settlement_placed=self._setup_turn_progress['settlement'],
+            victory_points_to_win=victory_points_to_win,
+            max_turns=max_turns
+        )
+
+    def move_to_action(self, move: Move) -> Action:
+        """
+        Convert a legal move into the Action that makes it through execute_action.
+
+        Points and tiles are converted to [row, index] coordinates. A robber
+        move only gives the tile, since the GameManager asks for a separate
+        STEAL_CARD action when there is more than one player to steal from.
+        A discard move gives a single card.
+
+        Args:
+            move: A move from get_legal_moves
+
+        Returns:
+            Action: The equivalent action
+        """
+        board = self.game.board
+
+        def point_coords(point):
+            return list(board.get_point(point).position)
+
+        def tile_coords(tile):
+            return list(board.get_tile(tile).position)
+
+        action_type = ActionType[move.type.name]
+        args = move.args
+        parameters = {}
+
+        if move.type in (MoveType.PLACE_STARTING_SETTLEMENT, MoveType.BUILD_SETTLEMENT, MoveType.BUILD_CITY):
+            parameters['point_coords'] = point_coords(args[0])
+        elif move.type in (MoveType.PLACE_STARTING_ROAD, MoveType.BUILD_ROAD):
+            parameters['start_coords'] = point_coords(args[0])
+            parameters['end_coords'] = point_coords(args[1])
+        elif move.type == MoveType.TRADE_BANK:
+            parameters['offer'] = {args[0].name.lower(): args[1]}
+            parameters['request'] = {args[2].name.lower(): 1}
+        elif move.type == MoveType.DISCARD_CARDS:
+            parameters['cards'] = [args[0].name]
+        elif move.type == MoveType.ROBBER_MOVE:
+            parameters['tile_coords'] = tile_coords(args[0])
+        elif move.type == MoveType.USE_DEV_CARD:
+            card = args[0]
+            parameters['card_type'] = card.name
+            if card == DevCard.Knight:
+                parameters['tile_coords'] = tile_coords(args[1])
+                parameters['victim_id'] = args[2]
+            elif card == DevCard.Road:
+                parameters['road_one_coords'] = {'start': point_coords(args[1]), 'end': point_coords(args[2])}
+                parameters['road_two_coords'] = {'start': point_coords(args[3]), 'end': point_coords(args[4])}
+            elif card == DevCard.Monopoly:
+                parameters['resource_type'] = args[1].name
+            elif card == DevCard.YearOfPlenty:
+                parameters['resource1'] = args[1].name
+                parameters['resource2'] = args[2].name
+
+        return Action(action_type, move.player, parameters)
+
     def execute_action(self, action: Action) -> ActionResult:
         """
         Execute an action in the game.
@@ -218,6 +370,10 @@ class GameManager:
         # Log the action attempt
         self._action_history.append(action)
         
+        return self._run_journaled(self._route_action, action)
+    
+    def _route_action(self, action: Action) -> ActionResult:
+        """Route an action to the handler for its type."""
         try:
             # Route to appropriate handler based on action type
             if action.action_type == ActionType.END_TURN:
@@ -254,6 +410,54 @@ class GameManager:
                 "EXECUTION_ERROR"
             )
     
+    def _run_journaled(self, handler, action: Action) -> ActionResult:
+        """
+        Run an action handler, appending the action to the journal if it succeeds.
+        
+        The random outcomes the game records while the handler runs (dice,
+        steals and development card draws) are appended with the action,
+        along with the game's hash afterwards, which is kept up to date as
+        the game changes and so costs nothing to read.
+        """
+        if self.journal is None:
+            return handler(action)
+        
+        game_phase = self._current_game_state.game_phase.name
+        self.game.outcomes = []
+        try:
+            result = handler(action)
+        finally:
+            outcomes, self.game.outcomes = self.game.outcomes, None
+        
+        if result.success:
+            self.journal.append(action, game_phase, outcomes, self.game.get_hash())
+        return result
+    
+    def start_journal(self, path: str) -> ActionJournal:
+        """
+        Start appending every action executed from now on to a journal file.
+        
+        The journal starts with the current state of the game, so it can be
+        started at any point. Games in a journal can be rebuilt with a
+        ReplayEngine.
+        
+        Args:
+            path: File to write the journal to, replacing any file there
+            
+        Returns:
+            ActionJournal: The journal, which is closed when the game ends
+        """
+        self.stop_journal()
+        self.journal = ActionJournal(path, self.get_full_state(), game_id=self.game_id,
+                                     seed=self.game.rng.seed, state_hash=self.game.get_hash())
+        return self.journal
+    
+    def stop_journal(self) -> None:
+        """Stop journaling, writing out and closing the journal if there is one."""
+        if self.journal is not None:
+            journal, self.journal = self.journal, None
+            journal.close()
+    
     def _handle_end_turn(self, action: Action) -> ActionResult:
         """Handle end turn action."""
         # In the new architecture, this method just validates and returns success.
@@ -621,8 +825,15 @@ class GameManager:
                 card_type = self._resource_name_to_card(resource)
                 request_cards.extend([card_type] * amount)
             
+            # The bank gives a single card per trade
+            if len(request_cards) != 1:
+                return ActionResult.failure_result(
+                    "Bank trades must request exactly one card",
+                    "INVALID_PARAMETER"
+                )
+            
             # Execute bank trade
-            status = self.game.trade_to_bank(player_id, offer_cards, request_cards)
+            status = self.game.trade_to_bank(player_id, offer_cards, request_cards[0])
             
             if status == Statuses.ALL_GOOD:
                 offer_str = ", ".join([f"{amt} {res}" for res, amt in offer.items()])
@@ -1105,12 +1316,14 @@ class GameManager:
         Returns:
             bool: True if game started successfully
         """
-        if self._is_running:
-            return False  # Already running
-        
-        # Initialize game state
-        self._is_running = True
-        self._is_paused = False
+        with self._flow_changed:
+            if self._is_running:
+                return False  # Already running
+            
+            # Initialize game state
+            self._is_running = True
+            self._is_paused = False
+            self._wake_waiters()
         
         # Notify all users
         self._notify_all_users(
@@ -1124,35 +1337,196 @@ class GameManager:
         return True
     
     def pause_game(self) -> bool:
-        """Pause the game."""
-        if not self._is_running or self._is_paused:
-            return False
+        """
+        Pause the game.
         
-        self._is_paused = True
+        Safe to call from any thread, or from an asyncio event loop since it
+        never blocks. The game loop sleeps, using no CPU, until the game is
+        resumed or ended.
+        """
+        with self._flow_changed:
+            if not self._is_running or self._is_paused:
+                return False
+            
+            self._is_paused = True
         self._notify_all_users("game_pause", "Game has been paused.")
         return True
     
     def resume_game(self) -> bool:
-        """Resume a paused game."""
-        if not self._is_running or not self._is_paused:
-            return False
+        """
+        Resume a paused game.
         
-        self._is_paused = False
+        Safe to call from any thread or event loop. Wakes the game loop and
+        everything waiting in wait_until_resumed or wait_until_resumed_async.
+        """
+        with self._flow_changed:
+            if not self._is_running or not self._is_paused:
+                return False
+            
+            self._is_paused = False
+            self._wake_waiters()
         self._notify_all_users("game_resume", "Game has been resumed.")
         return True
     
-    def end_game(self) -> bool:
-        """End the game session."""
-        if not self._is_running:
-            return False
+    def wait_until_resumed(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block the calling thread while the game is paused.
         
-        self._is_running = False
-        self._is_paused = False
+        Returns straight away if the game is not paused, and also wakes if
+        the game is ended while paused.
+        
+        Args:
+            timeout: Most seconds to wait, or None to wait as long as it takes
+            
+        Returns:
+            bool: False if the timeout passed with the game still paused
+        """
+        with self._flow_changed:
+            return self._flow_changed.wait_for(lambda: not self._is_paused, timeout)
+    
+    async def wait_until_resumed_async(self) -> None:
+        """
+        Wait in an asyncio task while the game is paused, without blocking its loop.
         
+        The game can be resumed or ended from any thread or loop. A cancelled
+        task stops waiting straight away.
+        """
+        loop = asyncio.get_running_loop()
+        with self._flow_changed:
+            if not self._is_paused:
+                return
+            waiter = (loop, loop.create_future())
+            self._async_waiters.append(waiter)
+        try:
+            await waiter[1]
+        finally:
+            with self._flow_changed:
+                if waiter in self._async_waiters:
+                    self._async_waiters.remove(waiter)
+    
+    def _wake_waiters(self) -> None:
+        """Wake everything waiting on the game's flow. Called holding _flow_changed."""
+        self._flow_changed.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            # A closed loop has no task left to wake
+            if loop.is_closed():
+                continue
+            try:
+                loop.call_soon_threadsafe(_finish_future, future)
+            except RuntimeError:
+                # The loop closed after the check
+                pass
+    
+    def end_game(self) -> bool:
+        """End the game session."""
+        with self._flow_changed:
+            if not self._is_running:
+                return False
+            
+            self._is_running = False
+            self._is_paused = False
+            self._wake_waiters()
+        self.stop_journal()
+
         # TODO: Calculate final scores, determine winner
         self._notify_all_users("game_end", "Game has ended.")
         return True
-    
+
+    def checkpoint(self, path: str) -> None:
+        """
+        Save the game session to a file, to be carried on with restore().
+
+        The file holds the whole game, including the deck's order and the
+        state of every random number stream, and the turn, phase, setup,
+        discard and robber state, so a restored session plays on exactly as
+        this one would. The action history is not saved.
+
+        The file is replaced in one step, so a process killed while saving
+        leaves the previous checkpoint in place.
+
+        Args:
+            path: File to save to
+            
+        Raises:
+            ValueError: If the game's random streams are shared with the
+                random module, whose state a checkpoint cannot carry
+        """
+        rng_state = self.game.rng.getstate()
+        if None in rng_state[1]:
+            raise ValueError("Cannot checkpoint a game whose random streams are shared with the random module")
+
+        state = self.get_full_state()
+        current = self._current_game_state
+        state.dice_rolled = current.dice_rolled
+        state.players_must_discard = dict(current.players_must_discard)
+        state.robber_moved = current.robber_moved
+        state.steal_pending = current.steal_pending
+
+        data = Checkpoint(
+            state=state,
+            dev_deck=list(self.game.dev_deck),
+            rng_state=rng_state,
+            setup_turn_progress=dict(self._setup_turn_progress),
+            has_ended=self.game.has_ended,
+            winner=self.game.winner
+        ).to_bytes()
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def restore(self, path: str) -> None:
+        """
+        Carry on a game session saved by checkpoint().
+
+        The game and the turn and phase state are replaced by the saved
+        ones, on this GameManager and its users. The session keeps running
+        or not as it was; a new GameManager needs start_game() before its
+        game loop will play on. Any journal is stopped, since it no longer
+        follows the game.
+
+        Args:
+            path: File saved by checkpoint()
+
+        Raises:
+            ValueError: If the file is not a checkpoint, or is for a
+                different number of players
+        """
+        with open(path, 'rb') as f:
+            saved = Checkpoint.from_bytes(f.read())
+        state = saved.state
+        if len(state.players_state) != self.num_players:
+            raise ValueError(f"The checkpoint is for {len(state.players_state)} players, "
+                             f"not {self.num_players}")
+
+        self.stop_journal()
+
+        game = Game.from_state(state, rng=saved.rng_state[0])
+        game.rng.setstate(saved.rng_state)
+        game.dev_deck = list(saved.dev_deck)
+        game.has_ended = saved.has_ended
+        game.winner = saved.winner
+        self.game = game
+        self.legal_moves = LegalMoveGenerator(game)
+
+        self.game_id = state.game_id
+        self._current_game_state = GameState(
+            game_id=state.game_id,
+            turn_number=state.turn_number,
+            current_player=state.current_player,
+            game_phase=state.game_phase,
+            turn_phase=state.turn_phase,
+            dice_rolled=state.dice_rolled,
+            players_must_discard=dict(state.players_must_discard),
+            robber_moved=state.robber_moved,
+            steal_pending=state.steal_pending
+        )
+        self._setup_turn_progress = dict(saved.setup_turn_progress)
+        self._player_error_count = [0] * self.num_players
+        self._pending_actions = []
+
     def request_user_input(self, user_id: int, prompt: str, 
                           allowed_actions: Optional[List[str]] = None) -> Action:
         """
@@ -1229,9 +1603,9 @@ class GameManager:
         # Continue running until game ends or is explicitly stopped
         while self._is_running and not self._check_game_end_conditions():
             
-            # If game is paused, wait
+            # If game is paused, sleep until it is resumed or ended
             if self._is_paused:
-                # In paused state, just continue loop without doing anything
+                self.wait_until_resumed()
                 continue
             
             # Run a single turn for the current player
@@ -1358,7 +1732,7 @@ class GameManager:
             action.player_id = discard_player_id
             
             # Execute the discard action
-            result = self._handle_discard_cards(action)
+            result = self._run_journaled(self._handle_discard_cards, action)
             
             # Update systems
             self._update_all_systems(action, result)
@@ -1743,13 +2117,18 @@ class GameManager:
         either due to win conditions or explicit termination.
         """
         # Set game as not running
-        self._is_running = False
-        self._is_paused = False
+        with self._flow_changed:
+            self._is_running = False
+            self._is_paused = False
+            self._wake_waiters()
         
         # TODO: Calculate final scores and determine winner
         # For now, just notify that game ended
         self._notify_all_users("game_end", "Game has ended.")
         
+        # Write out the rest of the journal
+        self.stop_journal()
+        
         # TODO: Cleanup resources, save game state, etc.
     
     def _check_game_end_conditions(self) -> bool:
@@ -1820,8 +2199,8 @@ class GameManager:
              return ActionResult.failure_result("Dice already rolled this turn", "ALREADY_ROLLED")
              
         # Roll dice
-        die1 = random.randint(1, 6)
-        die2 = random.randint(1, 6)
+        die1, die2 = self.game.rng.roll_dice()
+        self.game.record_outcome("dice", die1, die2)
         total = die1 + die2
         
         # Update action parameters for logging/visualization
@@ -2066,7 +2445,7 @@ class GameManager:
         
         # Place robber on new position
         tile.has_robber = True
-        self.game.board.robber = [row, index]  # Use the Board's robber attribute
+        self.game.board.move_robber([row, index])
         
         self._current_game_state.robber_moved = True
         
@@ -2086,11 +2465,7 @@ class GameManager:
                 target_player = stealable_players[0]
                 
                 # Steal a random card
-                import random
-                target = self.game.players[target_player]
-                stolen_card = random.choice(target.cards)
-                target.remove_cards([stolen_card])
-                self.game.players[action.player_id].add_cards([stolen_card])
+                stolen_card = self.game.steal_card(action.player_id, target_player)
                 
                 # Notify
                 thief_name = self.users[action.player_id].name if hasattr(self.users[action.player_id], 'name') else f"Player {action.player_id}"
@@ -2145,16 +2520,11 @@ class GameManager:
         except (IndexError, KeyError):
             return []
         
-        # Get all points adjacent to this tile
-        adjacent_points = tile.points if hasattr(tile, 'points') else []
-        
-        for point in adjacent_points:
-            if point.building is not None:
-                owner_id = point.building.owner
-                # Don't include current player, and don't include players with no cards
-                if owner_id != current_player and owner_id not in stealable:
-                    if len(self.game.players[owner_id].cards) > 0:
-                        stealable.append(owner_id)
+        # Players with a settlement/city on one of the tile's points
+        for owner_id in self.game.board.get_players_on_tile(tile):
+            # Don't include current player, and don't include players with no cards
+            if owner_id != current_player and len(self.game.players[owner_id].cards) > 0:
+                stealable.append(owner_id)
         
         return stealable
     
@@ -2205,10 +2575,7 @@ class GameManager:
                 )
         
         # Steal a random card
-        import random
-        stolen_card = random.choice(target.cards)
-        target.remove_cards([stolen_card])
-        self.game.players[action.player_id].add_cards([stolen_card])
+        stolen_card = self.game.steal_card(action.player_id, target_player)
         
         # Update state
         self._current_game_state.turn_phase = TurnPhase.PLAYER_ACTIONS
@@ -2294,4 +2661,10 @@ class GameManager:
                 f"current_player={self.current_player_id}, "
                 f"turn={self._current_game_state.turn_number}, "
                 f"running={self._is_running}, "
-                f"paused={self._is_paused})")
\ No newline at end of file
+                f"paused={self._is_paused})")
+
+
+def _finish_future(future: asyncio.Future) -> None:
+    """Finish a waiting future, unless its task was cancelled."""
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,380 @@
+"""
+Replay Engine - Rebuilds games from action journals
+
+This module contains ReplayEngine, which rebuilds the Game recorded in an
+ActionJournal by making each journaled action directly on a Game. There
+are no users, visualizations or notifications, and nothing is random: the
+dice, steals and development card draws are taken from the outcomes in the
+journal, so the rebuilt game is the game that was played.
+
+ReplayEngine.verify checks that this holds, comparing the game's hash after
+every action with the hash in the journal and reporting the first
+divergence. The hash is kept up to date by the Game as it changes, so
+checking it costs nothing next to making the action.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from pycatan.core.board import Board
+from pycatan.core.card import DevCard, ResCard
+from pycatan.core.game import Game
+from pycatan.core.statuses import Statuses
+from .actions import GamePhase, GameState, StateDelta
+from .action_journal import JournalRecord, iter_journal
+
+
+@dataclass
+class Divergence:
+    """The first point at which a replay differs from its journal."""
+    seq: Optional[int]  # Record the replay diverged at, None for the starting game
+    action_type: Optional[str]
+    expected_hash: Optional[int]  # Hash in the journal
+    actual_hash: Optional[int]  # Hash of the replayed game, None if the action failed
+    message: str
+
+
+@dataclass
+class VerificationResult:
+    """The result of verifying the replay of one journal."""
+    path: Optional[str]
+    steps: int  # Records replayed and checked, including a diverging one
+    divergence: Optional[Divergence] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the replay matched the journal at every step."""
+        return self.divergence is None
+
+
+class ReplayEngine:
+    """
+    Rebuilds games from action journals as fast as the Game allows.
+
+    The game a journal starts from is made once per starting state and
+    forked for every replay, so replaying many games from the same board
+    only builds the board once.
+    """
+
+    def __init__(self):
+        """Create an engine, with no starting games made yet."""
+        self._start_games: Dict[str, Game] = {}
+        self._handlers: Dict[str, Callable[[Game, JournalRecord], None]] = {
+            'END_TURN': self._replay_nothing,
+            'PLACE_STARTING_SETTLEMENT': self._replay_settlement,
+            'BUILD_SETTLEMENT': self._replay_settlement,
+            'PLACE_STARTING_ROAD': self._replay_road,
+            'BUILD_ROAD': self._replay_road,
+            'BUILD_CITY': self._replay_city,
+            'ROLL_DICE': self._replay_roll_dice,
+            'DISCARD_CARDS': self._replay_discard,
+            'ROBBER_MOVE': self._replay_robber_move,
+            'STEAL_CARD': self._replay_steals,
+            'BUY_DEV_CARD': self._replay_buy_dev_card,
+            'USE_DEV_CARD': self._replay_use_dev_card,
+            'TRADE_PROPOSE': self._replay_trade,
+            'TRADE_BANK': self._replay_bank_trade,
+        }
+
+    def replay(self, path: str, until: Optional[int] = None) -> Game:
+        """
+        Rebuild the game in a journal file.
+
+        Args:
+            path: The journal file
+            until: If given, stop before the record with this seq
+
+        Returns:
+            Game: The game after the journaled actions
+
+        Raises:
+            ValueError: If the file is not a journal, or an action cannot be
+                made on the rebuilt game
+        """
+        records = iter_journal(path)
+        return self.replay_records(next(records), records, until)
+
+    def replay_many(self, paths: Iterable[str]) -> Iterator[Game]:
+        """
+        Rebuild the games in many journal files, one at a time.
+
+        Args:
+            paths: The journal files
+
+        Yields:
+            Game: Each rebuilt game, in the order of paths
+        """
+        for path in paths:
+            yield self.replay(path)
+
+    def replay_records(self, header: Dict[str, Any], records: Iterable[JournalRecord],
+                       until: Optional[int] = None) -> Game:
+        """
+        Rebuild a game from a journal header and records already read.
+
+        Args:
+            header: The journal's header
+            records: The journal's records, in order
+            until: If given, stop before the record with this seq
+
+        Returns:
+            Game: The game after the records
+
+        Raises:
+            ValueError: If an action cannot be made on the rebuilt game
+        """
+        game = self.start_game(header)
+        for record in records:
+            if until is not None and record.seq >= until:
+                break
+            self.apply(game, record)
+        return game
+
+    def verify(self, path: str) -> VerificationResult:
+        """
+        Replay a journal file, checking the game's hash after every action.
+
+        Records without a hash are replayed without being checked.
+
+        Args:
+            path: The journal file
+
+        Returns:
+            VerificationResult: How many records were checked, and the
+                first divergence if there was one
+
+        Raises:
+            ValueError: If the file is not a journal
+        """
+        records = iter_journal(path)
+        return self.verify_records(next(records), records, path)
+
+    def verify_many(self, paths: Iterable[str]) -> Iterator[VerificationResult]:
+        """
+        Verify the replays of many journal files, one at a time.
+
+        Args:
+            paths: The journal files
+
+        Yields:
+            VerificationResult: The result for each file, in the order of paths
+        """
+        for path in paths:
+            yield self.verify(path)
+
+    def verify_records(self, header: Dict[str, Any], records: Iterable[JournalRecord],
+                       path: Optional[str] = None) -> VerificationResult:
+        """
+        Replay a journal header and records already read, checking every hash.
+
+        Args:
+            header: The journal's header
+            records: The journal's records, in order
+            path: The file they were read from, for the result
+
+        Returns:
+            VerificationResult: How many records were checked, and the
+                first divergence if there was one
+        """
+        game = self.start_game(header)
+        expected = header.get('state_hash')
+        if expected is not None and game.get_hash() != expected:
+            return VerificationResult(path, 0, Divergence(
+                None, None, expected, game.get_hash(), "The starting game differs from the journal's"))
+
+        steps = 0
+        for record in records:
+            steps += 1
+            try:
+                self.apply(game, record)
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                return VerificationResult(path, steps, Divergence(
+                    record.seq, record.action_type, record.state_hash, None, f"The action failed: {e}"))
+
+            if record.state_hash is not None and game.get_hash() != record.state_hash:
+                return VerificationResult(path, steps, Divergence(
+                    record.seq, record.action_type, record.state_hash, game.get_hash(),
+                    f"The game differs from the journal after record {record.seq}"))
+
+        return VerificationResult(path, steps)
+
+    def start_game(self, header: Dict[str, Any]) -> Game:
+        """
+        Make the game a journal starts from.
+
+        Args:
+            header: The journal's header
+
+        Returns:
+            Game: A new game in the journal's starting state
+        """
+        key = repr(header['state'])
+        start = self._start_games.get(key)
+        if start is None:
+            state = StateDelta.from_dict(header['state']).apply(GameState())
+            start = Game.from_state(state, rng=header.get('seed'))
+            self._start_games[key] = start
+        return start.fork()
+
+    def apply(self, game: Game, record: JournalRecord) -> None:
+        """
+        Make one journaled action on a game.
+
+        Args:
+            game: The game, in the state the action was made in
+            record: The action
+
+        Raises:
+            ValueError: If the action cannot be made on the game
+        """
+        handler = self._handlers.get(record.action_type)
+        if handler is None:
+            raise ValueError(f"Record {record.seq}: cannot replay {record.action_type}")
+        handler(game, record)
+
+    # Helpers
+
+    @staticmethod
+    def _check(status, record: JournalRecord) -> None:
+        """Raise if a Game call did not succeed."""
+        if status != Statuses.ALL_GOOD:
+            raise ValueError(f"Record {record.seq}: {record.action_type} failed with status {status}")
+
+    @staticmethod
+    def _point(game: Game, coords):
+        """Get a point of the board from [row, index] coordinates."""
+        return game.board.points[coords[0]][coords[1]]
+
+    @staticmethod
+    def _cards(resources: Dict[str, int]) -> List[ResCard]:
+        """Convert a {resource name: amount} dict to a list of cards."""
+        cards = []
+        for resource, amount in resources.items():
+            cards.extend([ResCard[resource.capitalize()]] * amount)
+        return cards
+
+    @staticmethod
+    def _outcomes(record: JournalRecord, kind: str) -> List[List[Any]]:
+        """Get the outcomes of one kind, without their kind."""
+        return [outcome[1:] for outcome in record.outcomes if outcome[0] == kind]
+
+    def _replay_steals(self, game: Game, record: JournalRecord) -> None:
+        """Move every stolen card from its victim to its thief."""
+        for thief, victim, card_name in self._outcomes(record, 'steal'):
+            card = ResCard[card_name]
+            self._remove_cards(game, victim, [card], record)
+            game.players[thief].add_cards([card])
+
+    @staticmethod
+    def _remove_cards(game: Game, player: int, cards: List[ResCard], record: JournalRecord) -> None:
+        """Remove cards from a player, raising if they do not have them."""
+        if not game.players[player].has_cards(cards):
+            raise ValueError(f"Record {record.seq}: player {player} does not have the cards "
+                             f"{[c.name for c in cards]}")
+        game.players[player].remove_cards(cards)
+
+    def _move_robber(self, game: Game, tile_coords) -> None:
+        """Move the robber to a tile, as the GameManager does."""
+        row, index = tile_coords
+        if game.board.robber:
+            old_row, old_index = game.board.robber
+            game.board.tiles[old_row][old_index].has_robber = False
+        game.board.tiles[row][index].has_robber = True
+        game.board.move_robber([row, index])
+
+    # Actions
+
+    def _replay_nothing(self, game: Game, record: JournalRecord) -> None:
+        """Replay an action that does not change the Game."""
+
+    def _replay_settlement(self, game: Game, record: JournalRecord) -> None:
+        """Build a settlement, giving starting resources for the second one."""
+        in_setup = record.game_phase in (GamePhase.SETUP_FIRST_ROUND.name, GamePhase.SETUP_SECOND_ROUND.name)
+        is_starting = in_setup or record.parameters.get('is_starting', False)
+        point = self._point(game, record.parameters['point_coords'])
+        self._check(game.add_settlement(record.player_id, point, is_starting), record)
+
+        if record.game_phase == GamePhase.SETUP_SECOND_ROUND.name:
+            cards = [Board.get_card_from_tile(tile.type) for tile in point.tiles]
+            game.players[record.player_id].add_cards([c for c in cards if c])
+
+    def _replay_road(self, game: Game, record: JournalRecord) -> None:
+        """Build a road."""
+        in_setup = record.game_phase in (GamePhase.SETUP_FIRST_ROUND.name, GamePhase.SETUP_SECOND_ROUND.name)
+        is_starting = in_setup or record.parameters.get('is_starting', False)
+        start = self._point(game, record.parameters['start_coords'])
+        end = self._point(game, record.parameters['end_coords'])
+        self._check(game.add_road(record.player_id, start, end, is_starting), record)
+
+    def _replay_city(self, game: Game, record: JournalRecord) -> None:
+        """Upgrade a settlement to a city."""
+        point = self._point(game, record.parameters['point_coords'])
+        self._check(game.add_city(point, record.player_id), record)
+
+    def _replay_roll_dice(self, game: Game, record: JournalRecord) -> None:
+        """Give out the resources for the recorded roll."""
+        dice = self._outcomes(record, 'dice')
+        if not dice:
+            raise ValueError(f"Record {record.seq}: ROLL_DICE has no dice outcome")
+        total = sum(dice[0])
+        if total != 7:
+            game.add_yield_for_roll(total)
+
+    def _replay_discard(self, game: Game, record: JournalRecord) -> None:
+        """Discard cards after a 7."""
+        cards = [ResCard[name] for name in record.parameters.get('cards', [])]
+        self._remove_cards(game, record.player_id, cards, record)
+
+    def _replay_robber_move(self, game: Game, record: JournalRecord) -> None:
+        """Move the robber, then make any steal that came with it."""
+        self._move_robber(game, record.parameters['tile_coords'])
+        self._replay_steals(game, record)
+
+    def _replay_buy_dev_card(self, game: Game, record: JournalRecord) -> None:
+        """Buy the recorded development card."""
+        draws = self._outcomes(record, 'draw')
+        if not draws:
+            raise ValueError(f"Record {record.seq}: BUY_DEV_CARD has no draw outcome")
+        card = DevCard[draws[0][1]]
+        # the recorded card is put on top of the deck, so it is the one drawn
+        if card not in game.dev_deck:
+            raise ValueError(f"Record {record.seq}: no {card.name} card left in the deck")
+        game.dev_deck.remove(card)
+        game.dev_deck.insert(0, card)
+        self._check(game.build_dev(record.player_id), record)
+
+    def _replay_use_dev_card(self, game: Game, record: JournalRecord) -> None:
+        """Play a development card."""
+        parameters = record.parameters
+        card = DevCard[parameters['card_type']]
+
+        if card == DevCard.Knight:
+            # the robber moves without a victim, and the recorded steal is made after
+            args = {'robber_pos': list(parameters['tile_coords']), 'victim': None}
+        elif card == DevCard.Road:
+            args = {
+                name: {'start': self._point(game, parameters[key]['start']),
+                       'end': self._point(game, parameters[key]['end'])}
+                for name, key in (('road_one', 'road_one_coords'), ('road_two', 'road_two_coords'))
+            }
+        elif card == DevCard.Monopoly:
+            args = {'card_type': ResCard[parameters['resource_type']]}
+        elif card == DevCard.YearOfPlenty:
+            args = {'card_one': ResCard[parameters['resource1']], 'card_two': ResCard[parameters['resource2']]}
+        else:
+            raise ValueError(f"Record {record.seq}: cannot play a {card.name} card")
+
+        self._check(game.use_dev_card(record.player_id, card, args), record)
+        self._replay_steals(game, record)
+
+    def _replay_trade(self, game: Game, record: JournalRecord) -> None:
+        """Make an accepted trade between two players."""
+        parameters = record.parameters
+        self._check(game.trade(record.player_id, parameters['target_player'],
+                               self._cards(parameters['offer']), self._cards(parameters['request'])), record)
+
+    def _replay_bank_trade(self, game: Game, record: JournalRecord) -> None:
+        """Trade with the bank."""
+        parameters = record.parameters
+        self._check(game.trade_to_bank(record.player_id, self._cards(parameters['offer']),
+                                       self._cards(parameters['request'])[0]), record)
@@ -4,11 +4,12 @@ PyCatan Player Implementations
 This module contains different player types and interaction handlers:
 - User: Abstract base class for all players
 - HumanUser: Human player with command-line interface
-- (Future: AIUser implementations)
+- MCTSUser: Computer player that searches with Monte Carlo Tree Search
 """
 
 from .user import User, UserInputError, validate_user_list, create_test_user
 from .human_user import HumanUser
+from .mcts_user import MCTSUser
 
 __all__ = [
     'User',
@@ -16,4 +17,5 @@ __all__ = [
     'validate_user_list',
     'create_test_user',
     'HumanUser',
+    'MCTSUser',
 ]
@@ -0,0 +1,178 @@
+"""
+MCTS User Implementation for PyCatan Game Management
+
+This module implements MCTSUser, a computer player that chooses each
+action with a Monte Carlo Tree Search over forked copies of the game.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import random
+
+from .user import User, UserInputError
+from pycatan.management.actions import Action, ActionType, GameState
+from pycatan.core.move import MoveType
+from pycatan.sim.flow import GameFlow, Stage
+from pycatan.sim.engine import Policy
+from pycatan.sim.mcts import SearchResult, mcts_search
+from pycatan.sim.policies import random_policy
+
+
+class MCTSUser(User):
+    """
+    Computer user that searches for its moves with Monte Carlo Tree Search.
+
+    The user reads the legal moves from its GameManager and searches a fork
+    of the game, so the real game is never changed by the search. Every
+    iteration deals the other players' development cards and the deck
+    again, so the search does not use cards the user cannot see. Each
+    search is limited by a number of iterations, a time limit, or both, and
+    can be spread over several processes that search separately and add
+    their results together.
+
+    Only moves whose action type is in allowed_actions are considered.
+    Trade offers from other players are always rejected, and when there is
+    more than one player to steal from the user steals from the one the
+    search chose with the robber move.
+    """
+
+    def __init__(self, name: str, user_id: int, game_manager=None,
+                 iterations: Optional[int] = None, time_limit: Optional[float] = 1.0,
+                 workers: int = 1, rollout_policy: Policy = random_policy,
+                 rollout_turns: int = 20, exploration: float = 0.7,
+                 victory_points_to_win: int = 10, seed: Optional[int] = None):
+        """
+        Initialize an MCTSUser.
+
+        Args:
+            name: Display name for the user
+            user_id: Unique identifier (should match player index in game)
+            game_manager: GameManager the user plays in, can be attached later
+            iterations: Iterations per search, across all workers
+            time_limit: Seconds per search
+            workers: Number of processes each search is spread over
+            rollout_policy: Policy that plays the rollouts, such as random_policy
+                            or greedy_policy
+            rollout_turns: Largest number of turns a rollout plays
+            exploration: UCT exploration constant
+            victory_points_to_win: Victory points the search treats as a win
+            seed: Seed for the searches, so a game can be replayed exactly
+        """
+        super().__init__(name, user_id)
+        self.game_manager = game_manager
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.rollout_policy = rollout_policy
+        self.rollout_turns = rollout_turns
+        self.exploration = exploration
+        self.victory_points_to_win = victory_points_to_win
+        self._rng = random.Random(seed)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._victim: Optional[int] = None  # Player to steal from after the last robber move
+        self.last_search: Optional[SearchResult] = None
+
+    def attach(self, game_manager) -> None:
+        """Set the GameManager the user plays in."""
+        self.game_manager = game_manager
+
+    def close(self) -> None:
+        """Shut down the worker processes, if any were started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def get_input(self, game_state: GameState, prompt_message: str,
+                  allowed_actions: Optional[List[str]] = None) -> Action:
+        """
+        Choose an action by searching the current position.
+
+        Args:
+            game_state: Current state of the game
+            prompt_message: Message explaining what input is needed
+            allowed_actions: Optional list of allowed action types
+
+        Returns:
+            Action: The chosen action
+
+        Raises:
+            UserInputError: If no GameManager is attached, or there is no legal move
+        """
+        if self.game_manager is None:
+            raise UserInputError("MCTSUser needs a GameManager to search", self)
+
+        allowed = set(allowed_actions) if allowed_actions else None
+
+        def is_allowed(action_type: ActionType) -> bool:
+            return allowed is None or action_type.name in allowed
+
+        # Trade offers from other players
+        if allowed is not None and ActionType.TRADE_REJECT.name in allowed:
+            return Action(ActionType.TRADE_REJECT, self.user_id)
+
+        if allowed is not None and ActionType.STEAL_CARD.name in allowed:
+            return self._choose_steal()
+
+        if allowed == {ActionType.DISCARD_CARDS.name}:
+            return self._choose_discards()
+
+        moves = [
+            m for m in self.game_manager.get_legal_moves(self.user_id)
+            if is_allowed(ActionType[m.type.name])
+        ]
+        if not moves:
+            raise UserInputError(f"{self.name} has no legal move", self)
+
+        if len(moves) == 1:
+            move = moves[0]
+        else:
+            move = self._search(self._get_flow(), moves).move
+
+        if move.type == MoveType.ROBBER_MOVE:
+            self._victim = move.args[1]
+        return self.game_manager.move_to_action(move)
+
+    def _choose_steal(self) -> Action:
+        """Steal from the victim the search chose, or else from the first one possible."""
+        targets = [m.args[1] for m in self.game_manager.get_legal_moves(self.user_id)]
+        if not targets:
+            raise UserInputError(f"{self.name} has nobody to steal from", self)
+        victim = self._victim if self._victim in targets else targets[0]
+        return Action(ActionType.STEAL_CARD, self.user_id, {'target_player': victim})
+
+    def _choose_discards(self) -> Action:
+        """Choose every card to discard, one search per card."""
+        flow = self._get_flow()
+        if flow.stage != Stage.DISCARD or flow.player != self.user_id:
+            raise UserInputError(f"{self.name} does not need to discard", self)
+
+        cards = []
+        while flow.stage == Stage.DISCARD and flow.player == self.user_id:
+            move = self._search(flow, flow.get_moves()).move
+            cards.append(move.args[0].name)
+            flow.apply(move)
+        return Action(ActionType.DISCARD_CARDS, self.user_id, {'cards': cards})
+
+    def _get_flow(self) -> GameFlow:
+        """Get a GameFlow on a fork of the game at the current decision."""
+        return self.game_manager.get_game_flow(self.victory_points_to_win)
+
+    def _search(self, flow: GameFlow, moves) -> SearchResult:
+        """Search the flow for the best of the given moves."""
+        if self.workers > 1 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        result = mcts_search(
+            flow,
+            iterations=self.iterations,
+            time_limit=self.time_limit,
+            workers=self.workers,
+            moves=moves,
+            rollout_policy=self.rollout_policy,
+            rollout_turns=self.rollout_turns,
+            exploration=self.exploration,
+            seed=self._rng.getrandbits(32),
+            executor=self._executor
+        )
+        self.last_search = result
+        return result
@@ -0,0 +1,56 @@
+"""
+PyCatan Headless Simulation
+
+This module plays complete games without users, visualizations or I/O:
+- SimulationEngine: Plays games end-to-end between policy callables
+- GameFlow: Steps a game through its turn structure one move at a time
+- mcts_search: Monte Carlo Tree Search over GameFlow positions
+- estimate_win_probabilities: Win rates from parallel playouts of a position
+- CatanEnv: Gymnasium-style environment with a fixed, masked action space
+- VectorCatanEnv: Many CatanEnv games stepped together, in or out of process
+- ObservationEncoder: NumPy features for one player, written from live Game internals
+- StateEncoder / StateDecoder: Compact versioned binary codec for GameStates and Moves
+- GameResult: Summary of a finished game
+- run_batch: Plays many games in parallel across processes
+- Policies: Baseline policies for benchmarking and self-play
+"""
+
+from .engine import SimulationEngine, GameResult, Policy, play_game
+from .policies import random_policy, greedy_policy
+from .batch import run_batch, summarize, game_seed
+from .flow import GameFlow, Stage
+from .mcts import mcts_search, SearchResult
+from .estimate import estimate_win_probabilities, WinEstimate, wilson_interval
+from .env import CatanEnv, ActionSpace
+from .vector_env import VectorCatanEnv
+from .observation import ObservationEncoder
+from .codec import StateEncoder, StateDecoder, encode_state, decode_state, encode_moves, decode_moves
+
+__all__ = [
+    'SimulationEngine',
+    'GameResult',
+    'Policy',
+    'play_game',
+    'random_policy',
+    'greedy_policy',
+    'run_batch',
+    'summarize',
+    'game_seed',
+    'GameFlow',
+    'Stage',
+    'mcts_search',
+    'SearchResult',
+    'estimate_win_probabilities',
+    'WinEstimate',
+    'wilson_interval',
+    'CatanEnv',
+    'ActionSpace',
+    'VectorCatanEnv',
+    'ObservationEncoder',
+    'StateEncoder',
+    'StateDecoder',
+    'encode_state',
+    'decode_state',
+    'encode_moves',
+    'decode_moves',
+]
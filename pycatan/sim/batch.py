@@ -0,0 +1,117 @@
+"""
+Batch runner for large numbers of headless games
+
+Shards games across a ProcessPoolExecutor. Every game is played with
+its own seed, derived from the batch seed and the game's index, so any
+game in a batch can be reproduced on its own and the results do not
+depend on how many workers were used.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+import os
+import random
+
+from .engine import SimulationEngine, GameResult, Policy
+
+
+def game_seed(batch_seed: int, game_index: int) -> int:
+    """
+    Derive the seed for one game of a batch.
+
+    Args:
+        batch_seed: Seed of the whole batch
+        game_index: Index of the game within the batch
+
+    Returns:
+        int: 64-bit seed for the game
+    """
+    return random.Random(batch_seed * 1_000_003 + game_index).getrandbits(64)
+
+
+def run_batch(n_games: int, policies: Sequence[Policy], workers: Optional[int] = None,
+              seed: Optional[int] = None, chunk_size: Optional[int] = None,
+              **engine_kwargs: Any) -> List[GameResult]:
+    """
+    Play many headless games in parallel.
+
+    Policies are sent to the worker processes, so they must be picklable
+    (for example module-level functions such as greedy_policy).
+
+    Args:
+        n_games: Number of games to play
+        policies: One policy per player, in player order
+        workers: Number of worker processes, defaults to os.cpu_count().
+                 With 1 worker the games are played in this process.
+        seed: Seed for the batch; a random one is chosen if not given
+        chunk_size: Number of games sent to a worker at a time
+        **engine_kwargs: Extra arguments for SimulationEngine
+
+    Returns:
+        List[GameResult]: One compact summary per game, in game order
+    """
+    if n_games <= 0:
+        return []
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+
+    # States are never sent back from workers
+    engine_kwargs['record_states'] = False
+
+    if workers == 1:
+        return _play_chunk(list(policies), seed, 0, n_games, engine_kwargs)
+
+    # A few chunks per worker keeps them busy when game lengths vary
+    if chunk_size is None:
+        chunk_size = max(1, n_games // (workers * 4))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_play_chunk, list(policies), seed, start,
+                            min(chunk_size, n_games - start), engine_kwargs)
+            for start in range(0, n_games, chunk_size)
+        ]
+        for future in futures:
+            results.extend(future.result())
+
+    return results
+
+
+def summarize(results: Sequence[GameResult]) -> Dict[str, Any]:
+    """
+    Aggregate the results of a batch.
+
+    Returns:
+        Dict: games played, wins and win rate per player, unfinished games and average turns
+    """
+    num_players = len(results[0].victory_points) if results else 0
+    wins = [0] * num_players
+    unfinished = 0
+    for r in results:
+        if r.winner is None:
+            unfinished += 1
+        else:
+            wins[r.winner] += 1
+
+    games = len(results)
+    return {
+        'games': games,
+        'wins': wins,
+        'win_rates': [w / games for w in wins] if games else [],
+        'unfinished': unfinished,
+        'average_turns': sum(r.turns for r in results) / games if games else 0.0
+    }
+
+
+def _play_chunk(policies: List[Policy], batch_seed: int, start: int, count: int,
+                engine_kwargs: Dict[str, Any]) -> List[GameResult]:
+    """Play a contiguous range of games from a batch."""
+    engine = SimulationEngine(policies, **engine_kwargs)
+    return [
+        engine.play_game(seed=game_seed(batch_seed, i))
+        for i in range(start, start + count)
+    ]
@@ -0,0 +1,628 @@
+"""
+Compact binary codec for game states and move streams
+
+This module packs GameStates and lists of Moves into versioned bytes for
+archiving self-play games, where JSON is many times larger and slower.
+
+Every encoding starts with a 3-byte magic and a version byte. Numbers are
+single bytes where they always fit, and unsigned LEB128 varints where
+they might not. Lists are a varint count followed by their items. Points
+and tiles are stored as their BoardDefinition ids, so coordinates, axial
+coordinates, harbor ratios and other derived fields are rebuilt on decode
+rather than stored.
+
+A state is laid out as:
+- magic b'PCS', version
+- a struct-packed header: turn_number, current_player, phases,
+  dev_cards_available, flags and dice
+- the other game fields: game_id, the bank's cards, discards and
+  pending lists
+- the board: the robber's tile, then tiles, harbors, buildings and roads,
+  each prefixed by its length in bytes
+- players: a count, then each player prefixed by its length in bytes
+
+Because parts are length-prefixed, a StateEncoder reuses the bytes of
+parts that are the same object as in the last state it encoded (as parts
+shared between Game.get_full_state snapshots are), and a StateDecoder
+returns the same object for parts whose bytes have not changed. Encoding
+or decoding a stream of states with one of each is several times faster
+than a state at a time.
+
+The action history of a GameState is not stored.
+"""
+
+import json
+import struct
+from copy import copy, deepcopy
+from typing import Any, Dict, List, Optional, Tuple
+
+from pycatan.config.board_definition import board_definition
+from pycatan.core.card import DevCard, ResCard
+from pycatan.core.move import Move, MoveType
+from pycatan.core.tile_type import TileType
+from pycatan.core.harbor import HarborType
+from pycatan.core.varint import read_varint, write_varint
+from pycatan.management.actions import BoardState, GamePhase, GameState, PlayerState, TurnPhase
+
+
+# Version written to new encodings, and the only one that can be read
+FORMAT_VERSION = 1
+STATE_MAGIC = b'PCS'
+MOVES_MAGIC = b'PCM'
+
+# Byte stored for a victim or token that is None
+NONE_BYTE = 255
+
+# Names used in GameStates, by the byte stored for them
+RES_NAMES = [c.name.lower() for c in sorted(ResCard, key=lambda c: c.value)]
+DEV_NAMES = [c.name.lower() for c in sorted(DevCard, key=lambda c: c.value)]
+TILE_NAMES = [t.name.lower() for t in sorted(TileType, key=lambda t: t.value)]
+HARBOR_NAMES = [h.name.lower() for h in sorted(HarborType, key=lambda h: h.value)]
+RES_CODES = {name: i for i, name in enumerate(RES_NAMES)}
+DEV_CODES = {name: i for i, name in enumerate(DEV_NAMES)}
+TILE_CODES = {name: i for i, name in enumerate(TILE_NAMES)}
+HARBOR_CODES = {name: i for i, name in enumerate(HARBOR_NAMES)}
+
+# Flags of the game fields and of each player
+FLAG_ROBBER_MOVED = 1
+FLAG_STEAL_PENDING = 2
+FLAG_DICE_ROLLED = 4
+FLAG_LONGEST_ROAD = 1
+FLAG_LARGEST_ARMY = 2
+# Bit set in a tile's type byte when the robber is on it
+TILE_HAS_ROBBER = 0x80
+
+
+def _write_string(out: bytearray, text: str) -> None:
+    """Append a string as its UTF-8 length and bytes."""
+    raw = text.encode('utf-8')
+    write_varint(out, len(raw))
+    out += raw
+
+
+def _read_string(data: bytes, pos: int) -> Tuple[str, int]:
+    """Read a string written by _write_string."""
+    length, pos = read_varint(data, pos)
+    return bytes(data[pos:pos + length]).decode('utf-8'), pos + length
+
+
+def _check_header(data: bytes, magic: bytes) -> int:
+    """Check an encoding's magic and version, returning where its body starts."""
+    if bytes(data[:3]) != magic:
+        raise ValueError(f"Not an encoding of this kind: expected magic {magic!r}, got {bytes(data[:3])!r}")
+    if len(data) < 4 or data[3] != FORMAT_VERSION:
+        version = data[3] if len(data) > 3 else None
+        raise ValueError(f"Unsupported codec version {version}; this version reads {FORMAT_VERSION}")
+    return 4
+
+
+# ===== POINTS =====
+
+# Point ids by game coordinates, and game coordinates by point id
+POINT_IDS = {coords: point_id for point_id, coords
+             in zip(board_definition.get_all_point_ids(),
+                    board_definition.point_ids_to_game_coords(board_definition.get_all_point_ids()))}
+POINT_COORDS = {point_id: coords for coords, point_id in POINT_IDS.items()}
+
+
+def _point_id(coords) -> int:
+    """Get the id of the point at game coordinates."""
+    try:
+        return POINT_IDS[coords[0], coords[1]]
+    except KeyError:
+        raise ValueError(f"No point at coordinates {coords}") from None
+
+
+def _point_coords(point_id: int) -> List[int]:
+    """Get the game coordinates of a point id, as a list like Point.position."""
+    return list(POINT_COORDS[point_id])
+
+
+# ===== STATES =====
+
+# Fixed game fields: turn_number, current_player, game_phase, turn_phase,
+# dev_cards_available, flags, and the two dice (0 if not rolled)
+STATE_HEADER = struct.Struct('<HBBBBBBB')
+
+# Phases by the value stored for them
+GAME_PHASES = {p.value: p for p in GamePhase}
+TURN_PHASES = {p.value: p for p in TurnPhase}
+
+# Kinds of part, which are cached separately
+PART_EXTRAS, PART_BOARD, PART_TILES, PART_HARBORS, PART_BUILDINGS, PART_ROADS, PART_PLAYER = range(7)
+
+
+class StateEncoder:
+    """
+    Encodes GameStates to bytes.
+
+    The bytes of the board, its parts and the players of the last state
+    encoded are kept, and reused for parts of the next state that are the
+    same objects.
+    """
+
+    def __init__(self):
+        """Initialize a StateEncoder."""
+        # kind of part (or a player's index) -> (the last part, its bytes)
+        self._parts: Dict[Any, Tuple[Any, bytes]] = {}
+        # the game fields that are not in the header, and their bytes
+        self._extras: Optional[Tuple[Any, ...]] = None
+        self._extras_bytes = b''
+
+    def encode(self, state: GameState) -> bytes:
+        """
+        Encode a state.
+
+        Args:
+            state: The state to encode
+
+        Returns:
+            bytes: The encoding
+        """
+        dice = state.dice_rolled
+        flags = ((FLAG_ROBBER_MOVED if state.robber_moved else 0) |
+                 (FLAG_STEAL_PENDING if state.steal_pending else 0) |
+                 (FLAG_DICE_ROLLED if dice is not None else 0))
+        out = bytearray(STATE_MAGIC)
+        out.append(FORMAT_VERSION)
+        out += STATE_HEADER.pack(state.turn_number, state.current_player, state.game_phase.value,
+                                 state.turn_phase.value, state.dev_cards_available, flags,
+                                 *(dice if dice is not None else (0, 0)))
+
+        extras = (state.game_id, state.resource_cards_available, state.players_must_discard,
+                  state.pending_actions, state.pending_trades)
+        if extras != self._extras:
+            self._extras = tuple(copy(x) for x in extras)
+            self._extras_bytes = _encode_extras(state)
+        write_varint(out, len(self._extras_bytes))
+        out += self._extras_bytes
+
+        self._write_part(out, PART_BOARD, state.board_state, self._encode_board)
+        write_varint(out, len(state.players_state))
+        for i, player in enumerate(state.players_state):
+            self._write_part(out, (PART_PLAYER, i), player, _encode_player)
+        return bytes(out)
+
+    def _encode_board(self, board: BoardState) -> bytes:
+        """Encode the robber, then the board's parts."""
+        robber = board_definition.game_coords_to_hex_id(*board.robber_position)
+        out = bytearray((NONE_BYTE if robber is None else robber,))
+        self._write_part(out, PART_TILES, board.tiles, _encode_tiles)
+        self._write_part(out, PART_HARBORS, board.harbors, _encode_harbors)
+        self._write_part(out, PART_BUILDINGS, board.buildings, _encode_buildings)
+        self._write_part(out, PART_ROADS, board.roads, _encode_roads)
+        return bytes(out)
+
+    def _write_part(self, out: bytearray, kind: Any, part: Any, encode) -> None:
+        """Append a part's length and bytes, reusing them if it is the last part of its kind."""
+        cached = self._parts.get(kind)
+        if cached is not None and cached[0] is part:
+            raw = cached[1]
+        else:
+            raw = encode(part)
+            self._parts[kind] = (part, raw)
+        write_varint(out, len(raw))
+        out += raw
+
+
+class StateDecoder:
+    """
+    Decodes GameStates from bytes made by a StateEncoder.
+
+    Boards, board parts and players whose bytes are the same as in the last
+    state decoded are returned as the same objects, so they should be
+    treated as read-only.
+    """
+
+    def __init__(self):
+        """Initialize a StateDecoder."""
+        # kind of part (or a player's index) -> (the last part's bytes, the part)
+        self._parts: Dict[Any, Tuple[bytes, Any]] = {}
+
+    def decode(self, data: bytes) -> GameState:
+        """
+        Decode a state.
+
+        Args:
+            data: An encoding from StateEncoder.encode or encode_state
+
+        Returns:
+            GameState: The state
+
+        Raises:
+            ValueError: If data is not a state encoding, or is of another version
+        """
+        pos = _check_header(data, STATE_MAGIC)
+        (turn_number, current_player, game_phase, turn_phase, dev_cards_available,
+         flags, die_one, die_two) = STATE_HEADER.unpack_from(data, pos)
+        pos += STATE_HEADER.size
+
+        extras, pos = self._read_part(data, pos, PART_EXTRAS, _decode_extras)
+        game_id, resource_cards_available, players_must_discard, pending_actions, pending_trades = extras
+        board_state, pos = self._read_part(data, pos, PART_BOARD, self._decode_board)
+        count, pos = read_varint(data, pos)
+        players_state = []
+        for i in range(count):
+            player, pos = self._read_part(data, pos, (PART_PLAYER, i), _decode_player)
+            players_state.append(player)
+
+        # the game fields are mutable, so each state gets its own copies
+        return GameState(
+            game_id=game_id,
+            turn_number=turn_number,
+            current_player=current_player,
+            game_phase=GAME_PHASES[game_phase],
+            turn_phase=TURN_PHASES[turn_phase],
+            board_state=board_state,
+            players_state=players_state,
+            dev_cards_available=dev_cards_available,
+            resource_cards_available=dict(resource_cards_available),
+            dice_rolled=(die_one, die_two) if flags & FLAG_DICE_ROLLED else None,
+            pending_trades=deepcopy(pending_trades) if pending_trades else [],
+            pending_actions=list(pending_actions),
+            players_must_discard=dict(players_must_discard),
+            robber_moved=bool(flags & FLAG_ROBBER_MOVED),
+            steal_pending=bool(flags & FLAG_STEAL_PENDING)
+        )
+
+    def _decode_board(self, data: bytes) -> BoardState:
+        """Decode the robber, then the board's parts."""
+        robber = data[0]
+        robber_position = ((3, 3) if robber == NONE_BYTE
+                           else tuple(board_definition.hex_id_to_game_coords(robber)))
+        tiles, pos = self._read_part(data, 1, PART_TILES, _decode_tiles)
+        harbors, pos = self._read_part(data, pos, PART_HARBORS, _decode_harbors)
+        buildings, pos = self._read_part(data, pos, PART_BUILDINGS, _decode_buildings)
+        roads, pos = self._read_part(data, pos, PART_ROADS, _decode_roads)
+        return BoardState(tiles=tiles, robber_position=robber_position, harbors=harbors,
+                          buildings=buildings, roads=roads)
+
+    def _read_part(self, data: bytes, pos: int, kind: Any, decode) -> Tuple[Any, int]:
+        """Read a part's length and bytes, reusing the last part of its kind if they are unchanged."""
+        length, pos = read_varint(data, pos)
+        raw = bytes(data[pos:pos + length])
+        cached = self._parts.get(kind)
+        if cached is not None and cached[0] == raw:
+            return cached[1], pos + length
+        part = decode(raw)
+        self._parts[kind] = (raw, part)
+        return part, pos + length
+
+
+def encode_state(state: GameState) -> bytes:
+    """Encode a single GameState. See StateEncoder to encode a stream of states."""
+    return StateEncoder().encode(state)
+
+
+def decode_state(data: bytes) -> GameState:
+    """Decode a single GameState. See StateDecoder to decode a stream of states."""
+    return StateDecoder().decode(data)
+
+
+def _encode_extras(state: GameState) -> bytes:
+    out = bytearray()
+    _write_string(out, state.game_id)
+    write_varint(out, len(state.resource_cards_available))
+    for name, count in state.resource_cards_available.items():
+        out.append(RES_CODES[name])
+        write_varint(out, count)
+    write_varint(out, len(state.players_must_discard))
+    for player, count in state.players_must_discard.items():
+        out.append(player)
+        write_varint(out, count)
+    write_varint(out, len(state.pending_actions))
+    for action in state.pending_actions:
+        _write_string(out, action)
+    write_varint(out, len(state.pending_trades))
+    for trade in state.pending_trades:
+        _write_string(out, json.dumps(trade, separators=(',', ':')))
+    return bytes(out)
+
+
+def _decode_extras(data: bytes) -> Tuple[Any, ...]:
+    game_id, pos = _read_string(data, 0)
+    count, pos = read_varint(data, pos)
+    resource_cards_available = {}
+    for _ in range(count):
+        name = RES_NAMES[data[pos]]
+        resource_cards_available[name], pos = read_varint(data, pos + 1)
+    count, pos = read_varint(data, pos)
+    players_must_discard = {}
+    for _ in range(count):
+        player = data[pos]
+        players_must_discard[player], pos = read_varint(data, pos + 1)
+    count, pos = read_varint(data, pos)
+    pending_actions = []
+    for _ in range(count):
+        action, pos = _read_string(data, pos)
+        pending_actions.append(action)
+    count, pos = read_varint(data, pos)
+    pending_trades = []
+    for _ in range(count):
+        trade, pos = _read_string(data, pos)
+        pending_trades.append(json.loads(trade))
+    return game_id, resource_cards_available, players_must_discard, pending_actions, pending_trades
+
+
+def _encode_tiles(tiles: List[Dict[str, Any]]) -> bytes:
+    out = bytearray()
+    write_varint(out, len(tiles))
+    for tile in tiles:
+        out.append(tile['id'])
+        out.append(TILE_CODES[tile['type']] | (TILE_HAS_ROBBER if tile['has_robber'] else 0))
+        out.append(NONE_BYTE if tile['token'] is None else tile['token'])
+    return bytes(out)
+
+
+def _decode_tiles(data: bytes) -> List[Dict[str, Any]]:
+    count, pos = read_varint(data, 0)
+    tiles = []
+    for _ in range(count):
+        hex_id, type_code, token = data[pos:pos + 3]
+        pos += 3
+        tiles.append({
+            'id': hex_id,
+            'position': list(board_definition.hex_id_to_game_coords(hex_id)),
+            'axial_coords': board_definition.hex_id_to_axial_coords(hex_id),
+            'type': TILE_NAMES[type_code & ~TILE_HAS_ROBBER],
+            'token': None if token == NONE_BYTE else token,
+            'has_robber': bool(type_code & TILE_HAS_ROBBER)
+        })
+    return tiles
+
+
+def _encode_harbors(harbors: List[Dict[str, Any]]) -> bytes:
+    out = bytearray()
+    write_varint(out, len(harbors))
+    for harbor in harbors:
+        out += bytes((harbor['point_one'], harbor['point_two'], HARBOR_CODES[harbor['resource']]))
+    return bytes(out)
+
+
+def _decode_harbors(data: bytes) -> List[Dict[str, Any]]:
+    count, pos = read_varint(data, 0)
+    harbors = []
+    for _ in range(count):
+        point_one, point_two, resource = data[pos:pos + 3]
+        pos += 3
+        name = HARBOR_NAMES[resource]
+        harbors.append({'point_one': point_one, 'point_two': point_two, 'resource': name,
+                        'ratio': 2 if name != 'any' else 3})
+    return harbors
+
+
+def _encode_buildings(buildings: Dict[int, Dict[str, Any]]) -> bytes:
+    out = bytearray()
+    write_varint(out, len(buildings))
+    for point_id, building in buildings.items():
+        out.append(point_id)
+        out.append(building['owner'] << 1 | (building['type'] == 'city'))
+    return bytes(out)
+
+
+def _decode_buildings(data: bytes) -> Dict[int, Dict[str, Any]]:
+    count, pos = read_varint(data, 0)
+    buildings = {}
+    for _ in range(count):
+        point_id, packed = data[pos:pos + 2]
+        pos += 2
+        buildings[point_id] = {
+            'type': 'city' if packed & 1 else 'settlement',
+            'owner': packed >> 1,
+            'game_coords': _point_coords(point_id)
+        }
+    return buildings
+
+
+def _encode_roads(roads: List[Dict[str, Any]]) -> bytes:
+    out = bytearray()
+    write_varint(out, len(roads))
+    for road in roads:
+        out += bytes((road['start_point_id'], road['end_point_id'], road['owner']))
+    return bytes(out)
+
+
+def _decode_roads(data: bytes) -> List[Dict[str, Any]]:
+    count, pos = read_varint(data, 0)
+    roads = []
+    for _ in range(count):
+        start, end, owner = data[pos:pos + 3]
+        pos += 3
+        roads.append({'start_point_id': start, 'end_point_id': end, 'owner': owner,
+                      'start_coords': _point_coords(start), 'end_coords': _point_coords(end)})
+    return roads
+
+
+def _encode_player(player: PlayerState) -> bytes:
+    out = bytearray((player.player_id,))
+    _write_string(out, player.name)
+
+    # cards as runs of the same card, which keeps their order
+    runs = []
+    for name in player.cards:
+        code = RES_CODES[name]
+        if runs and runs[-1][0] == code:
+            runs[-1][1] += 1
+        else:
+            runs.append([code, 1])
+    write_varint(out, len(runs))
+    for code, count in runs:
+        out.append(code)
+        write_varint(out, count)
+
+    write_varint(out, len(player.dev_cards))
+    out += bytes(DEV_CODES[name] for name in player.dev_cards)
+    for positions in (player.settlements, player.cities):
+        write_varint(out, len(positions))
+        out += bytes(_point_id(p) for p in positions)
+    write_varint(out, len(player.roads))
+    for road in player.roads:
+        out.append(_point_id(road[:2]))
+        out.append(_point_id(road[2:]))
+
+    write_varint(out, player.victory_points)
+    write_varint(out, player.longest_road_length)
+    write_varint(out, player.knights_played)
+    out.append((FLAG_LONGEST_ROAD if player.has_longest_road else 0) |
+               (FLAG_LARGEST_ARMY if player.has_largest_army else 0))
+    return bytes(out)
+
+
+def _decode_player(data: bytes) -> PlayerState:
+    player_id = data[0]
+    name, pos = _read_string(data, 1)
+
+    count, pos = read_varint(data, pos)
+    cards = []
+    for _ in range(count):
+        code = data[pos]
+        run, pos = read_varint(data, pos + 1)
+        cards += [RES_NAMES[code]] * run
+
+    count, pos = read_varint(data, pos)
+    dev_cards = [DEV_NAMES[code] for code in data[pos:pos + count]]
+    pos += count
+    positions = []
+    for _ in range(2):
+        count, pos = read_varint(data, pos)
+        positions.append([_point_coords(p) for p in data[pos:pos + count]])
+        pos += count
+    count, pos = read_varint(data, pos)
+    ends = data[pos:pos + 2 * count]
+    roads = [[*POINT_COORDS[start], *POINT_COORDS[end]] for start, end in zip(ends[::2], ends[1::2])]
+    pos += 2 * count
+
+    victory_points, pos = read_varint(data, pos)
+    longest_road_length, pos = read_varint(data, pos)
+    knights_played, pos = read_varint(data, pos)
+    flags = data[pos]
+    return PlayerState(
+        player_id=player_id,
+        name=name,
+        cards=cards,
+        dev_cards=dev_cards,
+        settlements=positions[0],
+        cities=positions[1],
+        roads=roads,
+        victory_points=victory_points,
+        longest_road_length=longest_road_length,
+        has_longest_road=bool(flags & FLAG_LONGEST_ROAD),
+        has_largest_army=bool(flags & FLAG_LARGEST_ARMY),
+        knights_played=knights_played
+    )
+
+
+# ===== MOVES =====
+
+# Args of each move type, besides USE_DEV_CARD, as the kinds of byte stored
+# 'p' is a point or tile number, 'v' a victim (or None), 'r' a ResCard
+# and 'n' a count
+MOVE_ARGS = {
+    MoveType.PLACE_STARTING_SETTLEMENT: 'p',
+    MoveType.PLACE_STARTING_ROAD: 'pp',
+    MoveType.ROLL_DICE: '',
+    MoveType.END_TURN: '',
+    MoveType.BUILD_SETTLEMENT: 'p',
+    MoveType.BUILD_CITY: 'p',
+    MoveType.BUILD_ROAD: 'pp',
+    MoveType.BUY_DEV_CARD: '',
+    MoveType.TRADE_BANK: 'rnr',
+    MoveType.DISCARD_CARDS: 'r',
+    MoveType.ROBBER_MOVE: 'pv',
+}
+# Args of USE_DEV_CARD after the card, for each card
+DEV_CARD_ARGS = {
+    DevCard.Knight: 'pv',
+    DevCard.Road: 'pppp',
+    DevCard.Monopoly: 'r',
+    DevCard.YearOfPlenty: 'rr',
+    DevCard.VictoryPoint: '',
+}
+MOVE_TYPES = {t.value: t for t in MoveType}
+DEV_CARDS = {c.value: c for c in DevCard}
+RES_CARDS = {c.value: c for c in ResCard}
+
+
+def _arg_byte(kind: str, arg: Any) -> int:
+    """Get the byte stored for a move argument."""
+    if kind == 'r':
+        return arg.value
+    if kind == 'v' and arg is None:
+        return NONE_BYTE
+    return arg
+
+
+def _arg_value(kind: str, byte: int) -> Any:
+    """Get a move argument from its byte."""
+    if kind == 'r':
+        return RES_CARDS[byte]
+    if kind == 'v' and byte == NONE_BYTE:
+        return None
+    return byte
+
+
+def encode_moves(moves: List[Move]) -> bytes:
+    """
+    Encode a list of Moves.
+
+    Each move takes one byte for its type and player, then one byte for
+    each argument, so a whole game is usually well under 2 KB.
+
+    Args:
+        moves: The moves, whose players must be below 8
+
+    Returns:
+        bytes: The encoding
+    """
+    out = bytearray(MOVES_MAGIC)
+    out.append(FORMAT_VERSION)
+    write_varint(out, len(moves))
+    for move in moves:
+        if not 0 <= move.player < 8:
+            raise ValueError(f"Cannot encode a move by player {move.player}")
+        out.append(move.type.value << 3 | move.player)
+        args = move.args
+        if move.type == MoveType.USE_DEV_CARD:
+            out.append(args[0].value)
+            kinds = DEV_CARD_ARGS[args[0]]
+            args = args[1:]
+        else:
+            kinds = MOVE_ARGS[move.type]
+        for kind, arg in zip(kinds, args):
+            out.append(_arg_byte(kind, arg))
+    return bytes(out)
+
+
+def decode_moves(data: bytes) -> List[Move]:
+    """
+    Decode a list of Moves made by encode_moves.
+
+    Args:
+        data: The encoding
+
+    Returns:
+        List[Move]: The moves
+
+    Raises:
+        ValueError: If data is not a move encoding, or is of another version
+    """
+    pos = _check_header(data, MOVES_MAGIC)
+    count, pos = read_varint(data, pos)
+    moves = []
+    for _ in range(count):
+        packed = data[pos]
+        pos += 1
+        move_type = MOVE_TYPES[packed >> 3]
+        args: Tuple[Any, ...] = ()
+        if move_type == MoveType.USE_DEV_CARD:
+            card = DEV_CARDS[data[pos]]
+            pos += 1
+            kinds = DEV_CARD_ARGS[card]
+            args = (card,)
+        else:
+            kinds = MOVE_ARGS[move_type]
+        if kinds:
+            args += tuple(_arg_value(kind, byte) for kind, byte in zip(kinds, data[pos:pos + len(kinds)]))
+            pos += len(kinds)
+        moves.append(Move(move_type, packed & 7, args))
+    return moves
@@ -0,0 +1,152 @@
+"""
+SimulationEngine - Headless game driver for PyCatan
+
+This module contains the SimulationEngine class that plays complete games
+end-to-end between policy callables. Unlike the GameManager it has no users,
+no visualizations and no console output, and it only builds GameState
+snapshots when asked to. All rules come from Game, Player and DefaultBoard,
+so a simulated game follows the same rules as an interactive one.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Sequence
+from pycatan.core.game import Game
+from pycatan.core.move import Move
+from pycatan.sim.flow import GameFlow
+
+
+# A policy chooses one of the legal moves for a player
+# policy(game, player_id, legal_moves) -> Move
+Policy = Callable[[Game, int, List[Move]], Move]
+
+
+@dataclass
+class GameResult:
+    """Summary of a single simulated game."""
+    winner: Optional[int]  # None if the game hit the turn limit
+    turns: int  # Number of normal-play turns taken
+    moves: int  # Number of moves chosen by the policies
+    victory_points: List[int]  # Final VP per player, including VP cards
+    resources_produced: List[int] = field(default_factory=list)  # Cards each player got from setup and dice rolls
+    seed: Optional[int] = None  # Seed the game was played with, if any
+    states: List[Any] = field(default_factory=list)  # GameState after each move, if recorded
+
+
+class SimulationEngine:
+    """
+    Plays complete Catan games between policy callables.
+
+    Each player is controlled by a policy, a callable that receives the
+    Game, the player's ID and the list of legal moves, and returns one of
+    those moves. Turns are driven by a GameFlow and follow the GameManager: a snake-order setup
+    phase, then turns made of optional development card plays, a dice roll
+    (with discards and the robber on a 7), and any number of builds, bank
+    trades and card plays before the player ends their turn.
+
+    Player-to-player trades need a negotiation between users and are not
+    part of simulated games.
+    """
+
+    def __init__(self, policies: Sequence[Policy], victory_points_to_win: int = 10,
+                 max_turns: int = 1000, record_states: bool = False):
+        """
+        Initialize a SimulationEngine.
+
+        Args:
+            policies: One policy per player, in player order
+            victory_points_to_win: Victory points needed to win a game
+            max_turns: Number of normal-play turns after which a game is abandoned
+            record_states: Whether to record a GameState snapshot after every move
+
+        Raises:
+            ValueError: If no policies are given
+        """
+        if not policies:
+            raise ValueError("At least one policy is required")
+
+        self.policies = list(policies)
+        self.num_players = len(self.policies)
+        self.victory_points_to_win = victory_points_to_win
+        self.max_turns = max_turns
+        self.record_states = record_states
+
+        # Per-game state, reset by play_game()
+        self.game: Optional[Game] = None
+        self.flow: Optional[GameFlow] = None
+        self._moves_played = 0
+        self._states = []
+
+    def play_game(self, seed: Optional[int] = None) -> GameResult:
+        """
+        Play one complete game.
+
+        Args:
+            seed: Optional seed for this game's random streams. Without one the
+                  game draws from the module-level random generator.
+
+        Returns:
+            GameResult: Summary of the finished game
+        """
+        self._new_game(seed)
+        flow = self.flow
+
+        while not flow.is_finished:
+            self.apply(self._choose(flow.player, flow.get_moves()))
+
+        return GameResult(
+            winner=flow.winner,
+            turns=flow.turns,
+            moves=self._moves_played,
+            victory_points=[p.get_VP(include_dev=True) for p in self.game.players],
+            resources_produced=flow.resources_produced,
+            seed=seed,
+            states=self._states
+        )
+
+    def play_games(self, n_games: int) -> List[GameResult]:
+        """Play several games one after another."""
+        return [self.play_game() for _ in range(n_games)]
+
+    # ===== GAME FLOW =====
+
+    def _new_game(self, seed: Optional[int] = None) -> None:
+        """Create a fresh Game and its GameFlow."""
+        self.game = Game(num_of_players=self.num_players, rng=seed)
+        self.flow = GameFlow(self.game, self.victory_points_to_win, self.max_turns)
+        self._moves_played = 0
+        self._states = []
+
+    def _choose(self, player: int, moves: List[Move]) -> Move:
+        """Ask a player's policy to choose one of the given moves."""
+        self._moves_played += 1
+        if len(moves) == 1:
+            return moves[0]
+        return self.policies[player](self.game, player, moves)
+
+    # ===== APPLYING MOVES =====
+
+    def apply(self, move: Move) -> None:
+        """
+        Apply a legal move to the current game and advance its GameFlow.
+
+        Raises:
+            ValueError: If the Game rejects the move
+        """
+        self.flow.apply(move)
+
+        if self.record_states:
+            self._states.append(self.game.get_full_state())
+
+
+def play_game(policies: Sequence[Policy], **kwargs) -> GameResult:
+    """
+    Play a single headless game.
+
+    Args:
+        policies: One policy per player, in player order
+        **kwargs: Extra arguments for SimulationEngine
+
+    Returns:
+        GameResult: Summary of the finished game
+    """
+    return SimulationEngine(policies, **kwargs).play_game()
@@ -0,0 +1,347 @@
+"""
+CatanEnv - Reinforcement learning environment for PyCatan
+
+This module contains CatanEnv, a Gymnasium-style environment that plays a
+Game through a GameFlow, and ActionSpace, which numbers every move a player
+could ever make so that a policy network can choose between a fixed set of
+outputs. Each step comes with a boolean mask of the legal actions, and
+observations are fixed-size NumPy arrays from the point of view of the
+player whose decision it is.
+
+NumPy is only needed for the environment's arrays; the rest of the
+simulation package works without it.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from pycatan.core.game import Game
+from pycatan.core.card import DevCard, ResCard
+from pycatan.core.move import Move, MoveType
+from pycatan.core.topology import BoardTopology
+from .flow import GameFlow
+from .engine import Policy
+from .observation import ObservationEncoder, NUMPY_AVAILABLE, np
+
+
+# Number of resource types, in ResCard value order
+NUM_RESOURCES = len(ResCard)
+
+
+class ActionSpace:
+    """
+    Numbers every move a player could make on a board.
+
+    The actions are split into blocks, in this order:
+    - roll dice, end turn and buy a development card (one action each)
+    - a settlement on each point, starting or not
+    - a city on each point
+    - a road on each edge, starting or not
+    - a bank trade for each (resource given, resource received), always at
+      the best ratio the player has
+    - a discard of each resource
+    - a robber move to each (tile, victim)
+    - a Knight played on each (tile, victim)
+    - a Road Building card played on each pair of edges
+    - a Monopoly on each resource
+    - a Year of Plenty for each (resource, resource)
+
+    Victims are numbered from the acting player: victim slot 0 means nobody
+    is stolen from, and slot k means player (player + k) % num_players.
+    """
+
+    def __init__(self, topology: BoardTopology, num_players: int):
+        """
+        Initialize an ActionSpace.
+
+        Args:
+            topology: Layout of the board the moves are made on
+            num_players: Number of players in the game
+        """
+        self.topology = topology
+        self.num_players = num_players
+        num_edges = topology.num_edges
+        self._edge_ids = topology.edge_ids
+
+        size = 0
+
+        def block(length: int) -> int:
+            nonlocal size
+            start = size
+            size += length
+            return start
+
+        self.roll_dice = block(1)
+        self.end_turn = block(1)
+        self.buy_dev_card = block(1)
+        self.settlement = block(topology.num_points)
+        self.city = block(topology.num_points)
+        self.road = block(num_edges)
+        self.trade = block(NUM_RESOURCES * NUM_RESOURCES)
+        self.discard = block(NUM_RESOURCES)
+        self.robber = block(topology.num_tiles * num_players)
+        self.knight = block(topology.num_tiles * num_players)
+        self.road_building = block(num_edges * (num_edges - 1) // 2)
+        self.monopoly = block(NUM_RESOURCES)
+        self.year_of_plenty = block(NUM_RESOURCES * NUM_RESOURCES)
+        self.n = size  # Number of actions
+
+    def index(self, move: Move) -> int:
+        """
+        Get the action number of a move.
+
+        Bank trades at different ratios share an action number.
+
+        Args:
+            move: A fully parameterised move
+
+        Returns:
+            int: The move's action number
+        """
+        move_type = move.type
+        args = move.args
+
+        if move_type == MoveType.ROLL_DICE:
+            return self.roll_dice
+        if move_type == MoveType.END_TURN:
+            return self.end_turn
+        if move_type == MoveType.BUY_DEV_CARD:
+            return self.buy_dev_card
+        if move_type in (MoveType.PLACE_STARTING_SETTLEMENT, MoveType.BUILD_SETTLEMENT):
+            return self.settlement + args[0]
+        if move_type == MoveType.BUILD_CITY:
+            return self.city + args[0]
+        if move_type in (MoveType.PLACE_STARTING_ROAD, MoveType.BUILD_ROAD):
+            return self.road + self._edge_ids[args]
+        if move_type == MoveType.TRADE_BANK:
+            return self.trade + args[0].value * NUM_RESOURCES + args[2].value
+        if move_type == MoveType.DISCARD_CARDS:
+            return self.discard + args[0].value
+        if move_type == MoveType.ROBBER_MOVE:
+            return self.robber + args[0] * self.num_players + self._victim_slot(move.player, args[1])
+
+        card = args[0]
+        if card == DevCard.Knight:
+            return self.knight + args[1] * self.num_players + self._victim_slot(move.player, args[2])
+        if card == DevCard.Road:
+            return self.road_building + self._pair_index(self._edge_ids[args[1:3]], self._edge_ids[args[3:5]])
+        if card == DevCard.Monopoly:
+            return self.monopoly + args[1].value
+        return self.year_of_plenty + args[1].value * NUM_RESOURCES + args[2].value
+
+    def sample(self, mask: Any, rng) -> int:
+        """
+        Choose a legal action uniformly at random.
+
+        Args:
+            mask: Boolean array of the legal actions
+            rng: A random.Random or NumPy Generator to choose with
+
+        Returns:
+            int: The chosen action number
+        """
+        legal = np.flatnonzero(mask)
+        return int(legal[rng.integers(len(legal))] if hasattr(rng, 'integers') else rng.choice(legal))
+
+    def _victim_slot(self, player: int, victim: Optional[int]) -> int:
+        """Number a victim from the acting player, with 0 for nobody."""
+        if victim is None:
+            return 0
+        return (victim - player) % self.num_players
+
+    def _pair_index(self, first: int, second: int) -> int:
+        """Number an unordered pair of different edges."""
+        if first > second:
+            first, second = second, first
+        num_edges = self.topology.num_edges
+        return first * num_edges - first * (first + 1) // 2 + second - first - 1
+
+
+class CatanEnv:
+    """
+    Gymnasium-style environment for learning to play Catan.
+
+    reset() and step() follow the Gymnasium API: reset returns
+    (observation, info) and step returns (observation, reward, terminated,
+    truncated, info). Actions are numbered by an ActionSpace, and
+    info['action_mask'] (also returned by action_masks()) says which of them
+    are legal. Player-to-player trades are not part of the action space.
+
+    Without an opponent policy the agent makes every player's decisions, and
+    each step's reward is 1 if the move won the game for the player who made
+    it. With an opponent policy the agent only plays one seat, the other
+    seats are played by the policy between steps, and the reward is 1 when
+    the agent wins and -1 when another player wins.
+
+    Observations are float32 vectors made by an ObservationEncoder, always
+    from the point of view of the player whose decision it is, with the other
+    players listed in turn order after them.
+    """
+
+    metadata = {'render_modes': []}
+
+    def __init__(self, num_players: int = 4, victory_points_to_win: int = 10, max_turns: int = 300,
+                 opponent_policy: Optional[Policy] = None, agent: int = 0,
+                 observation_buffer: Any = None):
+        """
+        Initialize a CatanEnv.
+
+        Args:
+            num_players: Number of players in each game
+            victory_points_to_win: Victory points needed to win, including VP cards
+            max_turns: Number of normal-play turns after which a game is truncated
+            opponent_policy: Policy for the seats the agent does not play, or None
+                             for the agent to play every seat
+            agent: Seat the agent plays when there is an opponent policy
+            observation_buffer: float32 array to encode observations into. If
+                                given, reset and step return it rather than a
+                                new array, so it is overwritten every step.
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for CatanEnv. Install with: pip install numpy")
+
+        self.num_players = num_players
+        self.victory_points_to_win = victory_points_to_win
+        self.max_turns = max_turns
+        self.opponent_policy = opponent_policy
+        self.agent = agent
+
+        self.flow: Optional[GameFlow] = None
+        self.action_space: Optional[ActionSpace] = None
+        self.encoder: Optional[ObservationEncoder] = None
+        self.observation_size = 0
+        self._observation = observation_buffer
+        self._copy_observations = observation_buffer is None
+        self._moves: Dict[int, Move] = {}
+        self._mask = None
+
+        # The action space and observation size depend on the board, so a
+        # first game is made to size them
+        self.reset()
+
+    @property
+    def game(self) -> Game:
+        """The game being played."""
+        return self.flow.game
+
+    @property
+    def player(self) -> int:
+        """The player whose decision it is."""
+        return self.flow.player
+
+    def reset(self, seed: Optional[int] = None,
+              options: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Start a new game.
+
+        Args:
+            seed: Seed for the game's board, dice and cards; random if not given
+            options: Unused, for Gymnasium compatibility
+
+        Returns:
+            Tuple: The first observation and the info dict
+        """
+        self.flow = GameFlow(Game(num_of_players=self.num_players, rng=seed),
+                             self.victory_points_to_win, self.max_turns)
+        if self.action_space is None:
+            topology = self.game.board.get_topology()
+            self.action_space = ActionSpace(topology, self.num_players)
+            self.encoder = ObservationEncoder(topology, self.num_players)
+            self.observation_size = self.encoder.size
+            self._mask = np.zeros(self.action_space.n, dtype=bool)
+            if self._observation is None:
+                self._observation = self.encoder.new_buffer()
+
+        self._play_opponents()
+        return self._observe(), self._info()
+
+    def step(self, action: int) -> Tuple[Any, float, bool, bool, Dict[str, Any]]:
+        """
+        Make a move.
+
+        Args:
+            action: Number of a legal action
+
+        Returns:
+            Tuple: (observation, reward, terminated, truncated, info)
+
+        Raises:
+            ValueError: If the action is not legal, or the game is over
+        """
+        move = self.move_for(action)
+        flow = self.flow
+        flow.apply(move)
+
+        self._play_opponents()
+        terminated = flow.winner is not None
+        truncated = flow.is_finished and not terminated
+
+        reward = 0.0
+        if terminated:
+            if self.opponent_policy is None:
+                reward = 1.0 if flow.winner == move.player else 0.0
+            else:
+                reward = 1.0 if flow.winner == self.agent else -1.0
+
+        return self._observe(), reward, terminated, truncated, self._info()
+
+    def action_masks(self) -> Any:
+        """Get a boolean array of the legal actions."""
+        return self._mask.copy()
+
+    def move_for(self, action: int) -> Move:
+        """
+        Get the move a legal action makes.
+
+        Raises:
+            ValueError: If the action is not legal
+        """
+        move = self._moves.get(int(action))
+        if move is None:
+            raise ValueError(f"Action {action} is not legal")
+        return move
+
+    def close(self) -> None:
+        """Release the environment's resources."""
+
+    # ===== HELPERS =====
+
+    def _play_opponents(self) -> None:
+        """Let the opponent policy play until it is the agent's decision, then find the legal actions."""
+        flow = self.flow
+        policy = self.opponent_policy
+        if policy is not None:
+            while not flow.is_finished and flow.player != self.agent:
+                moves = flow.get_moves()
+                flow.apply(moves[0] if len(moves) == 1 else policy(flow.game, flow.player, moves))
+
+        index = self.action_space.index
+        self._moves = {}
+        for move in flow.get_moves():
+            i = index(move)
+            other = self._moves.get(i)
+            # trades at several ratios share an action, which uses the best one
+            if other is None or move.args[1] < other.args[1]:
+                self._moves[i] = move
+
+        self._mask[:] = False
+        self._mask[list(self._moves)] = True
+
+    def _info(self) -> Dict[str, Any]:
+        """Build the info dict for the current decision."""
+        flow = self.flow
+        return {
+            'action_mask': self._mask.copy(),
+            'player': flow.player,
+            'stage': flow.stage,
+            'winner': flow.winner,
+            'turns': flow.turns,
+        }
+
+    def _observe(self) -> Any:
+        """Encode the game from the point of view of the player whose decision it is."""
+        flow = self.flow
+        observation = self.encoder.encode(flow.game, flow.player, self._observation, flow.stage, flow.turns)
+        return observation.copy() if self._copy_observations else observation
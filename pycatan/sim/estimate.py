@@ -0,0 +1,236 @@
+"""
+Monte Carlo win-probability estimates
+
+This module contains estimate_win_probabilities, which plays a position out
+many times with the real rules and counts who wins. Playouts are spread
+over a ProcessPoolExecutor in batches, and the estimate stops early once
+every player's confidence interval is narrow enough. Win rates are taken
+over the playouts that finished, so playouts that hit the turn limit
+neither count against every player nor let an estimate stop early.
+
+Every playout has its own seed, derived from the estimate's seed and the
+playout's index, and batches are counted in order, so an estimate with a
+seed gives the same result however many workers it uses.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from math import sqrt
+from statistics import NormalDist
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+import os
+import random
+import time
+
+from pycatan.core.game import Game
+from .flow import GameFlow, Stage
+from .engine import Policy
+from .policies import greedy_policy
+from .batch import game_seed
+
+
+@dataclass
+class WinEstimate:
+    """Estimated chance of each player winning from a position."""
+    probabilities: List[float]  # Share of finished playouts each player won
+    intervals: List[Tuple[float, float]]  # Wilson score interval of each probability
+    wins: List[int]  # Playouts each player won
+    rollouts: int  # Playouts counted
+    unfinished: int  # Playouts that hit the turn limit without a winner
+    confidence: float  # Confidence level of the intervals
+    stopped_early: bool = False  # Whether the intervals were narrow enough before all playouts ran
+    elapsed: float = 0.0  # Wall-clock time, in seconds
+    seed: Optional[int] = None  # Seed of the estimate
+
+    @property
+    def margin(self) -> float:
+        """Largest half-width of the players' intervals."""
+        return max(((high - low) / 2 for low, high in self.intervals), default=0.0)
+
+
+def estimate_win_probabilities(position: Any, rollouts: int = 10_000, workers: Optional[int] = None,
+                               policies: Union[Policy, Sequence[Policy]] = greedy_policy,
+                               confidence: float = 0.95, tolerance: float = 0.01,
+                               batch_size: int = 250, max_turns: int = 300,
+                               victory_points_to_win: int = 10, seed: Optional[int] = None,
+                               progress: Optional[Callable[[WinEstimate], None]] = None) -> WinEstimate:
+    """
+    Estimate each player's chance of winning by playing the position out.
+
+    Playouts use the Game rules through a GameFlow, with new dice and a
+    reshuffled development card deck each time. Win rates are out of the
+    playouts that finished with a winner. After every batch, the estimate
+    stops if at least one playout has finished and each player's interval
+    is within tolerance of their win rate.
+
+    The position can be:
+    - a GameFlow, which is played from its current decision
+    - a GameManager, which is played from its current decision
+    - a GameState, such as one from GameManager.get_full_state(), which is
+      rebuilt with Game.from_state and played from the decision its phase
+      fields describe
+    - a Game, which is played from the start of the setup phase if nothing
+      has been built, or else from the start of player 0's turn
+
+    Args:
+        position: The position to estimate from, which is not changed
+        rollouts: Largest number of playouts
+        workers: Number of worker processes, defaults to os.cpu_count().
+                 With 1 worker the playouts run in this process.
+        policies: Policy for every player, or one policy per player. They must
+                  be picklable when more than one worker is used.
+        confidence: Confidence level of the intervals
+        tolerance: Largest interval half-width at which the estimate stops early
+        batch_size: Number of playouts sent to a worker at a time
+        max_turns: Largest number of turns a playout plays
+        victory_points_to_win: Victory points needed to win, including VP cards
+        seed: Seed for the estimate; a random one is chosen if not given
+        progress: Called with the estimate so far after every batch
+
+    Returns:
+        WinEstimate: Win rates and confidence intervals per player
+    """
+    start = time.perf_counter()
+    flow = _start_flow(position, victory_points_to_win)
+    flow.max_turns = flow.turns + max_turns
+    num_players = flow.num_players
+    if callable(policies):
+        policies = [policies] * num_players
+    policies = list(policies)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+    # The flow is sent to the workers, so it gets streams of its own rather
+    # than ones shared with the random module
+    flow = flow.fork(seed=seed)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    wins = [0] * num_players
+    counted = 0
+    unfinished = 0
+    estimate = _make_estimate(wins, counted, unfinished, z, confidence, seed)
+
+    batches = [(s, min(batch_size, rollouts - s)) for s in range(0, rollouts, batch_size)]
+
+    def add_batch(result: Tuple[List[int], int]) -> bool:
+        """Count a batch of playouts, returning whether the estimate is done."""
+        nonlocal counted, unfinished, estimate
+        batch_wins, batch_unfinished = result
+        for i in range(num_players):
+            wins[i] += batch_wins[i]
+        unfinished += batch_unfinished
+        counted += sum(batch_wins) + batch_unfinished
+        estimate = _make_estimate(wins, counted, unfinished, z, confidence, seed)
+        if progress is not None:
+            progress(estimate)
+        # Until a playout finishes there is nothing to estimate from
+        return counted > unfinished and estimate.margin <= tolerance
+
+    stopped_early = False
+    if workers == 1 or len(batches) == 1:
+        for batch_start, count in batches:
+            if add_batch(_play_rollouts(flow, policies, seed, batch_start, count)):
+                stopped_early = counted < rollouts
+                break
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            # A few batches per worker are kept running, and batches are
+            # counted in order so the result does not depend on timing
+            pending = []
+            next_batch = 0
+            while next_batch < len(batches) or pending:
+                while next_batch < len(batches) and len(pending) < workers * 2:
+                    batch_start, count = batches[next_batch]
+                    pending.append(executor.submit(_play_rollouts, flow, policies, seed, batch_start, count))
+                    next_batch += 1
+                if add_batch(pending.pop(0).result()):
+                    stopped_early = counted < rollouts
+                    break
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    estimate.stopped_early = stopped_early
+    estimate.elapsed = time.perf_counter() - start
+    return estimate
+
+
+def wilson_interval(successes: int, trials: int, z: float) -> Tuple[float, float]:
+    """
+    Wilson score interval for a proportion.
+
+    Args:
+        successes: Number of successes
+        trials: Number of trials
+        z: Standard normal quantile for the confidence level (1.96 for 95%)
+
+    Returns:
+        Tuple[float, float]: Lower and upper bound, (0.0, 1.0) with no trials
+    """
+    if trials == 0:
+        return (0.0, 1.0)
+    p = successes / trials
+    z2 = z * z
+    denominator = 1 + z2 / trials
+    center = (p + z2 / (2 * trials)) / denominator
+    half_width = z * sqrt(p * (1 - p) / trials + z2 / (4 * trials * trials)) / denominator
+    # Rounding can put a bound just past p when p is 0 or 1
+    return (max(0.0, min(p, center - half_width)), min(1.0, max(p, center + half_width)))
+
+
+def _start_flow(position: Any, victory_points_to_win: int) -> GameFlow:
+    """Get a GameFlow for a position, on a copy of its game."""
+    if isinstance(position, GameFlow):
+        flow = position.fork()
+        flow.victory_points_to_win = victory_points_to_win
+        return flow
+
+    if hasattr(position, 'get_game_flow'):
+        return position.get_game_flow(victory_points_to_win)
+
+    if isinstance(position, Game):
+        flow = GameFlow(position.fork(), victory_points_to_win)
+        if position.board.occupied_mask:
+            flow.resume(Stage.PRE_ROLL, 0)
+        return flow
+
+    return GameFlow.from_state(Game.from_state(position), position,
+                               victory_points_to_win=victory_points_to_win)
+
+
+def _make_estimate(wins: List[int], counted: int, unfinished: int, z: float,
+                   confidence: float, seed: int) -> WinEstimate:
+    """Build a WinEstimate from the playouts counted so far."""
+    finished = counted - unfinished
+    return WinEstimate(
+        probabilities=[w / finished if finished else 0.0 for w in wins],
+        intervals=[wilson_interval(w, finished, z) for w in wins],
+        wins=list(wins),
+        rollouts=counted,
+        unfinished=unfinished,
+        confidence=confidence,
+        seed=seed
+    )
+
+
+def _play_rollouts(flow: GameFlow, policies: List[Policy], seed: int,
+                   start: int, count: int) -> Tuple[List[int], int]:
+    """Play a contiguous range of playouts, returning the wins per player and the unfinished count."""
+    wins = [0] * flow.num_players
+    unfinished = 0
+    for i in range(start, start + count):
+        sample = flow.fork(seed=game_seed(seed, i))
+        game = sample.game
+        while not sample.is_finished:
+            moves = sample.get_moves()
+            if len(moves) == 1:
+                sample.apply(moves[0])
+            else:
+                sample.apply(policies[sample.player](game, sample.player, moves))
+        if sample.winner is None:
+            unfinished += 1
+        else:
+            wins[sample.winner] += 1
+    return wins, unfinished
@@ -0,0 +1,364 @@
+"""
+GameFlow - Move-by-move turn structure for headless games
+
+This module contains the GameFlow class, which steps a Game through the same
+turn structure the SimulationEngine plays, one move at a time. At any point
+it can say whose decision it is and which moves are legal, and it can be
+forked, so search-based players can try moves on copies of the game.
+"""
+
+from enum import Enum
+from typing import List, Optional, Sequence
+from pycatan.core.game import Game
+from pycatan.core.rng import GameRandom
+from pycatan.core.journal import UndoToken
+from pycatan.core.move import Move, MoveType
+from pycatan.core.statuses import Statuses
+from pycatan.core.legal_moves import LegalMoveGenerator
+
+
+class Stage(Enum):
+    """The kind of decision a GameFlow is waiting for."""
+    SETUP_SETTLEMENT = 0  # Placing a starting settlement
+    SETUP_ROAD = 1  # Placing a starting road
+    PRE_ROLL = 2  # Playing development cards before rolling
+    POST_ROLL = 3  # Building, trading and playing cards until the turn ends
+    DISCARD = 4  # Discarding one card after a 7
+    ROBBER = 5  # Moving the robber after a 7
+    FINISHED = 6  # Somebody won, or the turn limit was reached
+
+
+class GameFlow:
+    """
+    Steps a Game through the turn structure one move at a time.
+
+    The setup phase places settlements and roads in snake draft order, and
+    the second settlement gives its adjacent resources. Each normal turn
+    starts with optional development card plays and a dice roll. On a 7,
+    every player with more than 7 cards discards half of them one card at a
+    time, and the current player then moves the robber. The player then
+    builds, trades and plays cards until they end their turn.
+
+    Stages with no legal moves (a setup placement with nowhere to build) are
+    skipped, so get_moves() only returns an empty list once the game is over.
+    """
+
+    def __init__(self, game: Game, victory_points_to_win: int = 10, max_turns: int = 1000):
+        """
+        Initialize a GameFlow at the start of the setup phase.
+
+        Args:
+            game: The game to play, which should have nothing built yet
+            victory_points_to_win: Victory points needed to win, including VP cards
+            max_turns: Number of normal-play turns after which the game is over
+        """
+        self.game = game
+        self.legal_moves = LegalMoveGenerator(game)
+        self.num_players = len(game.players)
+        self.victory_points_to_win = victory_points_to_win
+        self.max_turns = max_turns
+
+        # Snake draft order for the setup phase
+        self.setup_order = list(range(self.num_players)) + list(reversed(range(self.num_players)))
+        self.setup_index = 0
+
+        self.stage = Stage.SETUP_SETTLEMENT
+        self.player = self.setup_order[0]  # Player whose decision it is
+        self.turn_player = self.player  # Player whose turn it is
+        self.turns = 0  # Normal-play turns started
+        self.discards: List[int] = []  # Players still to discard, once per card
+        self.winner: Optional[int] = None
+        self.resources_produced = [0] * self.num_players
+
+        self._skip_empty_stages()
+
+    @classmethod
+    def from_state(cls, game: Game, state, settlement_placed: Optional[bool] = None,
+                   victory_points_to_win: int = 10, max_turns: int = 1000) -> 'GameFlow':
+        """
+        Create a GameFlow at the decision a GameState's phase fields describe.
+
+        Uses the state's game_phase, turn_phase, current_player, turn_number,
+        dice_rolled and players_must_discard, the fields the GameManager keeps
+        up to date. After a robber move that is waiting for a steal, the flow
+        continues as if the steal had already happened.
+
+        Args:
+            game: The game the state belongs to, which the flow plays on
+            state: GameState with the phase of the game
+            settlement_placed: Whether the current player has placed their
+                               settlement this setup turn. Worked out from their
+                               settlements and roads if not given.
+            victory_points_to_win: Victory points needed to win, including VP cards
+            max_turns: Number of normal-play turns after which the game is over
+
+        Returns:
+            GameFlow: The flow, at the state's decision
+        """
+        from pycatan.management.actions import GamePhase, TurnPhase
+
+        flow = cls(game, victory_points_to_win, max_turns)
+        player = state.current_player
+        num_players = len(game.players)
+
+        if state.game_phase in (GamePhase.SETUP_FIRST_ROUND, GamePhase.SETUP_SECOND_ROUND):
+            if settlement_placed is None:
+                # each setup turn places a settlement and then a road
+                roads = len(game.board.get_player_roads(player))
+                settlement_placed = game.players[player].victory_points > roads
+            stage = Stage.SETUP_ROAD if settlement_placed else Stage.SETUP_SETTLEMENT
+            flow.resume(stage, player, setup_index=state.turn_number)
+            return flow
+
+        if state.game_phase != GamePhase.NORMAL_PLAY:
+            flow.resume(Stage.FINISHED, player)
+            return flow
+
+        discards = []
+        if state.turn_phase == TurnPhase.DISCARD_PHASE:
+            stage = Stage.DISCARD
+            for player_id in sorted(state.players_must_discard):
+                discards.extend([player_id] * state.players_must_discard[player_id])
+        elif state.turn_phase == TurnPhase.ROBBER_MOVE:
+            stage = Stage.ROBBER
+        elif not state.dice_rolled:
+            stage = Stage.PRE_ROLL
+        else:
+            stage = Stage.POST_ROLL
+
+        # turn_number also counts the setup turns
+        turns = max(0, state.turn_number - 2 * num_players + 1)
+        flow.resume(stage, player, turns=turns, discards=discards)
+        return flow
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the game is over."""
+        return self.stage == Stage.FINISHED
+
+    def fork(self, seed: Optional[int] = None, observer: Optional[int] = None) -> 'GameFlow':
+        """
+        Make an independent copy of the flow and its game.
+
+        Args:
+            seed: If given, the copy gets new random streams seeded with it and
+                  its development card deck is reshuffled, so it plays out one
+                  of the futures the players cannot yet tell apart
+            observer: With a seed, the player the copy is made for. The other
+                      players' development cards are shuffled in with the deck
+                      and dealt back, so the copy holds one of the hands the
+                      observer cannot tell apart from the real ones.
+
+        Returns:
+            GameFlow: The copy
+        """
+        flow = GameFlow.__new__(GameFlow)
+        flow.__dict__.update(self.__dict__)
+        flow.game = self.game.fork()
+        if seed is not None:
+            game = flow.game
+            game.rng = GameRandom(seed)
+            if observer is None:
+                game.rng.deck.shuffle(game.dev_deck)
+            else:
+                hidden = [p for p in game.players if p.num != observer]
+                unseen = game.dev_deck + [card for p in hidden for card in p.dev_cards]
+                game.rng.deck.shuffle(unseen)
+                for p in hidden:
+                    held = list(p.dev_cards)
+                    for card in held:
+                        p.remove_dev_card(card)
+                    for _ in held:
+                        p.add_dev_card(unseen.pop())
+                game.dev_deck = unseen
+        flow.legal_moves = LegalMoveGenerator(flow.game)
+        flow.discards = self.discards[:]
+        flow.resources_produced = self.resources_produced[:]
+        return flow
+
+    def resume(self, stage: Stage, player: int, turn_player: Optional[int] = None,
+               setup_index: int = 0, turns: int = 0, discards: Sequence[int] = ()) -> None:
+        """
+        Continue from a position part way through a game.
+
+        Args:
+            stage: The kind of decision to continue with
+            player: Player whose decision it is
+            turn_player: Player whose turn it is, defaults to player
+            setup_index: Number of setup placements already finished
+            turns: Number of normal-play turns already started
+            discards: Players still to discard after a 7, once per card
+        """
+        self.stage = stage
+        self.player = player
+        self.turn_player = player if turn_player is None else turn_player
+        self.setup_index = setup_index
+        self.turns = turns
+        self.discards = list(discards)
+        if self.discards:
+            self.player = self.discards[0]
+        self._skip_empty_stages()
+
+    def get_moves(self) -> List[Move]:
+        """Get the legal moves for the player whose decision it is."""
+        moves = self.legal_moves
+        player = self.player
+        stage = self.stage
+
+        if stage == Stage.POST_ROLL:
+            return moves.turn_moves(player)
+        if stage == Stage.PRE_ROLL:
+            return moves.pre_roll_moves(player)
+        if stage == Stage.DISCARD:
+            return moves.discard_moves(player)
+        if stage == Stage.ROBBER:
+            return moves.robber_moves(player)
+        if stage == Stage.SETUP_SETTLEMENT:
+            return moves.settlement_moves(player, is_starting=True)
+        if stage == Stage.SETUP_ROAD:
+            return moves.road_moves(player, is_starting=True)
+        return []
+
+    def apply(self, move: Move, undoable: bool = False) -> UndoToken:
+        """
+        Apply a legal move and advance to the next decision.
+
+        Args:
+            move: One of the moves returned by get_moves()
+            undoable: Whether the game should record the move's changes.
+                      The flow's own position is not part of the token.
+
+        Returns:
+            UndoToken: The token from Game.apply
+
+        Raises:
+            ValueError: If the Game rejects the move
+        """
+        game = self.game
+        if move.type == MoveType.ROLL_DICE:
+            hand_sizes = [len(p.cards) for p in game.players]
+
+        token = game.apply(move, undoable)
+        if token.status != Statuses.ALL_GOOD:
+            raise ValueError(f"Game rejected {move} with status {token.status}")
+
+        stage = self.stage
+        if stage == Stage.POST_ROLL:
+            if move.type == MoveType.END_TURN:
+                self._next_turn()
+
+        elif stage == Stage.PRE_ROLL:
+            if move.type == MoveType.ROLL_DICE:
+                for i, p in enumerate(game.players):
+                    self.resources_produced[i] += len(p.cards) - hand_sizes[i]
+                if token.result == 7:
+                    self._start_discards()
+                else:
+                    self.stage = Stage.POST_ROLL
+
+        elif stage == Stage.DISCARD:
+            self.discards.pop(0)
+            if self.discards:
+                self.player = self.discards[0]
+            else:
+                self.player = self.turn_player
+                self.stage = Stage.ROBBER
+
+        elif stage == Stage.ROBBER:
+            self.stage = Stage.POST_ROLL
+
+        elif stage == Stage.SETUP_SETTLEMENT:
+            # The second settlement gives its adjacent resources
+            if self.setup_index >= self.num_players:
+                self._distribute_setup_resources(move.player, game.board.get_point(move.args[0]),
+                                                 token, undoable)
+            self.stage = Stage.SETUP_ROAD
+
+        elif stage == Stage.SETUP_ROAD:
+            self._next_setup_placement()
+
+        if game.players[move.player].get_VP(include_dev=True) >= self.victory_points_to_win:
+            self.winner = move.player
+            self.stage = Stage.FINISHED
+
+        self._skip_empty_stages()
+        return token
+
+    # ===== TURN STRUCTURE =====
+
+    def _next_setup_placement(self) -> None:
+        """Move on to the next player's starting settlement, or to the first turn."""
+        self.setup_index += 1
+        if self.setup_index < len(self.setup_order):
+            self.player = self.turn_player = self.setup_order[self.setup_index]
+            self.stage = Stage.SETUP_SETTLEMENT
+        else:
+            self._start_turn(0)
+
+    def _next_turn(self) -> None:
+        """Start the next player's turn."""
+        self._start_turn((self.turn_player + 1) % self.num_players)
+
+    def _start_turn(self, player: int) -> None:
+        """Start a normal turn for a player, or finish the game at the turn limit."""
+        if self.turns >= self.max_turns:
+            self.stage = Stage.FINISHED
+            return
+        self.turns += 1
+        self.player = self.turn_player = player
+        self.stage = Stage.PRE_ROLL
+
+    def _start_discards(self) -> None:
+        """Queue a discard for every card players with more than 7 cards must give up."""
+        self.discards = [
+            p.num
+            for p in self.game.players if len(p.cards) > 7
+            for _ in range(len(p.cards) // 2)
+        ]
+        if self.discards:
+            self.player = self.discards[0]
+            self.stage = Stage.DISCARD
+        else:
+            self.stage = Stage.ROBBER
+
+    def _skip_empty_stages(self) -> None:
+        """Skip setup placements and robber moves that have no legal moves."""
+        while True:
+            if self.stage == Stage.SETUP_SETTLEMENT:
+                if not self.get_moves():
+                    # Without a settlement there is nowhere to start a road
+                    self._next_setup_placement()
+                    continue
+            elif self.stage == Stage.SETUP_ROAD:
+                if not self.get_moves():
+                    self._next_setup_placement()
+                    continue
+            elif self.stage == Stage.ROBBER:
+                if not self.get_moves():
+                    self.stage = Stage.POST_ROLL
+            return
+
+    def _distribute_setup_resources(self, player: int, point, token: UndoToken, undoable: bool) -> None:
+        """
+        Give a player one card for each resource tile next to a point.
+
+        The cards are recorded in the settlement's token, and in any move it
+        was applied within, so undoing the settlement takes them back.
+        """
+        from pycatan.core.board import Board
+
+        game = self.game
+        outer = game.journal
+        recorded = len(token.changes)
+        if undoable or outer is not None:
+            game.journal = token.changes
+        try:
+            for tile in point.tiles:
+                card_type = Board.get_card_from_tile(tile.type)
+                if card_type:
+                    game.players[player].add_cards([card_type])
+                    self.resources_produced[player] += 1
+        finally:
+            game.journal = outer
+        if outer is not None:
+            outer.extend(token.changes[recorded:])
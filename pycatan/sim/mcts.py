@@ -0,0 +1,216 @@
+"""
+Monte Carlo Tree Search over GameFlow positions
+
+This module contains mcts_search, which chooses a move for the player whose
+decision a GameFlow is waiting for. The search is open-loop UCT: tree nodes
+are reached by sequences of moves, and every iteration plays the sequence
+on a fresh fork of the game with new dice, and with the development card
+deck and the opponents' development cards shuffled together and dealt
+again, so the tree averages over what the searching player cannot know.
+Each player is scored separately, so the search works for any number of
+players.
+
+Searches can be split across processes (root parallelism): each worker
+grows its own tree from the same position, and the statistics of the root
+moves are added together before the move is chosen.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from math import log, sqrt
+from typing import Dict, List, Optional, Sequence, Tuple
+import random
+import time
+
+from pycatan.core.move import Move
+from .flow import GameFlow
+from .engine import Policy
+from .policies import random_policy
+from .batch import game_seed
+
+
+@dataclass
+class SearchResult:
+    """Summary of a single search."""
+    move: Move  # The most visited root move
+    iterations: int  # Iterations run, across all workers
+    rollouts: int  # Rollouts played, across all workers
+    elapsed: float  # Wall-clock time of the search, in seconds
+    visits: Dict[Move, int] = field(default_factory=dict)  # Iterations through each root move
+    values: Dict[Move, float] = field(default_factory=dict)  # Average reward of each root move for the player
+
+    @property
+    def rollouts_per_second(self) -> float:
+        """Rollout throughput of the search."""
+        return self.rollouts / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _Node:
+    """A tree node, reached by a sequence of moves from the root."""
+    __slots__ = ('player', 'visits', 'reward', 'children')
+
+    def __init__(self, player: int):
+        self.player = player  # Player who made the move leading here
+        self.visits = 0
+        self.reward = 0.0  # Total reward for self.player
+        self.children: Dict[Move, '_Node'] = {}
+
+
+def mcts_search(flow: GameFlow, iterations: Optional[int] = None, time_limit: Optional[float] = None,
+                workers: int = 1, moves: Optional[Sequence[Move]] = None,
+                rollout_policy: Policy = random_policy, rollout_turns: int = 20,
+                exploration: float = 0.7, seed: Optional[int] = None,
+                executor: Optional[Executor] = None) -> SearchResult:
+    """
+    Choose a move for the player whose decision the flow is waiting for.
+
+    The search stops after the given number of iterations or once the time
+    limit has passed, whichever comes first. Rollouts play the rest of the
+    game with the rollout policy, for at most rollout_turns turns. A rollout
+    that ends with a winner scores 1 for them and 0 for everyone else,
+    otherwise each player scores their victory points as a share of the
+    points needed to win.
+
+    Args:
+        flow: The position to search from, which is not changed
+        iterations: Number of iterations to run, across all workers. Defaults
+                    to 1000 if there is no time limit.
+        time_limit: Seconds to search for
+        workers: Number of processes that grow separate trees. With 1 worker
+                 the search runs in this process.
+        moves: The root moves to choose between, defaults to every legal move
+        rollout_policy: Policy that plays the rollouts. It must be picklable
+                        when more than one worker is used.
+        rollout_turns: Largest number of turns a rollout plays
+        exploration: UCT exploration constant
+        seed: Seed for the search, so a search can be repeated exactly
+        executor: Process pool to run the workers in, instead of a new one
+
+    Returns:
+        SearchResult: The chosen move and the search statistics
+
+    Raises:
+        ValueError: If there are no moves to choose between
+    """
+    root_moves = list(flow.get_moves() if moves is None else moves)
+    if not root_moves:
+        raise ValueError("There are no moves to search")
+    if iterations is None and time_limit is None:
+        iterations = 1000
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+
+    start = time.perf_counter()
+    if len(root_moves) == 1:
+        return SearchResult(root_moves[0], 0, 0, time.perf_counter() - start,
+                            {root_moves[0]: 0}, {root_moves[0]: 0.0})
+
+    workers = max(1, workers)
+    worker_iterations = None if iterations is None else max(1, -(-iterations // workers))
+    # Each worker gets a fork with its own streams, which can be sent to
+    # another process even when the flow's are shared with the random module
+    jobs = [
+        (flow.fork(seed=game_seed(seed, i)), root_moves, worker_iterations, time_limit,
+         rollout_policy, rollout_turns, exploration, game_seed(seed, i))
+        for i in range(workers)
+    ]
+
+    if workers == 1:
+        stats = [_search_tree(*jobs[0])]
+    elif executor is not None:
+        stats = list(executor.map(_search_tree, *zip(*jobs)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            stats = list(pool.map(_search_tree, *zip(*jobs)))
+
+    # Add the root move statistics of every tree together
+    visits = {move: 0 for move in root_moves}
+    rewards = {move: 0.0 for move in root_moves}
+    total_iterations = 0
+    for root_stats, count in stats:
+        total_iterations += count
+        for move, (move_visits, move_reward) in root_stats.items():
+            visits[move] += move_visits
+            rewards[move] += move_reward
+
+    best = max(root_moves, key=lambda m: (visits[m], rewards[m]))
+    return SearchResult(
+        move=best,
+        iterations=total_iterations,
+        rollouts=total_iterations,
+        elapsed=time.perf_counter() - start,
+        visits=visits,
+        values={m: rewards[m] / visits[m] if visits[m] else 0.0 for m in root_moves}
+    )
+
+
+def _search_tree(flow: GameFlow, root_moves: List[Move], iterations: Optional[int],
+                 time_limit: Optional[float], rollout_policy: Policy, rollout_turns: int,
+                 exploration: float, seed: int) -> Tuple[Dict[Move, Tuple[int, float]], int]:
+    """Grow one tree and return the visits and total reward of each root move."""
+    rng = random.Random(seed)
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    root = _Node(flow.player)
+    allowed = set(root_moves)
+    max_turns = flow.turns + rollout_turns
+
+    count = 0
+    while iterations is None or count < iterations:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        count += 1
+
+        # Sample the hidden information and the dice for this iteration
+        sample = flow.fork(seed=rng.getrandbits(64), observer=root.player)
+        sample.max_turns = max_turns
+        game = sample.game
+
+        # Selection and expansion
+        node = root
+        path = [root]
+        while not sample.is_finished:
+            moves = root_moves if node is root else sample.get_moves()
+            untried = [m for m in moves if m not in node.children]
+            if untried:
+                move = rng.choice(untried)
+                child = node.children[move] = _Node(sample.player)
+                sample.apply(move)
+                path.append(child)
+                break
+
+            # Moves name their player, so every child here is for the player to move
+            parent_log = log(node.visits)
+            best_score = -1.0
+            for m in moves:
+                child = node.children[m]
+                score = child.reward / child.visits + exploration * sqrt(parent_log / child.visits)
+                if score > best_score:
+                    best_score, move = score, m
+            node = node.children[move]
+            sample.apply(move)
+            path.append(node)
+
+        # Rollout
+        while not sample.is_finished:
+            moves = sample.get_moves()
+            if len(moves) == 1:
+                sample.apply(moves[0])
+            else:
+                sample.apply(rollout_policy(game, sample.player, moves))
+
+        # Backpropagation
+        if sample.winner is not None:
+            scores = [0.0] * sample.num_players
+            scores[sample.winner] = 1.0
+        else:
+            target = sample.victory_points_to_win
+            scores = [min(p.get_VP(include_dev=True) / target, 1.0) for p in game.players]
+        for node in path:
+            node.visits += 1
+            node.reward += scores[node.player]
+
+    root_stats = {
+        move: (child.visits, child.reward)
+        for move, child in root.children.items() if move in allowed
+    }
+    return root_stats, count
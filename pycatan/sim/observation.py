@@ -0,0 +1,235 @@
+"""
+ObservationEncoder - NumPy features straight from a live Game
+
+This module contains ObservationEncoder, which writes a fixed-size feature
+vector for one player's point of view into a preallocated NumPy array. It
+reads the Game's own bitmasks, hands and counters, so no GameState is built
+and no strings or dicts are created on the way.
+
+The vector is made of sections that can be reshaped into planes with
+ObservationEncoder.planes():
+- tiles (8, num_tiles): one plane per tile type, dice odds (pips), robber
+- points (2 * num_players + 6, num_points): settlements of each player,
+  cities of each player, and the harbor each point trades at (one plane
+  per resource, then 3:1)
+- edges (num_players, num_edges): roads of each player
+- hand (10,): the player's resource cards, then development cards, by value
+- players (num_players, 7): each player's card count, development card
+  count, knights played, public victory points, longest road length, and
+  whether they hold longest road and largest army
+- flow (len(Stage) + 2,): the kind of decision, turns played, and the
+  number of development cards left
+
+Players are listed from the observing player, in turn order.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from pycatan.core.card import DevCard, ResCard
+from pycatan.core.game import Game
+from pycatan.core.harbor import Harbor
+from pycatan.core.tile_type import TileType
+from pycatan.core.topology import BoardTopology
+from .flow import Stage
+
+
+# Features per tile: tile types, pips, robber
+TILE_PLANES = len(TileType) + 2
+# Harbor planes per point: one per resource, then 3:1
+HARBOR_PLANES = len(ResCard) + 1
+# Public features per player
+PLAYER_FEATURES = 7
+# Development card types, by value
+DEV_CARDS = tuple(sorted(DevCard, key=lambda c: c.value))
+
+
+class ObservationEncoder:
+    """
+    Encodes a Game from one player's point of view into a NumPy array.
+
+    The board's tiles and harbors do not change during a game, so their
+    features are worked out once per game and copied in. Buildings and
+    roads are unpacked from the Board's bitmasks with a single
+    np.unpackbits call.
+    """
+
+    def __init__(self, topology: BoardTopology, num_players: int):
+        """
+        Initialize an ObservationEncoder.
+
+        Args:
+            topology: Layout of the boards that will be encoded
+            num_players: Number of players in the games
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for ObservationEncoder. Install with: pip install numpy")
+
+        self.topology = topology
+        self.num_players = num_players
+        num_tiles = topology.num_tiles
+        num_points = topology.num_points
+        num_edges = topology.num_edges
+
+        self.sections: Dict[str, Tuple[slice, Tuple[int, ...]]] = {}
+        size = 0
+        for name, shape in (
+            ('tiles', (TILE_PLANES, num_tiles)),
+            ('points', (2 * num_players + HARBOR_PLANES, num_points)),
+            ('edges', (num_players, num_edges)),
+            ('hand', (len(ResCard) + len(DEV_CARDS),)),
+            ('players', (num_players, PLAYER_FEATURES)),
+            ('flow', (len(Stage) + 2,)),
+        ):
+            length = int(np.prod(shape))
+            self.sections[name] = (slice(size, size + length), shape)
+            size += length
+        self.size = size  # Length of an observation
+
+        # Bytes each point or edge mask is unpacked from
+        self._mask_bytes = (max(num_points, num_edges) + 7) // 8
+
+        # The last buffer written to, and views of its sections
+        self._out = None
+        self._views = None
+
+        # Features of the last board encoded that do not change during a game
+        self._tiles = None
+        self._static_tiles = None
+        self._static_harbors = None
+
+    def new_buffer(self, batch: Optional[int] = None) -> Any:
+        """
+        Allocate an array for observations.
+
+        Args:
+            batch: Number of observations, or None for a single one
+
+        Returns:
+            np.ndarray: A zeroed float32 array of shape (size,) or (batch, size)
+        """
+        shape = (self.size,) if batch is None else (batch, self.size)
+        return np.zeros(shape, dtype=np.float32)
+
+    def encode(self, game: Game, player: int, out: Any = None,
+               stage: Optional[Stage] = None, turns: int = 0) -> Any:
+        """
+        Encode a game from a player's point of view.
+
+        Args:
+            game: The game to encode
+            player: The player whose point of view is encoded
+            out: float32 array of length size to write into; allocated if not given
+            stage: The kind of decision the player is making, if known
+            turns: Number of normal-play turns played
+
+        Returns:
+            np.ndarray: out, holding the observation
+        """
+        if out is None:
+            out = self.new_buffer()
+        if out is not self._out:
+            self._out = out
+            self._views = tuple(self.planes(out).values())
+        tiles, points, edges, hand, players, flow = self._views
+        board = game.board
+        n = self.num_players
+        order = [(player + k) % n for k in range(n)]
+
+        # Tiles and harbors only change between games
+        if board.tiles is not self._tiles:
+            self._cache_static(board)
+        tiles[:-1] = self._static_tiles
+        tiles[-1] = 0.0
+        if board.robber is not None:
+            r, i = board.robber
+            tiles[-1, board.get_tile_num(board.tiles[r][i])] = 1.0
+        points[2 * n:] = self._static_harbors
+
+        # Buildings and roads, unpacked from the board's bitmasks
+        mask_bytes = self._mask_bytes
+        settlement_masks = board.settlement_masks
+        city_masks = board.city_masks
+        road_masks = board.road_masks
+        masks = b''.join(
+            [settlement_masks.get(p, 0).to_bytes(mask_bytes, 'little') for p in order] +
+            [city_masks.get(p, 0).to_bytes(mask_bytes, 'little') for p in order] +
+            [road_masks.get(p, 0).to_bytes(mask_bytes, 'little') for p in order]
+        )
+        bits = np.unpackbits(np.frombuffer(masks, dtype=np.uint8), bitorder='little').reshape(3 * n, -1)
+        points[:2 * n] = bits[:2 * n, :self.topology.num_points]
+        edges[:] = bits[2 * n:, :self.topology.num_edges]
+
+        # The player's own cards
+        me = game.players[player]
+        dev_cards = me.dev_cards
+        hand[:] = me.cards.counts + [dev_cards.count(card) for card in DEV_CARDS]
+
+        # Public information about every player
+        longest_road = game.longest_road_owner
+        largest_army = game.largest_army
+        features = []
+        for p in order:
+            other = game.players[p]
+            features += (
+                other.cards.total,
+                len(other.dev_cards),
+                other.knight_cards,
+                other.victory_points,
+                other.longest_road_length,
+                p == longest_road,
+                p == largest_army,
+            )
+        players.ravel()[:] = features
+
+        flow[:] = 0.0
+        if stage is not None:
+            flow[stage.value] = 1.0
+        flow[-2] = turns
+        flow[-1] = len(game.dev_deck)
+        return out
+
+    def planes(self, observation: Any) -> Dict[str, Any]:
+        """
+        Split observations into their sections.
+
+        Args:
+            observation: An array of shape (size,) or (batch, size)
+
+        Returns:
+            Dict[str, np.ndarray]: Views of each section, reshaped to its
+                                   shape (with the batch dimension first)
+        """
+        batch = observation.shape[:-1]
+        return {name: observation[..., part].reshape(batch + shape)
+                for name, (part, shape) in self.sections.items()}
+
+    def _cache_static(self, board) -> None:
+        """Work out the tile and harbor features of a board."""
+        topology = self.topology
+        tiles = np.zeros((TILE_PLANES - 1, topology.num_tiles), dtype=np.float32)
+        for t in range(topology.num_tiles):
+            tile = board.get_tile(t)
+            tiles[tile.type.value, t] = 1.0
+            if tile.token_num:
+                tiles[-1, t] = 6 - abs(7 - tile.token_num)
+
+        harbors = np.zeros((HARBOR_PLANES, topology.num_points), dtype=np.float32)
+        for harbor in board.harbors:
+            card = Harbor.get_card_from_harbor_type(harbor.type)
+            plane = len(ResCard) if card is None else card.value
+            for point in (harbor.point_one, harbor.point_two):
+                harbors[plane, board.get_point_num(point)] = 1.0
+
+        self._tiles = board.tiles
+        self._static_tiles = tiles
+        self._static_harbors = harbors
@@ -0,0 +1,90 @@
+"""
+Built-in policies for the SimulationEngine
+
+A policy is any callable taking (game, player_id, legal_moves) and
+returning one of the legal moves. These are simple baselines for
+benchmarking and self-play; they do not look ahead. Their random
+choices come from the game's policy stream, so seeded games replay
+exactly.
+"""
+from typing import List
+
+from pycatan.core.game import Game
+from pycatan.core.card import DevCard
+from pycatan.core.move import Move, MoveType
+
+
+def random_policy(game: Game, player: int, moves: List[Move]) -> Move:
+    """Choose a legal move uniformly at random."""
+    return game.rng.policy.choice(moves)
+
+
+def greedy_policy(game: Game, player: int, moves: List[Move]) -> Move:
+    """
+    Build whenever possible, preferring the moves worth the most victory points.
+
+    Starting settlements go on the point with the best dice odds, cities come
+    before settlements, and bank trades are only made for a resource the player
+    has none of. The robber goes next to the opponent with the most victory points.
+    """
+    by_type = {}
+    for move in moves:
+        by_type.setdefault(move.type, []).append(move)
+
+    if MoveType.PLACE_STARTING_SETTLEMENT in by_type:
+        return max(by_type[MoveType.PLACE_STARTING_SETTLEMENT], key=lambda m: _point_pips(game, m.args[0]))
+
+    if MoveType.DISCARD_CARDS in by_type:
+        cards = game.players[player].cards
+        return max(by_type[MoveType.DISCARD_CARDS], key=lambda m: cards.count(m.args[0]))
+
+    if MoveType.ROBBER_MOVE in by_type:
+        return max(by_type[MoveType.ROBBER_MOVE], key=lambda m: _victim_score(game, m.args[1]))
+
+    for move_type in (MoveType.BUILD_CITY, MoveType.BUILD_SETTLEMENT, MoveType.BUY_DEV_CARD):
+        if move_type in by_type:
+            return game.rng.policy.choice(by_type[move_type])
+
+    if MoveType.USE_DEV_CARD in by_type:
+        return max(by_type[MoveType.USE_DEV_CARD], key=lambda m: _dev_card_score(game, m))
+
+    for move_type in (MoveType.BUILD_ROAD, MoveType.PLACE_STARTING_ROAD):
+        if move_type in by_type:
+            return game.rng.policy.choice(by_type[move_type])
+
+    if MoveType.TRADE_BANK in by_type:
+        cards = game.players[player].cards
+        useful = [m for m in by_type[MoveType.TRADE_BANK] if m.args[2] not in cards]
+        if useful:
+            return min(useful, key=lambda m: m.args[1])
+
+    if MoveType.ROLL_DICE in by_type:
+        return by_type[MoveType.ROLL_DICE][0]
+
+    if MoveType.END_TURN in by_type:
+        return by_type[MoveType.END_TURN][0]
+
+    return game.rng.policy.choice(moves)
+
+
+def _point_pips(game: Game, index: int) -> int:
+    """Get the number of dice combinations that yield resources at a point."""
+    pips = 0
+    for tile in game.board.get_point(index).tiles:
+        if tile.token_num:
+            pips += 6 - abs(7 - tile.token_num)
+    return pips
+
+
+def _dev_card_score(game: Game, move: Move) -> int:
+    """Score a development card play, preferring knights that steal from the leader."""
+    if move.args[0] == DevCard.Knight:
+        return _victim_score(game, move.args[2])
+    return 0
+
+
+def _victim_score(game: Game, victim) -> int:
+    """Score a robber victim by their public victory points."""
+    if victim is None:
+        return -1
+    return game.players[victim].get_VP()
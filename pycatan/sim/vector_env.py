@@ -0,0 +1,334 @@
+"""
+VectorCatanEnv - Many CatanEnv games stepped together
+
+This module contains VectorCatanEnv, which holds N CatanEnv games and steps
+them all with one call, so a policy can choose actions for every game in a
+single batch. Observations, rewards, done flags and action masks come back
+as arrays stacked over the games, and games that finish are reset straight
+away.
+
+Games can be stepped in this process, or split between worker processes
+that write their results into shared memory, so the arrays are never
+pickled between processes.
+"""
+
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import random
+
+from .env import CatanEnv, NUMPY_AVAILABLE, np
+from .batch import game_seed
+
+
+# Backends a VectorCatanEnv can step its games with
+BACKENDS = ('inprocess', 'subprocess')
+
+
+class VectorCatanEnv:
+    """
+    Steps N CatanEnv games in lockstep.
+
+    step() takes one action per game and returns stacked arrays:
+    observations (N, observation_size), rewards, terminated and truncated
+    flags (N,), and an info dict with the action masks (N, actions), the
+    player whose decision it is in each game, and, for games that finished
+    on this step, their final observations and winners (-1 for none).
+
+    A game that finishes is reset in the same step, so the observation and
+    mask returned for it are the first ones of its next game. Game k of
+    env i is seeded with game_seed(seed, i + N * k), so a seeded
+    VectorCatanEnv plays the same games whichever backend it uses.
+
+    With the 'subprocess' backend the games are split between worker
+    processes, which read the actions from and write their results to
+    shared memory. Any opponent policy must then be picklable.
+    """
+
+    def __init__(self, num_envs: int, backend: str = 'inprocess', workers: Optional[int] = None,
+                 copy: bool = True, **env_kwargs):
+        """
+        Initialize a VectorCatanEnv.
+
+        Args:
+            num_envs: Number of games
+            backend: 'inprocess' or 'subprocess'
+            workers: Number of worker processes for the subprocess backend,
+                     defaults to the number of CPUs (at most num_envs)
+            copy: Whether to return copies of the arrays. Without copies the
+                  returned arrays are overwritten by the next step.
+            **env_kwargs: Arguments for each CatanEnv
+
+        Raises:
+            ImportError: If NumPy is not installed
+            ValueError: If the backend is unknown
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for VectorCatanEnv. Install with: pip install numpy")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+
+        self.num_envs = num_envs
+        self.backend = backend
+        self.copy = copy
+        self.env_kwargs = env_kwargs
+
+        # A single env gives the sizes of the arrays
+        env = CatanEnv(**env_kwargs)
+        self.action_space = env.action_space
+        self.observation_size = env.observation_size
+        specs = _array_specs(num_envs, self.observation_size, self.action_space.n)
+
+        self._closed = False
+        self._workers = []
+        self._memory: List[SharedMemory] = []
+        if backend == 'inprocess':
+            self._arrays = {name: np.zeros(shape, dtype) for name, shape, dtype in specs}
+            self._group = _EnvGroup(0, num_envs, num_envs, env_kwargs, self._arrays)
+            return
+
+        self._group = None
+        self._arrays = {}
+        for name, shape, dtype in specs:
+            memory = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+            self._memory.append(memory)
+            self._arrays[name] = np.ndarray(shape, dtype, buffer=memory.buf)
+        layout = [(name, memory.name, shape, dtype) for (name, shape, dtype), memory in zip(specs, self._memory)]
+
+        workers = min(num_envs, workers or os.cpu_count() or 1)
+        context = get_context()
+        bounds = [num_envs * w // workers for w in range(workers + 1)]
+        for w in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(child, layout, bounds[w], bounds[w + 1], num_envs, env_kwargs),
+                daemon=True
+            )
+            process.start()
+            child.close()
+            self._workers.append((process, parent))
+        self._call('ready', None)
+
+    def reset(self, seed: Optional[int] = None,
+              options: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Start a new game in every env.
+
+        Args:
+            seed: Seed for the games; random if not given
+            options: Unused, for Gymnasium compatibility
+
+        Returns:
+            Tuple: Stacked first observations and the info dict
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self._arrays['final_observation'][:] = 0
+        self._arrays['winner'][:] = -1
+        self._call('reset', seed)
+        return self._result('observation'), self._info()
+
+    def step(self, actions: Any) -> Tuple[Any, Any, Any, Any, Dict[str, Any]]:
+        """
+        Make one move in every game.
+
+        Args:
+            actions: One legal action number per game
+
+        Returns:
+            Tuple: Stacked (observations, rewards, terminated, truncated, info)
+
+        Raises:
+            ValueError: If an action is not legal in its game
+        """
+        self._arrays['action'][:] = actions
+        self._call('step', None)
+        return (self._result('observation'), self._result('reward'), self._result('terminated'),
+                self._result('truncated'), self._info())
+
+    def action_masks(self) -> Any:
+        """Get the stacked boolean masks of each game's legal actions."""
+        return self._result('action_mask')
+
+    def close(self) -> None:
+        """Stop the worker processes and free the shared memory."""
+        if self._closed:
+            return
+        self._closed = True
+        for process, conn in self._workers:
+            try:
+                conn.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process, conn in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self._workers = []
+        self._arrays = {}
+        for memory in self._memory:
+            try:
+                memory.close()
+            except BufferError:
+                # arrays returned with copy=False still use the block
+                pass
+            memory.unlink()
+        self._memory = []
+
+    def __enter__(self) -> 'VectorCatanEnv':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    # ===== HELPERS =====
+
+    def _call(self, command: str, argument: Any) -> None:
+        """Run a command on every game, in this process or in the workers."""
+        if self._closed:
+            raise RuntimeError("VectorCatanEnv is closed")
+        if self._group is not None:
+            self._group.run(command, argument)
+            return
+
+        for process, conn in self._workers:
+            conn.send((command, argument))
+        error = None
+        for process, conn in self._workers:
+            result = conn.recv()
+            if result is not None and error is None:
+                error = result
+        if error is not None:
+            raise error
+
+    def _result(self, name: str) -> Any:
+        """Get one of the stacked arrays."""
+        array = self._arrays[name]
+        return array.copy() if self.copy else array
+
+    def _info(self) -> Dict[str, Any]:
+        """Build the info dict for the current step."""
+        return {
+            'action_mask': self._result('action_mask'),
+            'player': self._result('player'),
+            'final_observation': self._result('final_observation'),
+            'winner': self._result('winner'),
+        }
+
+
+class _EnvGroup:
+    """A contiguous range of a VectorCatanEnv's games, writing into its arrays."""
+
+    def __init__(self, start: int, stop: int, num_envs: int, env_kwargs: Dict[str, Any],
+                 arrays: Dict[str, Any]):
+        self.rows = range(start, stop)
+        self.num_envs = num_envs
+        self.arrays = arrays
+        # each env encodes its observations straight into its row
+        self.envs = [CatanEnv(observation_buffer=arrays['observation'][row], **env_kwargs)
+                     for row in self.rows]
+        self.episodes = [0] * len(self.envs)
+        self.seed = 0
+
+    def reset(self, seed: int) -> None:
+        """Start a new game in every env of the group."""
+        self.seed = seed
+        self.episodes = [0] * len(self.envs)
+        for i in range(len(self.envs)):
+            self._reset(i)
+
+    def run(self, command: str, argument: Any) -> None:
+        """Run a command sent by the VectorCatanEnv."""
+        if command == 'reset':
+            self.reset(argument)
+        elif command == 'step':
+            self.step()
+
+    def step(self) -> None:
+        """Make each env's action, resetting the envs whose games finish."""
+        arrays = self.arrays
+        actions = arrays['action']
+        arrays['winner'][self.rows.start:self.rows.stop] = -1
+
+        for i, env in enumerate(self.envs):
+            row = self.rows[i]
+            observation, reward, terminated, truncated, info = env.step(actions[row])
+            arrays['reward'][row] = reward
+            arrays['terminated'][row] = terminated
+            arrays['truncated'][row] = truncated
+            if terminated or truncated:
+                arrays['final_observation'][row] = observation
+                arrays['winner'][row] = -1 if info['winner'] is None else info['winner']
+                self.episodes[i] += 1
+                self._reset(i)
+            else:
+                arrays['action_mask'][row] = info['action_mask']
+                arrays['player'][row] = info['player']
+
+    def _reset(self, i: int) -> None:
+        """Start env i's next game."""
+        row = self.rows[i]
+        _, info = self.envs[i].reset(seed=game_seed(self.seed, row + self.num_envs * self.episodes[i]))
+        self.arrays['action_mask'][row] = info['action_mask']
+        self.arrays['player'][row] = info['player']
+
+
+def _array_specs(num_envs: int, observation_size: int, num_actions: int) -> List[Tuple[str, tuple, Any]]:
+    """Get the name, shape and dtype of each stacked array."""
+    return [
+        ('observation', (num_envs, observation_size), np.float32),
+        ('final_observation', (num_envs, observation_size), np.float32),
+        ('action_mask', (num_envs, num_actions), np.bool_),
+        ('reward', (num_envs,), np.float32),
+        ('terminated', (num_envs,), np.bool_),
+        ('truncated', (num_envs,), np.bool_),
+        ('player', (num_envs,), np.int64),
+        ('winner', (num_envs,), np.int64),
+        ('action', (num_envs,), np.int64),
+    ]
+
+
+def _attach(name: str) -> SharedMemory:
+    """Open a shared memory block made by the parent process, which frees it."""
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 the block is tracked again, but workers share
+        # the parent's resource tracker, so it is still only freed once
+        return SharedMemory(name=name)
+
+
+def _worker(conn, layout: List[Tuple[str, str, tuple, Any]], start: int, stop: int,
+            num_envs: int, env_kwargs: Dict[str, Any]) -> None:
+    """Run commands from a VectorCatanEnv on a range of its games."""
+    memory = [_attach(block) for _, block, _, _ in layout]
+    arrays = {name: np.ndarray(shape, dtype, buffer=m.buf)
+              for (name, _, shape, dtype), m in zip(layout, memory)}
+    group = _EnvGroup(start, stop, num_envs, env_kwargs, arrays)
+
+    try:
+        while True:
+            command, argument = conn.recv()
+            if command == 'close':
+                break
+            try:
+                group.run(command, argument)
+                conn.send(None)
+            except Exception as e:
+                conn.send(e)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del arrays, group
+        for m in memory:
+            m.close()
+        conn.close()
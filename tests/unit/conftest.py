@@ -0,0 +1,44 @@
+"""
+Shared fixtures for the unit tests.
+
+Provides GameManagers played by quick MCTSUsers, and a way to let them
+play whole turns, for tests of sessions that need a game in progress.
+"""
+
+import pytest
+
+from pycatan.players import MCTSUser
+from pycatan.management import GameManager
+
+
+def _make_manager(seed, num_players=3):
+    """Create a started GameManager played by quick MCTSUsers."""
+    users = [MCTSUser(f"AI {i}", i, iterations=2, time_limit=None, seed=i) for i in range(num_players)]
+    manager = GameManager(users, random_seed=seed)
+    for user in users:
+        user.attach(manager)
+    manager.start_game()
+    return manager
+
+
+def _play_turns(manager, turns):
+    """Let the users play a number of turns."""
+    for _ in range(turns):
+        for _ in range(100):
+            if manager._handle_single_turn():
+                manager._advance_to_next_player()
+                break
+        else:
+            raise AssertionError("The turn did not end")
+
+
+@pytest.fixture
+def make_manager():
+    """Get a function making started GameManagers played by quick MCTSUsers, from a seed."""
+    return _make_manager
+
+
+@pytest.fixture
+def play_turns():
+    """Get a function letting a GameManager's users play a number of turns."""
+    return _play_turns
@@ -0,0 +1,180 @@
+"""
+Unit tests for pycatan.management.action_journal and replay modules.
+
+Tests that a GameManager journals every action it executes with the dice,
+steals and draws that came with it, and that a ReplayEngine rebuilds the
+exact game from the journal, checking its hash after every action.
+"""
+
+import copy
+import json
+
+import pytest
+
+from pycatan.management import (
+    Action, ActionJournal, ActionType, ReplayEngine, read_journal,
+)
+
+
+@pytest.fixture
+def journaled_game(make_manager, play_turns):
+    """Get a function playing a game, journaling it after the first skip turns."""
+    def play(path, seed, turns=40, skip=0):
+        manager = make_manager(seed)
+        play_turns(manager, skip)
+        manager.start_journal(str(path))
+        play_turns(manager, turns)
+        manager.stop_journal()
+        return manager
+    return play
+
+
+class TestActionJournal:
+    """Test writing and reading journals."""
+
+    def test_records_actions_and_outcomes(self, tmp_path, journaled_game):
+        """Test that the journal holds each action with its random outcomes."""
+        path = tmp_path / "game.jsonl"
+        manager = journaled_game(path, seed=1)
+        header, records = read_journal(str(path))
+
+        assert header['game_id'] == manager.game_id
+        assert header['seed'] == 1 and header['num_players'] == 3
+        assert [r.seq for r in records] == list(range(len(records)))
+        assert records[0].action_type == ActionType.PLACE_STARTING_SETTLEMENT.name
+        rolls = [r for r in records if r.action_type == ActionType.ROLL_DICE.name]
+        assert rolls and all(r.outcomes[0][0] == 'dice' and len(r.outcomes[0]) == 3 for r in rolls)
+
+    def test_failed_actions_are_not_journaled(self, tmp_path, make_manager):
+        """Test that only actions that succeed are appended."""
+        path = tmp_path / "game.jsonl"
+        manager = make_manager(2)
+        manager.start_journal(str(path))
+        result = manager.execute_action(Action(ActionType.BUILD_CITY, 0, {'point_coords': [0, 0]}))
+        manager.stop_journal()
+
+        assert not result.success
+        assert read_journal(str(path))[1] == []
+
+    def test_actions_are_written_as_appended(self, tmp_path, make_manager):
+        """Test that changing an action after appending it does not change the record."""
+        path = tmp_path / "game.jsonl"
+        manager = make_manager(3)
+        with ActionJournal(str(path), manager.get_full_state()) as journal:
+            action = Action(ActionType.END_TURN, 0, {'note': 1})
+            journal.append(action, 'NORMAL_PLAY')
+            action.parameters['note'] = 2
+            journal.flush()
+            assert read_journal(str(path))[1][0].parameters == {'note': 1}
+        with pytest.raises(ValueError):
+            journal.append(action)
+
+    def test_cut_short_and_invalid_files(self, tmp_path, journaled_game):
+        """Test that a half written last line is ignored and other files are rejected."""
+        path = tmp_path / "game.jsonl"
+        journaled_game(path, seed=4, turns=10)
+        text = path.read_text()
+        path.write_text(text[:-10])
+        assert len(read_journal(str(path))[1]) == text.count('\n') - 2
+
+        other = tmp_path / "other.jsonl"
+        other.write_text(json.dumps({'not': 'a journal'}) + '\n')
+        with pytest.raises(ValueError):
+            read_journal(str(other))
+
+
+class TestReplayEngine:
+    """Test rebuilding games from journals."""
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_replay_matches_played_game(self, tmp_path, seed, journaled_game):
+        """Test that the rebuilt game is the game that was played."""
+        path = tmp_path / "game.jsonl"
+        manager = journaled_game(path, seed=seed)
+
+        game = ReplayEngine().replay(str(path))
+        assert game.get_hash() == manager.game.get_hash()
+        assert game.get_full_state() == manager.game.get_full_state()
+
+    def test_journal_started_mid_game(self, tmp_path, journaled_game):
+        """Test replaying a journal that starts part way through a game."""
+        path = tmp_path / "game.jsonl"
+        manager = journaled_game(path, seed=5, turns=20, skip=15)
+
+        game = ReplayEngine().replay(str(path))
+        # the starting game is rebuilt from a state, which lists roads in another order
+        assert game.get_hash() == manager.game.get_hash()
+        assert game.get_full_state().players_state == manager.game.get_full_state().players_state
+
+    def test_until_and_many(self, tmp_path, journaled_game):
+        """Test replaying part of a journal and replaying many journals."""
+        paths = [tmp_path / f"game{i}.jsonl" for i in range(2)]
+        managers = [journaled_game(path, seed=6 + i, turns=10) for i, path in enumerate(paths)]
+        engine = ReplayEngine()
+
+        games = list(engine.replay_many(str(p) for p in paths))
+        assert [g.get_hash() for g in games] == [m.game.get_hash() for m in managers]
+
+        header, records = read_journal(str(paths[0]))
+        partial = engine.replay(str(paths[0]), until=5)
+        assert partial.get_hash() == engine.replay_records(header, records[:5]).get_hash()
+        assert partial.get_hash() != games[0].get_hash()
+
+    def test_impossible_action_raises(self, tmp_path, journaled_game):
+        """Test that a journal that does not fit its game is rejected."""
+        path = tmp_path / "game.jsonl"
+        journaled_game(path, seed=8, turns=5)
+        header, records = read_journal(str(path))
+        # the second player settles where the first already has
+        records[2].parameters['point_coords'] = records[0].parameters['point_coords']
+
+        with pytest.raises(ValueError):
+            ReplayEngine().replay_records(header, records)
+
+
+class TestReplayVerification:
+    """Test checking replays against the hashes in journals."""
+
+    def test_matching_replay_verifies(self, tmp_path, journaled_game):
+        """Test that a replay of an untouched journal checks out at every step."""
+        path = tmp_path / "game.jsonl"
+        manager = journaled_game(path, seed=9)
+        header, records = read_journal(str(path))
+
+        assert header['state_hash'] is not None
+        assert records[-1].state_hash == manager.game.get_hash()
+        result = ReplayEngine().verify(str(path))
+        assert result.ok and result.steps == len(records)
+
+    def test_reports_first_divergence(self, tmp_path, journaled_game):
+        """Test that a changed action is reported at its own record."""
+        path = tmp_path / "game.jsonl"
+        journaled_game(path, seed=10, turns=10)
+        header, records = read_journal(str(path))
+        # the first settlement goes somewhere else on the empty board
+        coords = records[0].parameters['point_coords']
+        records[0].parameters['point_coords'] = [2, 0] if coords != [2, 0] else [3, 0]
+
+        result = ReplayEngine().verify_records(header, records)
+        assert not result.ok and result.steps == 1
+        assert result.divergence.seq == 0
+        assert result.divergence.actual_hash not in (None, records[0].state_hash)
+
+    def test_reports_failed_action_and_changed_hash(self, tmp_path, journaled_game):
+        """Test divergences from an action that cannot be made and from a wrong hash."""
+        path = tmp_path / "game.jsonl"
+        journaled_game(path, seed=11, turns=10)
+        header, records = read_journal(str(path))
+        engine = ReplayEngine()
+
+        failing = copy.deepcopy(records)
+        failing[2].parameters['point_coords'] = failing[0].parameters['point_coords']
+        divergence = engine.verify_records(header, failing).divergence
+        assert (divergence.seq, divergence.actual_hash) == (2, None)
+
+        records[7].state_hash ^= 1
+        divergence = engine.verify_records(header, records).divergence
+        assert divergence.seq == 7 and divergence.action_type == records[7].action_type
+
+        header['state_hash'] ^= 1
+        assert engine.verify_records(header, records).divergence.seq is None
@@ -4,6 +4,8 @@ from pycatan.core.statuses import Statuses
 from pycatan.core.card import ResCard
 from pycatan.core.tile_type import TileType
 from pycatan.core.tile import Tile
+from pycatan.core.building import Building
+from pycatan.sim import SimulationEngine, random_policy
 
 import random
 
@@ -38,3 +40,74 @@ class TestBoard:
         # Ensure the robber prevented the player from getting the card
         assert not game.players[0].has_cards([ResCard.Brick])
 
+    def test_yield_index_follows_buildings(self):
+        game = Game(rng=1)
+        board = game.board
+        point = board.points[2][4]
+        # Find a resource tile next to the point
+        tile = next(t for t in point.tiles if t.token_num)
+        card = Board.get_card_from_tile(tile.type)
+        board.robber = None
+        game.add_settlement(0, point, True)
+        # A settlement gets one card
+        distribution = board.add_yield(tile.token_num)
+        assert distribution["Player 1"].count(card.name) >= 1
+        count = game.players[0].cards.count(card)
+        # A city gets two cards
+        game.players[0].add_cards([ResCard.Wheat] * 2 + [ResCard.Ore] * 3)
+        assert game.add_city(point, 0) == Statuses.ALL_GOOD
+        before = game.players[0].cards.count(card)
+        board.add_yield(tile.token_num)
+        assert game.players[0].cards.count(card) - before == 2 * count
+        # The robber blocks the tile
+        board.move_robber(tile.position)
+        before = len(game.players[0].cards)
+        board.add_yield(tile.token_num)
+        shared = [t for t in point.tiles if t.token_num == tile.token_num and t is not tile]
+        assert len(game.players[0].cards) - before == 2 * len(shared)
+    def test_road_index(self):
+        game = Game()
+        board = game.board
+        row = board.points[0]
+        game.add_settlement(0, row[0], True)
+        game.add_road(0, row[0], row[1], True)
+        game.add_road(0, row[1], row[2], True)
+        # Roads are indexed by both of their points and by their owner
+        assert len(board.get_roads_at(row[1])) == 2
+        assert len(board.get_roads_at(row[0])) == 1
+        assert board.get_roads_at(row[3]) == []
+        assert board.get_player_roads(0) == board.roads
+        assert board.get_player_roads(1) == []
+        assert board.get_road(row[2], row[1]) is board.roads[1]
+        assert board.get_road(row[0], row[2]) == None
+    def test_road_cannot_extend_other_players_road(self):
+        game = Game()
+        row = game.board.points[0]
+        game.add_settlement(0, row[0], True)
+        game.add_road(0, row[0], row[1], True)
+        # Player 1 has nothing connected to this road
+        assert game.add_road(1, row[1], row[2], True) == Statuses.ERR_ISOLATED
+        # Building the same road twice is blocked
+        assert game.add_road(0, row[1], row[0], True) == Statuses.ERR_BLOCKED
+    def test_occupancy_masks_follow_buildings(self):
+        engine = SimulationEngine([random_policy] * 3, max_turns=40)
+        engine.play_game(seed=4)
+        board = engine.game.board
+        points = [p for row in board.points for p in row]
+        # The masks match the buildings on each point
+        for owner in range(3):
+            settlements = {i for i, p in enumerate(points) if p.building and p.building.owner == owner and p.building.type == Building.BUILDING_SETTLEMENT}
+            cities = {i for i, p in enumerate(points) if p.building and p.building.owner == owner and p.building.type == Building.BUILDING_CITY}
+            assert {i for i in range(54) if board.settlement_masks.get(owner, 0) >> i & 1} == settlements
+            assert {i for i in range(54) if board.city_masks.get(owner, 0) >> i & 1} == cities
+            assert bin(board.road_masks.get(owner, 0)).count("1") == len(board.get_player_roads(owner))
+        assert bin(board.occupied_mask).count("1") == len([p for p in points if p.building])
+        assert bin(board.road_mask).count("1") == len(board.roads)
+    def test_players_on_tile(self):
+        game = Game()
+        board = game.board
+        point = board.points[0][0]
+        game.add_settlement(1, point, True)
+        tile = point.tiles[0]
+        assert board.get_players_on_tile(tile) == [1]
+        assert board.get_players_on_tile(board.tiles[2][2]) == []
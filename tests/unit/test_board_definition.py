@@ -0,0 +1,77 @@
+"""
+Unit tests for pycatan.config.board_definition module.
+
+Tests the coordinate lookups and their batch variants, and that the
+hardcoded fallback layout matches the one loaded from file.
+"""
+
+from pycatan.config.board_definition import BoardDefinition, board_definition
+
+
+class HardcodedBoardDefinition(BoardDefinition):
+    """A BoardDefinition built without the JSON file."""
+
+    def _load_from_file(self, filename=None):
+        return False
+
+
+class TestBoardDefinitionLookups:
+    """Test converting between ids and coordinates."""
+
+    def test_point_round_trip(self):
+        """Test that every point's coordinates map back to its id."""
+        for point_id in board_definition.get_all_point_ids():
+            coords = board_definition.point_id_to_game_coords(point_id)
+            assert board_definition.game_coords_to_point_id(*coords) == point_id
+
+    def test_hex_round_trip(self):
+        """Test that every hex's coordinates map back to its id."""
+        for hex_id in board_definition.get_all_hex_ids():
+            coords = board_definition.hex_id_to_game_coords(hex_id)
+            assert board_definition.game_coords_to_hex_id(*coords) == hex_id
+
+    def test_unknown_ids_and_coords(self):
+        """Test that unknown ids and coordinates give None or nothing."""
+        assert board_definition.point_id_to_game_coords(0) is None
+        assert board_definition.point_id_to_game_coords(55) is None
+        assert board_definition.game_coords_to_point_id(9, 9) is None
+        assert board_definition.game_coords_to_hex_id(-1, 0) is None
+        assert board_definition.get_adjacent_point_ids(99) == []
+        assert board_definition.get_hex_border_points(99) == []
+        assert not board_definition.is_valid_road_placement(99, 1)
+
+    def test_returned_lists_are_copies(self):
+        """Test that changing a returned list does not change the definition."""
+        board_definition.get_adjacent_point_ids(1).append(54)
+        board_definition.get_all_point_ids().clear()
+
+        assert 54 not in board_definition.get_adjacent_point_ids(1)
+        assert len(board_definition.get_all_point_ids()) == 54
+
+    def test_road_placement(self):
+        """Test that roads can only join adjacent points."""
+        for neighbour in board_definition.get_adjacent_point_ids(10):
+            assert board_definition.is_valid_road_placement(10, neighbour)
+        assert not board_definition.is_valid_road_placement(10, 10)
+        assert not board_definition.is_valid_road_placement(1, 54)
+
+    def test_batch_conversions(self):
+        """Test converting whole lists at once."""
+        assert board_definition.game_coords_to_point_ids([[0, 0], (5, 6), (9, 9)]) == [1, 54, None]
+        assert board_definition.point_ids_to_game_coords([1, 54, 0]) == [(0, 0), (5, 6), None]
+        assert board_definition.game_coords_to_hex_ids([(0, 0), [4, 2]]) == [1, 19]
+        assert board_definition.hex_ids_to_game_coords([19, 20]) == [(4, 2), None]
+
+    def test_hardcoded_layout_matches_file(self, capsys):
+        """Test that the fallback layout has the same adjacencies as the file."""
+        hardcoded = HardcodedBoardDefinition()
+
+        for point_id in board_definition.get_all_point_ids():
+            assert hardcoded.point_id_to_game_coords(point_id) == board_definition.point_id_to_game_coords(point_id)
+            assert sorted(hardcoded.get_adjacent_point_ids(point_id)) == \
+                sorted(board_definition.get_adjacent_point_ids(point_id))
+            assert sorted(hardcoded.get_adjacent_hex_ids(point_id)) == \
+                sorted(board_definition.get_adjacent_hex_ids(point_id))
+        for hex_id in board_definition.get_all_hex_ids():
+            assert sorted(hardcoded.get_hex_border_points(hex_id)) == \
+                sorted(board_definition.get_hex_border_points(hex_id))
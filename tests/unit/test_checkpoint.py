@@ -0,0 +1,119 @@
+"""
+Unit tests for GameManager.checkpoint and GameManager.restore.
+
+Tests that a restored session has the saved game, random streams and turn
+state, and plays on exactly as the saved session would.
+"""
+
+import pytest
+
+from pycatan.core.game import Game
+from pycatan.management import Checkpoint, GamePhase, TurnPhase
+
+
+@pytest.fixture
+def restored(make_manager):
+    """Get a function restoring a checkpoint into a new GameManager."""
+    def restore(path, seed=99, num_players=3):
+        manager = make_manager(seed, num_players)
+        manager.restore(str(path))
+        return manager
+    return restore
+
+
+class TestCheckpoint:
+    """Test saving and restoring sessions."""
+
+    def test_restores_game_and_streams(self, tmp_path, make_manager, play_turns, restored):
+        """Test that the game, deck and random streams are restored."""
+        path = tmp_path / "game.pck"
+        saved = make_manager(1)
+        play_turns(saved, 25)
+        saved.checkpoint(str(path))
+        manager = restored(path)
+
+        assert manager.game.get_hash() == saved.game.get_hash()
+        assert manager.game.dev_deck == saved.game.dev_deck
+        assert manager.game.rng.getstate() == saved.game.rng.getstate()
+        assert manager.game_id == saved.game_id
+        before, after = saved.get_full_state(), manager.get_full_state()
+        assert after.players_state == before.players_state
+        assert after.board_state.buildings == before.board_state.buildings
+        assert (after.turn_number, after.current_player, after.game_phase) == \
+               (before.turn_number, before.current_player, before.game_phase)
+
+    def test_restores_setup_and_discard_state(self, tmp_path, make_manager, restored):
+        """Test the setup progress and the discard and robber state part way through a turn."""
+        path = tmp_path / "game.pck"
+        saved = make_manager(2)
+        saved._handle_single_turn()
+        assert saved._setup_turn_progress == {'settlement': True, 'road': False}
+        saved.checkpoint(str(path))
+        assert restored(path)._setup_turn_progress == {'settlement': True, 'road': False}
+
+        current = saved._current_game_state
+        current.game_phase = GamePhase.NORMAL_PLAY
+        current.turn_phase = TurnPhase.DISCARD_PHASE
+        current.dice_rolled = (3, 4)
+        current.players_must_discard = {0: 4, 2: 5}
+        current.robber_moved = True
+        current.steal_pending = True
+        saved.checkpoint(str(path))
+        restored_state = restored(path)._current_game_state
+
+        for name in ('game_phase', 'turn_phase', 'dice_rolled', 'players_must_discard',
+                     'robber_moved', 'steal_pending'):
+            assert getattr(restored_state, name) == getattr(current, name)
+
+    def test_unseeded_session_rolls_the_same(self, tmp_path, make_manager, play_turns, restored):
+        """Test that an unseeded session checkpointed mid-turn rolls and steals as the saved one."""
+        path = tmp_path / "game.pck"
+        saved = make_manager(None)
+        play_turns(saved, 7)
+        saved._handle_single_turn()
+        assert saved._current_game_state.dice_rolled is not None
+        saved.checkpoint(str(path))
+        manager = restored(path)
+
+        def draws(game):
+            return [game.rng.roll_dice() for _ in range(300)] + [game.rng.steal.random() for _ in range(5)]
+
+        assert draws(manager.game) == draws(saved.game)
+
+    def test_shared_streams_cannot_be_saved(self, tmp_path, make_manager):
+        """Test that a game using the random module's streams is refused rather than saved wrongly."""
+        saved = make_manager(1)
+        saved.game = Game(num_of_players=3)
+        with pytest.raises(ValueError):
+            saved.checkpoint(str(tmp_path / "game.pck"))
+
+    def test_continuations_are_identical(self, tmp_path, make_manager, play_turns, restored):
+        """Test that sessions restored from one checkpoint play on the same way."""
+        path = tmp_path / "game.pck"
+        saved = make_manager(3)
+        play_turns(saved, 20)
+        saved.checkpoint(str(path))
+
+        first, second = restored(path, seed=4), restored(path, seed=5)
+        play_turns(first, 20)
+        play_turns(second, 20)
+        assert first.game.get_hash() == second.game.get_hash()
+        assert first.get_full_state() == second.get_full_state()
+
+    def test_compact_and_rejects_other_files(self, tmp_path, make_manager, play_turns, restored):
+        """Test the checkpoint's size, and that other files and player counts are rejected."""
+        path = tmp_path / "game.pck"
+        saved = make_manager(6)
+        play_turns(saved, 10)
+        saved.checkpoint(str(path))
+
+        # mostly the random streams' states
+        assert len(path.read_bytes()) < 16 * 1024
+        assert Checkpoint.from_bytes(path.read_bytes()).to_bytes() == path.read_bytes()
+        with pytest.raises(ValueError):
+            restored(path, num_players=2)
+
+        other = tmp_path / "other.pck"
+        other.write_bytes(b'not a checkpoint')
+        with pytest.raises(ValueError):
+            restored(other)
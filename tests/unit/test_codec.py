@@ -0,0 +1,109 @@
+"""
+Unit tests for pycatan.sim.codec module.
+
+Tests that game states and moves survive an encode and decode exactly,
+that streams of states share unchanged parts, and that encodings of the
+wrong kind or version are rejected.
+"""
+
+import json
+import random
+from dataclasses import asdict, replace
+
+import pytest
+
+from pycatan.core.move import Move, MoveType
+from pycatan.management import GamePhase, TurnPhase
+from pycatan.sim import SimulationEngine, random_policy
+from pycatan.sim.codec import (
+    FORMAT_VERSION, StateDecoder, StateEncoder, decode_moves, decode_state,
+    encode_moves, encode_state,
+)
+
+
+def recorded_states(seed, turns=60):
+    """Play a random game and return the state after every move."""
+    engine = SimulationEngine([random_policy] * 4, max_turns=turns, record_states=True)
+    return engine.play_game(seed=seed).states
+
+
+class TestStateCodec:
+    """Test encoding and decoding GameStates."""
+
+    def test_single_state_round_trip(self):
+        """Test that a state decodes to an equal state."""
+        state = recorded_states(1)[-1]
+        assert decode_state(encode_state(state)) == state
+
+    def test_manager_fields_round_trip(self):
+        """Test the fields a GameManager fills in."""
+        state = replace(recorded_states(2)[-1], game_id='game-7', turn_number=300, current_player=3,
+                        game_phase=GamePhase.NORMAL_PLAY, turn_phase=TurnPhase.DISCARD_PHASE,
+                        dice_rolled=(6, 1), players_must_discard={0: 4, 2: 5}, robber_moved=True,
+                        pending_actions=['discard'], pending_trades=[{'from': 1, 'offer': {'ore': 2}}],
+                        dev_cards_available=11)
+        assert decode_state(encode_state(state)) == state
+
+    def test_stream_round_trip_shares_parts(self):
+        """Test that a stream decodes exactly and unchanged parts are the same objects."""
+        states = recorded_states(3)
+        encoder, decoder = StateEncoder(), StateDecoder()
+        decoded = [decoder.decode(encoder.encode(s)) for s in states]
+
+        assert decoded == states
+        for before, after, a, b in zip(states, states[1:], decoded, decoded[1:]):
+            if after.board_state == before.board_state:
+                assert b.board_state is a.board_state
+            for i, player in enumerate(after.players_state):
+                if player == before.players_state[i]:
+                    assert b.players_state[i] is a.players_state[i]
+
+    def test_stream_matches_single_encoding(self):
+        """Test that reusing parts gives the same bytes as encoding each state alone."""
+        states = recorded_states(4)
+        encoder = StateEncoder()
+        assert [encoder.encode(s) for s in states] == [encode_state(s) for s in states]
+
+    def test_much_smaller_than_json(self):
+        """Test that a state is a small fraction of its JSON size."""
+        state = recorded_states(5)[-1]
+        assert len(encode_state(state)) * 10 < len(json.dumps(asdict(state), default=str))
+
+    def test_wrong_kind_or_version(self):
+        """Test that other encodings and versions are rejected."""
+        data = encode_state(recorded_states(6, turns=5)[-1])
+        with pytest.raises(ValueError):
+            decode_moves(data)
+        with pytest.raises(ValueError):
+            decode_state(data[:3] + bytes([FORMAT_VERSION + 1]) + data[4:])
+
+
+class TestMoveCodec:
+    """Test encoding and decoding Moves."""
+
+    def test_offered_moves_round_trip(self):
+        """Test every move offered during random games."""
+        offered = []
+
+        def recording_policy(game, player, moves):
+            offered.extend(moves)
+            return random.Random(len(offered)).choice(moves)
+
+        for seed in range(3):
+            engine = SimulationEngine([recording_policy] * 4, max_turns=60)
+            engine.play_game(seed=seed)
+
+        assert {m.type for m in offered} >= {MoveType.BUILD_ROAD, MoveType.ROBBER_MOVE, MoveType.END_TURN}
+        assert decode_moves(encode_moves(offered)) == offered
+
+    def test_compact(self):
+        """Test that a move is one byte plus one per argument."""
+        moves = [Move(MoveType.ROLL_DICE, 2), Move(MoveType.BUILD_ROAD, 1, (10, 11)),
+                 Move(MoveType.ROBBER_MOVE, 0, (4, None))]
+        assert len(encode_moves(moves)) == 4 + 1 + 1 + 3 + 3
+        assert decode_moves(encode_moves([])) == []
+
+    def test_player_must_fit(self):
+        """Test that players above 7 cannot be encoded."""
+        with pytest.raises(ValueError):
+            encode_moves([Move(MoveType.END_TURN, 8)])
@@ -0,0 +1,137 @@
+"""
+Unit tests for pycatan.sim.env module.
+
+Tests the fixed action space and the Gymnasium-style CatanEnv built on it.
+"""
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pycatan.core.game import Game
+from pycatan.core.card import DevCard, ResCard
+from pycatan.core.move import Move, MoveType
+from pycatan.sim import ActionSpace, CatanEnv, GameFlow, Stage, greedy_policy, random_policy
+
+
+def play(env, seed):
+    """Play a game with random legal actions, returning the last step's results."""
+    rng = random.Random(seed)
+    observation, info = env.reset(seed=seed)
+    while True:
+        action = env.action_space.sample(info['action_mask'], rng)
+        observation, reward, terminated, truncated, info = env.step(action)
+        if terminated or truncated:
+            return observation, reward, terminated, truncated, info
+
+
+class TestActionSpace:
+    """Test numbering moves."""
+
+    def test_legal_moves_have_different_actions(self):
+        """Test that no two legal moves share an action, other than trades at different ratios."""
+        flow = GameFlow(Game(num_of_players=4, rng=1), max_turns=60)
+        space = ActionSpace(flow.game.board.get_topology(), 4)
+        while not flow.is_finished:
+            moves = flow.get_moves()
+            actions = {}
+            for move in moves:
+                i = space.index(move)
+                assert 0 <= i < space.n
+                if i in actions:
+                    assert move.type == actions[i].type == MoveType.TRADE_BANK
+                actions[i] = move
+            flow.apply(random_policy(flow.game, flow.player, moves))
+
+    def test_victims_relative_to_player(self):
+        """Test that victims are numbered from the acting player."""
+        space = ActionSpace(Game(num_of_players=4).board.get_topology(), 4)
+
+        assert space.index(Move(MoveType.ROBBER_MOVE, 2, (5, None))) == space.robber + 5 * 4
+        assert space.index(Move(MoveType.ROBBER_MOVE, 2, (5, 3))) == space.robber + 5 * 4 + 1
+        assert space.index(Move(MoveType.ROBBER_MOVE, 2, (5, 0))) == space.robber + 5 * 4 + 2
+
+    def test_road_building_pairs_unordered(self):
+        """Test that a Road Building card gives the same action in either order."""
+        space = ActionSpace(Game(num_of_players=2).board.get_topology(), 2)
+        first = Move(MoveType.USE_DEV_CARD, 0, (DevCard.Road, 0, 1, 1, 2))
+        second = Move(MoveType.USE_DEV_CARD, 0, (DevCard.Road, 1, 2, 0, 1))
+
+        assert space.index(first) == space.index(second)
+        assert space.road_building <= space.index(first) < space.monopoly
+
+
+class TestCatanEnv:
+    """Test playing games through the environment."""
+
+    def test_reset(self):
+        """Test that a new game starts with a starting settlement to place."""
+        env = CatanEnv(num_players=3)
+        observation, info = env.reset(seed=1)
+
+        assert observation.shape == (env.observation_size,)
+        assert observation.dtype == np.float32
+        assert info['stage'] == Stage.SETUP_SETTLEMENT
+        assert info['action_mask'].sum() == 54
+        assert info['action_mask'][env.action_space.settlement:env.action_space.city].all()
+
+    def test_same_seed_same_game(self):
+        """Test that a seeded game and seeded actions replay exactly."""
+        first = play(CatanEnv(num_players=3, max_turns=50), 3)
+        second = play(CatanEnv(num_players=3, max_turns=50), 3)
+
+        assert np.array_equal(first[0], second[0])
+        assert first[1:4] == second[1:4]
+
+    def test_game_ends(self):
+        """Test that a game ends with a winner or at the turn limit."""
+        env = CatanEnv(num_players=2, victory_points_to_win=4, max_turns=100)
+        observation, reward, terminated, truncated, info = play(env, 2)
+
+        assert terminated != truncated
+        if terminated:
+            assert reward == 1.0
+            assert info['winner'] is not None
+        assert not info['action_mask'].any()
+
+    def test_illegal_action(self):
+        """Test that an illegal action is rejected."""
+        env = CatanEnv(num_players=2)
+        env.reset(seed=1)
+
+        with pytest.raises(ValueError):
+            env.step(env.action_space.end_turn)
+
+    def test_trades_use_best_ratio(self):
+        """Test that a trade action uses the best ratio the player has."""
+        env = CatanEnv(num_players=2)
+        env.reset(seed=4)
+        flow = env.flow
+        while flow.stage != Stage.POST_ROLL:
+            flow.apply(random_policy(flow.game, flow.player, flow.get_moves()))
+        flow.game.players[flow.player].add_cards([ResCard.Wood] * 4)
+        env._play_opponents()
+
+        action = env.action_space.trade + ResCard.Wood.value * 5 + ResCard.Ore.value
+        assert env.action_masks()[action]
+        assert env.move_for(action).args[1] == min(
+            m.args[1] for m in flow.get_moves()
+            if m.type == MoveType.TRADE_BANK and m.args[0] == ResCard.Wood
+        )
+
+    def test_opponent_policy(self):
+        """Test that only the agent's decisions are returned with an opponent policy."""
+        env = CatanEnv(num_players=3, max_turns=50, opponent_policy=greedy_policy, agent=1)
+        rng = random.Random(5)
+        observation, info = env.reset(seed=5)
+        done = False
+        while not done:
+            assert info['player'] == 1
+            observation, reward, terminated, truncated, info = env.step(
+                env.action_space.sample(info['action_mask'], rng))
+            done = terminated or truncated
+
+        if terminated:
+            assert reward == (1.0 if info['winner'] == 1 else -1.0)
@@ -0,0 +1,139 @@
+"""
+Unit tests for pycatan.sim.estimate module.
+
+Tests the Monte Carlo win-probability estimate, and rebuilding games from
+GameState snapshots with Game.from_state so that they can be estimated.
+"""
+
+import pytest
+
+from pycatan.core.game import Game
+from pycatan.sim import GameFlow, Stage, estimate_win_probabilities, random_policy, wilson_interval
+from pycatan.management.game_manager import GameManager
+from pycatan.players import HumanUser
+
+
+def pre_roll_flow(seed, num_players=2):
+    """Play random setup moves until the first turn starts."""
+    flow = GameFlow(Game(num_of_players=num_players, rng=seed))
+    while flow.stage != Stage.PRE_ROLL:
+        flow.apply(random_policy(flow.game, flow.player, flow.get_moves()))
+    return flow
+
+
+class TestWilsonInterval:
+    """Test the confidence interval."""
+
+    def test_contains_proportion(self):
+        """Test that the interval contains the observed proportion."""
+        low, high = wilson_interval(30, 100, 1.96)
+        assert low < 0.3 < high
+        assert high - low == pytest.approx(0.18, abs=0.01)
+
+    def test_bounds(self):
+        """Test that the interval stays within 0 and 1."""
+        assert wilson_interval(0, 10, 1.96)[0] == 0.0
+        assert wilson_interval(10, 10, 1.96)[1] == 1.0
+        assert wilson_interval(0, 0, 1.96) == (0.0, 1.0)
+
+
+class TestEstimateWinProbabilities:
+    """Test estimating win probabilities by playing positions out."""
+
+    def test_counts_every_rollout(self):
+        """Test that every playout is won by someone or left unfinished."""
+        estimate = estimate_win_probabilities(pre_roll_flow(1), rollouts=20, workers=1,
+                                              tolerance=0, batch_size=8, max_turns=40, seed=1)
+
+        assert estimate.rollouts == 20
+        assert sum(estimate.wins) + estimate.unfinished == 20
+        assert not estimate.stopped_early
+        for p, (low, high) in zip(estimate.probabilities, estimate.intervals):
+            assert low <= p <= high
+
+    def test_same_result_for_any_worker_count(self):
+        """Test that a seeded estimate does not depend on the number of workers."""
+        flow = pre_roll_flow(2)
+        serial = estimate_win_probabilities(flow, rollouts=12, workers=1, tolerance=0,
+                                            batch_size=4, seed=5)
+        parallel = estimate_win_probabilities(flow, rollouts=12, workers=2, tolerance=0,
+                                              batch_size=4, seed=5)
+
+        assert serial.wins == parallel.wins
+        assert serial.unfinished == parallel.unfinished
+
+    def test_stops_early(self):
+        """Test that the estimate stops once the intervals are narrow enough."""
+        updates = []
+        estimate = estimate_win_probabilities(pre_roll_flow(3), rollouts=100, workers=1,
+                                              tolerance=0.5, batch_size=5, seed=1,
+                                              progress=updates.append)
+
+        assert estimate.stopped_early
+        assert estimate.rollouts < 100
+        assert estimate.margin <= 0.5
+        assert [u.rollouts for u in updates] == list(range(5, estimate.rollouts + 1, 5))
+
+    def test_unseeded_positions_in_workers(self):
+        """Test that unseeded games and plain GameStates can be played out by worker processes."""
+        for position in (Game(), Game(num_of_players=2).get_full_state()):
+            estimate = estimate_win_probabilities(position, rollouts=4, batch_size=2, workers=2,
+                                                  max_turns=10, seed=2)
+            assert estimate.rollouts == 4
+
+    def test_unfinished_playouts_are_not_counted_as_losses(self):
+        """Test that win rates are out of finished playouts, and that none finishing never stops early."""
+        estimate = estimate_win_probabilities(pre_roll_flow(1), rollouts=20, workers=1,
+                                              tolerance=0, batch_size=10, max_turns=100, seed=1)
+        assert 0 < estimate.unfinished < 20
+        assert sum(estimate.probabilities) == pytest.approx(1.0)
+
+        estimate = estimate_win_probabilities(pre_roll_flow(1), rollouts=20, workers=1,
+                                              tolerance=0.5, batch_size=5, max_turns=0, seed=1)
+        assert estimate.unfinished == estimate.rollouts == 20
+        assert not estimate.stopped_early
+        assert estimate.intervals == [(0.0, 1.0)] * 2
+
+    def test_does_not_change_position(self):
+        """Test that estimating leaves the position alone."""
+        flow = pre_roll_flow(4)
+        game_hash = flow.game.hash
+        estimate_win_probabilities(flow, rollouts=4, workers=1, seed=1)
+
+        assert flow.game.hash == game_hash
+        assert flow.stage == Stage.PRE_ROLL
+
+    def test_from_game_state(self, capsys):
+        """Test estimating from a GameManager's full state."""
+        manager = GameManager([HumanUser("A", 0), HumanUser("B", 1)], random_seed=3)
+        flow = manager.get_game_flow()
+        while flow.stage != Stage.PRE_ROLL:
+            flow.apply(random_policy(flow.game, flow.player, flow.get_moves()))
+        manager.game = flow.game
+
+        estimate = estimate_win_probabilities(manager.get_full_state(), rollouts=6,
+                                              workers=1, tolerance=0, max_turns=40, seed=1)
+
+        assert estimate.rollouts == 6
+        assert len(estimate.probabilities) == 2
+
+
+class TestGameFromState:
+    """Test rebuilding a Game from a GameState."""
+
+    def test_round_trip(self):
+        """Test that a rebuilt game has the same board and players."""
+        flow = pre_roll_flow(5, num_players=3)
+        for _ in range(60):
+            if flow.is_finished:
+                break
+            flow.apply(random_policy(flow.game, flow.player, flow.get_moves()))
+        game = flow.game
+
+        rebuilt = Game.from_state(game.get_full_state())
+
+        assert rebuilt.hash == game.hash
+        assert [p.get_VP(include_dev=True) for p in rebuilt.players] == \
+            [p.get_VP(include_dev=True) for p in game.players]
+        assert [p.longest_road_length for p in rebuilt.players] == \
+            [p.longest_road_length for p in game.players]
@@ -0,0 +1,134 @@
+"""
+Unit tests for pycatan.sim.flow module.
+
+Tests that GameFlow steps games through the turn structure, and that it can
+continue from positions part way through a game.
+"""
+
+from pycatan.core.game import Game
+from pycatan.core.card import ResCard
+from pycatan.core.move import MoveType
+from pycatan.sim import GameFlow, Stage, random_policy
+
+
+def play_until(flow, condition):
+    """Play random moves until the condition holds."""
+    while not condition(flow):
+        flow.apply(random_policy(flow.game, flow.player, flow.get_moves()))
+
+
+class TestGameFlow:
+    """Test stepping through games move by move."""
+
+    def test_setup_order(self):
+        """Test that setup placements go in snake draft order."""
+        flow = GameFlow(Game(num_of_players=3, rng=1))
+        players = []
+        play_until(flow, lambda f: players.append((f.stage, f.player)) or f.stage == Stage.PRE_ROLL)
+
+        settlements = [p for stage, p in players if stage == Stage.SETUP_SETTLEMENT]
+        assert settlements == [0, 1, 2, 2, 1, 0]
+        assert (flow.player, flow.turns) == (0, 1)
+
+    def test_second_settlement_gives_resources(self):
+        """Test that only the second starting settlement gives resources."""
+        flow = GameFlow(Game(num_of_players=2, rng=3))
+        play_until(flow, lambda f: f.setup_index == 2)
+        assert all(len(p.cards) == 0 for p in flow.game.players)
+
+        play_until(flow, lambda f: f.stage == Stage.PRE_ROLL)
+        assert flow.resources_produced == [len(p.cards) for p in flow.game.players]
+        assert sum(flow.resources_produced) > 0
+
+    def test_undo_second_settlement(self):
+        """Test that undoing a second starting settlement takes back its resources."""
+        flow = GameFlow(Game(num_of_players=2, rng=3))
+        play_until(flow, lambda f: f.setup_index == 2)
+        hash_before = flow.game.get_hash()
+        gave_cards = False
+
+        for move in flow.get_moves():
+            fork = flow.fork()
+            game = fork.game
+            token = fork.apply(move, undoable=True)
+            gave_cards |= any(len(p.cards) for p in game.players)
+            game.undo(token)
+            assert game.get_hash() == hash_before, move
+            assert all(len(p.cards) == 0 for p in game.players), move
+        assert gave_cards
+
+    def test_fork_deals_hidden_dev_cards(self):
+        """Test that a fork for one player deals the other players' development cards again."""
+        flow = GameFlow(Game(num_of_players=3, rng=4))
+        play_until(flow, lambda f: f.stage == Stage.PRE_ROLL)
+        game = flow.game
+        for player in game.players:
+            for _ in range(4):
+                player.add_dev_card(game.dev_deck.pop(0))
+        unseen = sorted(c.value for c in game.dev_deck + game.players[1].dev_cards + game.players[2].dev_cards)
+
+        hands = set()
+        for seed in range(10):
+            fork = flow.fork(seed=seed, observer=0).game
+            assert fork.players[0].dev_cards == game.players[0].dev_cards
+            assert [len(p.dev_cards) for p in fork.players] == [4, 4, 4]
+            assert sorted(c.value for c in fork.dev_deck + fork.players[1].dev_cards
+                          + fork.players[2].dev_cards) == unseen
+            assert fork.hash == fork.compute_hash()
+            hands.add(tuple(fork.players[1].dev_cards))
+
+        assert len(hands) > 1
+        assert flow.fork(seed=1).game.players[1].dev_cards == game.players[1].dev_cards
+
+    def test_turns_rotate(self):
+        """Test that ending a turn starts the next player's turn."""
+        flow = GameFlow(Game(num_of_players=3, rng=2))
+        play_until(flow, lambda f: f.stage == Stage.PRE_ROLL)
+
+        for expected in (1, 2, 0):
+            play_until(flow, lambda f: f.stage == Stage.POST_ROLL)
+            flow.apply(next(m for m in flow.get_moves() if m.type == MoveType.END_TURN))
+            assert flow.player == expected
+
+    def test_turn_limit(self):
+        """Test that the flow finishes at the turn limit."""
+        flow = GameFlow(Game(num_of_players=2, rng=4), max_turns=3)
+        play_until(flow, lambda f: f.is_finished)
+
+        assert flow.turns == 3
+        assert flow.winner is None
+        assert flow.get_moves() == []
+
+    def test_winner(self):
+        """Test that reaching the victory points finishes the flow."""
+        flow = GameFlow(Game(num_of_players=2, rng=5), victory_points_to_win=2)
+        play_until(flow, lambda f: f.is_finished)
+
+        assert flow.winner is not None
+        assert flow.game.players[flow.winner].get_VP(include_dev=True) >= 2
+
+    def test_discards_then_robber(self):
+        """Test that queued discards come before the robber move."""
+        flow = GameFlow(Game(num_of_players=3, rng=6))
+        play_until(flow, lambda f: f.stage == Stage.PRE_ROLL)
+        flow.game.players[2].add_cards([ResCard.Ore] * 8)
+        hand_size = len(flow.game.players[2].cards)
+
+        flow.resume(Stage.DISCARD, 0, discards=[2] * 4)
+        assert flow.player == 2
+        for _ in range(4):
+            assert flow.stage == Stage.DISCARD
+            flow.apply(flow.get_moves()[0])
+
+        assert len(flow.game.players[2].cards) == hand_size - 4
+        assert (flow.stage, flow.player) == (Stage.ROBBER, 0)
+
+    def test_fork_is_independent(self):
+        """Test that playing a fork does not change the original."""
+        flow = GameFlow(Game(num_of_players=2, rng=7))
+        play_until(flow, lambda f: f.stage == Stage.PRE_ROLL)
+        fork = flow.fork()
+        play_until(fork, lambda f: f.turns == 4)
+
+        assert (flow.turns, flow.stage) == (1, Stage.PRE_ROLL)
+        assert flow.game.hash != fork.game.hash
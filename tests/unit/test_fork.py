@@ -0,0 +1,75 @@
+"""
+Unit tests for Game.fork.
+
+Tests that a forked game starts equal to the original and is independent of it.
+"""
+
+from pycatan.core.card import ResCard
+from pycatan.core.statuses import Statuses
+from pycatan.core.legal_moves import LegalMoveGenerator
+from pycatan.sim import SimulationEngine, random_policy
+
+
+def played_game(seed=6, turns=40):
+    """Play a short random game and return its Game."""
+    engine = SimulationEngine([random_policy] * 3, max_turns=turns)
+    engine.play_game(seed=seed)
+    return engine.game
+
+
+class TestGameFork:
+    """Test forking a game."""
+
+    def test_fork_has_same_state(self):
+        """Test that a fork starts with the same state as the original."""
+        game = played_game()
+        fork = game.fork()
+
+        assert fork.get_full_state() == game.get_full_state()
+        assert [p.longest_road_length for p in fork.players] == [p.longest_road_length for p in game.players]
+        assert fork.board.occupied_mask == game.board.occupied_mask
+
+    def test_static_board_is_shared(self):
+        """Test that tiles and the topology are shared rather than copied."""
+        game = played_game()
+        fork = game.fork()
+
+        assert fork.board.tiles is game.board.tiles
+        assert fork.board.get_topology() is game.board.get_topology()
+        assert fork.board.points[0][0] is not game.board.points[0][0]
+
+    def test_fork_is_independent(self):
+        """Test that changes to a fork do not affect the original."""
+        game = played_game()
+        before = game.get_full_state()
+        fork = game.fork()
+
+        moves = LegalMoveGenerator(fork)
+        fork.players[0].add_cards([ResCard.Wood, ResCard.Brick] * 3)
+        edge = moves.road_edges(0)[0]
+        assert fork.add_road(0, moves.points[edge[0]], moves.points[edge[1]]) == Statuses.ALL_GOOD
+        fork.board.move_robber([0, 0])
+        fork.dev_deck.clear()
+        fork.get_roll()
+
+        assert game.get_full_state() == before
+        assert len(game.board.roads) == len(fork.board.roads) - 1
+
+    def test_fork_rolls_same_dice(self):
+        """Test that a fork continues the original's random streams."""
+        game = played_game()
+        fork = game.fork()
+
+        assert [fork.get_roll() for _ in range(20)] == [game.get_roll() for _ in range(20)]
+
+    def test_yields_in_fork(self):
+        """Test that upgrading a city in a fork does not change the original's yields."""
+        game = played_game(turns=0)
+        fork = game.fork()
+        point = next(p for row in fork.board.points for p in row if p.building and p.building.owner == 0)
+        fork.players[0].add_cards([ResCard.Wheat] * 2 + [ResCard.Ore] * 3)
+        assert fork.add_city(point, 0) == Statuses.ALL_GOOD
+
+        original_point = game.board.points[point.position[0]][point.position[1]]
+        assert all(entry[3] == 1 for entry in game.board._point_yields[original_point])
+        assert all(entry[3] == 2 for entry in fork.board._point_yields[point])
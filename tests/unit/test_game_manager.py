@@ -4,6 +4,9 @@ Unit tests for pycatan.game_manager module.
 Tests the GameManager class and its basic functionality.
 """
 
+import asyncio
+import threading
+import time
 import pytest
 from unittest.mock import Mock, patch
 import uuid
@@ -127,6 +130,83 @@ class TestGameManagerFlow:
         assert not self.gm.is_paused
 
 
+class TestGameManagerPause:
+    """Test that paused games sleep until resumed, across threads and asyncio."""
+
+    def setup_method(self):
+        """Set up a started GameManager for each test."""
+        self.users = [
+            create_test_user("Alice", 0),
+            create_test_user("Bob", 1)
+        ]
+        self.gm = GameManager(self.users)
+        self.gm.start_game()
+
+    def test_paused_game_loop_sleeps(self):
+        """Test that the game loop does not spin while paused, and wakes when the game ends."""
+        checks = []
+        self.gm._check_game_end_conditions = lambda: checks.append(1) and False
+        self.gm.pause_game()
+
+        loop = threading.Thread(target=self.gm.game_loop)
+        loop.start()
+        time.sleep(0.2)
+
+        assert loop.is_alive()
+        assert len(checks) <= 2
+        assert self.users[0].last_input_call is None
+
+        self.gm.end_game()
+        loop.join(timeout=5)
+        assert not loop.is_alive()
+
+    def test_wait_until_resumed_across_threads(self):
+        """Test waiting in one thread for a resume from another."""
+        assert self.gm.wait_until_resumed(timeout=0)
+        self.gm.pause_game()
+        assert not self.gm.wait_until_resumed(timeout=0.05)
+
+        timer = threading.Timer(0.05, self.gm.resume_game)
+        timer.start()
+        assert self.gm.wait_until_resumed(timeout=5)
+        assert not self.gm.is_paused
+        timer.join()
+
+    def test_wait_until_resumed_async(self):
+        """Test that asyncio tasks wait without blocking their loop, and wake on resume from a thread."""
+        async def run():
+            self.gm.pause_game()
+            waiter = asyncio.ensure_future(self.gm.wait_until_resumed_async())
+            await asyncio.sleep(0.05)
+            assert not waiter.done()
+
+            threading.Timer(0.05, self.gm.resume_game).start()
+            await asyncio.wait_for(waiter, timeout=5)
+
+            # a cancelled waiter does not stop others from waking
+            self.gm.pause_game()
+            cancelled = asyncio.ensure_future(self.gm.wait_until_resumed_async())
+            other = asyncio.ensure_future(self.gm.wait_until_resumed_async())
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            await asyncio.sleep(0)
+            assert len(self.gm._async_waiters) == 1
+            self.gm.end_game()
+            await asyncio.wait_for(other, timeout=5)
+
+        asyncio.run(run())
+
+    def test_closed_loops_are_skipped(self):
+        """Test that resuming does not fail on a waiter whose loop has closed."""
+        loop = asyncio.new_event_loop()
+        self.gm.pause_game()
+        self.gm._async_waiters.append((loop, loop.create_future()))
+        loop.close()
+
+        assert self.gm.resume_game()
+        assert self.gm._async_waiters == []
+
+
 class TestGameManagerActions:
     """Test action execution and handling."""
     
@@ -0,0 +1,94 @@
+"""
+Unit tests for pycatan.core.hand module.
+
+Tests the count-based resource hand and its use by Player.
+"""
+
+import pytest
+
+from pycatan.core.hand import Hand
+from pycatan.core.card import ResCard
+from pycatan.core.game import Game
+from pycatan.core.statuses import Statuses
+
+
+class TestHand:
+    """Test the Hand class."""
+
+    def test_counts(self):
+        """Test adding and removing cards updates the counts."""
+        hand = Hand([ResCard.Wood, ResCard.Ore, ResCard.Wood])
+
+        assert len(hand) == 3
+        assert hand.count(ResCard.Wood) == 2
+        assert hand.count(ResCard.Sheep) == 0
+
+        hand.remove(ResCard.Wood)
+        hand.add(ResCard.Sheep, 3)
+        assert len(hand) == 5
+        assert hand.counts == [1, 0, 1, 3, 0]
+
+    def test_has(self):
+        """Test that repeated cards must all be in the hand."""
+        hand = Hand([ResCard.Wood, ResCard.Brick])
+
+        assert hand.has([ResCard.Wood, ResCard.Brick])
+        assert hand.has([])
+        assert not hand.has([ResCard.Wood, ResCard.Wood])
+        assert not hand.has([ResCard.Wheat])
+
+    def test_list_view(self):
+        """Test that the hand can be used like a list of cards."""
+        hand = Hand([ResCard.Wheat, ResCard.Wood, ResCard.Wheat])
+
+        assert list(hand) == [ResCard.Wood, ResCard.Wheat, ResCard.Wheat]
+        assert hand == [ResCard.Wheat, ResCard.Wheat, ResCard.Wood]
+        assert hand[0] == ResCard.Wood
+        assert hand[-1] == ResCard.Wheat
+        assert hand.index(ResCard.Wheat) == 1
+        assert ResCard.Wood in hand
+        assert ResCard.Ore not in hand
+
+        with pytest.raises(IndexError):
+            hand[3]
+        with pytest.raises(ValueError):
+            hand.index(ResCard.Ore)
+
+    def test_take_all(self):
+        """Test removing every card of one type."""
+        hand = Hand([ResCard.Ore] * 3 + [ResCard.Brick])
+
+        assert hand.take_all(ResCard.Ore) == 3
+        assert hand == [ResCard.Brick]
+
+    def test_copy_is_independent(self):
+        """Test that copies do not share counts."""
+        hand = Hand([ResCard.Ore])
+        copy = hand.copy()
+        copy.add(ResCard.Ore)
+
+        assert len(hand) == 1
+        assert len(copy) == 2
+
+
+class TestPlayerHand:
+    """Test Player's card methods with the count-based hand."""
+
+    def test_remove_cards_is_all_or_nothing(self):
+        """Test that remove_cards leaves the hand alone if any card is missing."""
+        player = Game().players[0]
+        player.add_cards([ResCard.Wood, ResCard.Brick])
+
+        assert player.remove_cards([ResCard.Wood, ResCard.Wood]) == Statuses.ERR_CARDS
+        assert len(player.cards) == 2
+
+        player.remove_cards([ResCard.Wood])
+        assert player.cards == [ResCard.Brick]
+
+    def test_full_state_lists_cards(self):
+        """Test that the game state still lists each card by name."""
+        game = Game()
+        game.players[0].add_cards([ResCard.Sheep, ResCard.Sheep, ResCard.Ore])
+
+        state = game.get_full_state()
+        assert sorted(state.players_state[0].cards) == ['ore', 'sheep', 'sheep']
@@ -0,0 +1,123 @@
+"""
+Unit tests for Game.apply and Game.undo.
+
+Tests that undoing a move puts back every part of the game state it changed.
+"""
+
+import random
+
+from pycatan.core.card import ResCard, DevCard
+from pycatan.core.move import Move, MoveType
+from pycatan.core.statuses import Statuses
+from pycatan.core.legal_moves import LegalMoveGenerator
+from pycatan.sim import SimulationEngine, random_policy
+
+
+def played_game(seed, turns):
+    """Play a short random game and return its Game."""
+    engine = SimulationEngine([random_policy] * 3, max_turns=turns)
+    engine.play_game(seed=seed)
+    return engine.game
+
+
+def snapshot(game):
+    """Get everything apply can change, in a form that can be compared."""
+    board = game.board
+    return (
+        game.get_full_state(),
+        [(p.victory_points, p.knight_cards, p.longest_road_length, p.get_longest_road(),
+          list(p.cards), p.dev_cards[:]) for p in game.players],
+        game.dev_deck[:], game.longest_road_owner, game.largest_army, game.has_ended, game.winner,
+        board.robber, board.occupied_mask, board.road_mask,
+        {o: m for o, m in board.settlement_masks.items() if m},
+        {o: m for o, m in board.city_masks.items() if m},
+        dict(board.road_masks), dict(board.road_point_masks),
+        {t: sorted((board.get_point_num(p), e[1], e[2].value, e[3]) for p, es in board._point_yields.items()
+                   for e in es if e[0].token_num == t)
+         for t in board._yield_index},
+        {t: len(es) for t, es in board._yield_index.items()},
+        {board.get_point_num(p): len(r) for p, r in board.point_roads.items()},
+    )
+
+
+class TestApplyUndo:
+    """Test applying and undoing moves."""
+
+    def test_undo_every_legal_move(self):
+        """Test that undoing each legal move restores the game exactly."""
+        for seed in range(3):
+            game = played_game(seed, 30)
+            moves = LegalMoveGenerator(game)
+            for player in range(3):
+                game.players[player].add_cards([ResCard.Wood, ResCard.Brick, ResCard.Sheep,
+                                                ResCard.Wheat, ResCard.Ore] * 3)
+                game.players[player].add_dev_card(DevCard.Road)
+                game.players[player].add_dev_card(DevCard.Knight)
+                before = snapshot(game)
+
+                legal = moves.turn_moves(player) + moves.robber_moves(player) + moves.discard_moves(player)
+                for move in legal:
+                    token = game.apply(move)
+                    assert token.status == Statuses.ALL_GOOD, move
+                    game.undo(token)
+                    assert snapshot(game) == before, move
+
+    def test_undo_sequence(self):
+        """Test undoing a long random sequence of moves in reverse order."""
+        rng = random.Random(4)
+        game = played_game(7, 5)
+        moves = LegalMoveGenerator(game)
+        snapshots = []
+        tokens = []
+
+        for p in game.players:
+            p.add_cards(list(ResCard) * 20)
+
+        for i in range(200):
+            player = i % 3
+            legal = moves.turn_moves(player) + moves.robber_moves(player)
+            snapshots.append(snapshot(game))
+            tokens.append(game.apply(rng.choice(legal)))
+
+        while tokens:
+            game.undo(tokens.pop())
+            assert snapshot(game) == snapshots.pop()
+
+    def test_roll_result(self):
+        """Test that a roll gives the dice total and yields resources."""
+        game = played_game(2, 0)
+        token = game.apply(Move(MoveType.ROLL_DICE, 0))
+
+        assert 2 <= token.result <= 12
+        assert token.status == Statuses.ALL_GOOD
+
+    def test_rejected_move_changes_nothing(self):
+        """Test that a rejected move makes no changes."""
+        game = played_game(3, 10)
+        game.players[0].remove_cards(list(game.players[0].cards))
+        before = snapshot(game)
+
+        token = game.apply(Move(MoveType.BUY_DEV_CARD, 0))
+        assert token.status == Statuses.ERR_CARDS
+        assert token.changes == []
+        assert snapshot(game) == before
+
+        game.players[0].add_cards([ResCard.Wood, ResCard.Brick, ResCard.Sheep, ResCard.Wheat])
+        before = snapshot(game)
+        occupied = game.board.get_topology().from_mask(game.board.occupied_mask)[0]
+        token = game.apply(Move(MoveType.PLACE_STARTING_SETTLEMENT, 0, (occupied,)))
+        assert token.status == Statuses.ERR_BLOCKED
+        assert snapshot(game) == before
+
+    def test_undo_in_fork(self):
+        """Test that undoing a move in a fork leaves the original alone."""
+        game = played_game(5, 20)
+        before = snapshot(game)
+        fork = game.fork()
+        moves = LegalMoveGenerator(fork)
+        fork.players[0].add_cards([ResCard.Wood, ResCard.Brick])
+
+        token = fork.apply(moves.road_moves(0)[0])
+        assert snapshot(game) == before
+        fork.undo(token)
+        assert len(fork.board.roads) == len(game.board.roads)
@@ -0,0 +1,157 @@
+"""
+Unit tests for pycatan.core.legal_moves and pycatan.core.topology modules.
+
+Checks the bitmask move generator against the rule checks in Player and Game.
+"""
+
+import copy
+
+from pycatan.core.game import Game
+from pycatan.core.card import ResCard, DevCard
+from pycatan.core.statuses import Statuses
+from pycatan.core.topology import BoardTopology
+from pycatan.core.legal_moves import LegalMoveGenerator
+from pycatan.core.move import MoveType
+from pycatan.management.game_manager import GameManager
+from pycatan.players.user import create_test_user
+from pycatan.sim import SimulationEngine, random_policy
+
+
+def played_game(seed, turns):
+    """Play a short random game and return its Game."""
+    engine = SimulationEngine([random_policy] * 3, max_turns=turns)
+    engine.play_game(seed=seed)
+    return engine.game
+
+
+def brute_force_roads(game, player, points):
+    """Find every road Player.road_location_is_valid accepts."""
+    p = game.players[player]
+    index = {id(point): i for i, point in enumerate(points)}
+    edges = set()
+    for i, start in enumerate(points):
+        for end in start.connected_points:
+            j = index[id(end)]
+            if i < j and p.road_location_is_valid(start, end) == Statuses.ALL_GOOD:
+                edges.add((i, j))
+    return edges
+
+
+class TestBoardTopology:
+    """Test the numbered layout of the default board."""
+
+    def test_counts(self):
+        """Test the standard board has 54 points, 72 edges and 19 tiles."""
+        topology = BoardTopology.for_board(Game().board)
+
+        assert topology.num_points == 54
+        assert topology.num_edges == 72
+        assert topology.num_tiles == 19
+        assert all(len(points) == 6 for points in topology.tile_points)
+
+    def test_shared_between_games(self):
+        """Test that games with the same layout share one topology."""
+        assert BoardTopology.for_board(Game().board) is BoardTopology.for_board(Game().board)
+
+    def test_definition_matches_board(self):
+        """Test the BoardDefinition adjacency agrees with the board's own points."""
+        board = Game().board
+        from_definition = BoardTopology.for_board(board)
+        from_board = BoardTopology.from_board(board)
+
+        assert from_definition.point_neighbours == from_board.point_neighbours
+        assert from_definition.tile_points == from_board.tile_points
+        assert from_definition.edges == from_board.edges
+
+    def test_masks(self):
+        """Test converting between numbers and bitmasks."""
+        assert BoardTopology.to_mask([0, 3, 5]) == 0b101001
+        assert BoardTopology.from_mask(0b101001) == [0, 3, 5]
+
+
+class TestLegalMoveGenerator:
+    """Test that generated moves match the Player and Game rules exactly."""
+
+    def test_roads_match_rule_checks(self):
+        """Test road placements against Player.road_location_is_valid."""
+        for seed in range(5):
+            game = played_game(seed, 30)
+            moves = LegalMoveGenerator(game)
+            for player in range(3):
+                assert set(moves.road_edges(player)) == brute_force_roads(game, player, moves.points)
+
+    def test_settlements_match_rule_checks(self):
+        """Test settlement placements against Player.settlement_location_is_valid."""
+        for seed in range(5):
+            game = played_game(seed, 30)
+            moves = LegalMoveGenerator(game)
+            for player in range(3):
+                game.players[player].add_cards([ResCard.Wood, ResCard.Brick, ResCard.Sheep, ResCard.Wheat])
+                p = game.players[player]
+                for is_starting in (True, False):
+                    expected = {
+                        i for i, point in enumerate(moves.points)
+                        if p.settlement_location_is_valid(point, is_starting) == Statuses.ALL_GOOD
+                    }
+                    found = {m.args[0] for m in moves.settlement_moves(player, is_starting)}
+                    assert found == expected
+
+    def test_no_cards_no_builds(self):
+        """Test that building moves need the right cards."""
+        game = played_game(1, 5)
+        player = game.players[0]
+        player.remove_cards(list(player.cards))
+        moves = LegalMoveGenerator(game)
+
+        assert moves.settlement_moves(0) == []
+        assert moves.city_moves(0) == []
+        assert moves.road_moves(0) == []
+        assert [m.type for m in moves.turn_moves(0)] == [MoveType.END_TURN]
+
+    def test_every_road_building_pair_is_accepted(self):
+        """Test that Game.use_dev_card accepts every Road Building move."""
+        game = played_game(2, 10)
+        moves = LegalMoveGenerator(game)
+        game.players[0].add_dev_card(DevCard.Road)
+        road_moves = [m for m in moves.dev_card_moves(0) if m.args[0] == DevCard.Road]
+        assert road_moves
+
+        for move in road_moves[:40]:
+            trial = copy.deepcopy(game)
+            points = [p for row in trial.board.points for p in row]
+            a, b, c, d = move.args[1:]
+            args = {
+                'road_one': {'start': points[a], 'end': points[b]},
+                'road_two': {'start': points[c], 'end': points[d]}
+            }
+            assert trial.use_dev_card(0, DevCard.Road, args) == Statuses.ALL_GOOD
+
+    def test_harbor_ratios(self):
+        """Test that bank trades use the player's harbors."""
+        game = Game(rng=3)
+        moves = LegalMoveGenerator(game)
+        harbor = game.board.harbors[0]
+        game.add_settlement(0, harbor.point_one, True)
+        game.players[0].add_cards([ResCard.Wheat] * 2 + [ResCard.Ore] * 3)
+
+        ratios = {(m.args[0], m.args[1]) for m in moves.bank_trade_moves(0)}
+        card = harbor.get_card_from_harbor_type(harbor.type)
+        if card == None:
+            assert ratios == {(ResCard.Ore, 3)}
+        else:
+            expected = {(card, 2)} if card in (ResCard.Wheat, ResCard.Ore) else set()
+            assert ratios == expected
+
+
+class TestGameManagerLegalMoves:
+    """Test GameManager.get_legal_moves."""
+
+    def test_setup_moves(self):
+        """Test the setup phase offers settlements and then roads."""
+        users = [create_test_user("Alice", 0), create_test_user("Bob", 1)]
+        manager = GameManager(users, random_seed=1)
+
+        moves = manager.get_legal_moves()
+        assert len(moves) == 54
+        assert all(m.type == MoveType.PLACE_STARTING_SETTLEMENT for m in moves)
+        assert manager.get_legal_moves(1) == []
@@ -0,0 +1,105 @@
+"""
+Unit tests for pycatan.core.longest_road module.
+
+Tests the incremental longest road tracking and its use by Game.
+"""
+
+from pycatan.core.game import Game
+from pycatan.core.longest_road import RoadNetwork
+from pycatan.core.point import Point
+
+
+def make_points(n):
+    """Create n unconnected points for building a network by hand."""
+    return [Point(tiles=[], position=[0, i]) for i in range(n)]
+
+
+def build_top_row(game, player, length):
+    """Build a starting settlement and a line of roads along the top row."""
+    row = game.board.points[0]
+    game.add_settlement(player, row[0], True)
+    for i in range(length):
+        game.add_road(player, row[i], row[i + 1], True)
+
+
+class TestRoadNetwork:
+    """Test RoadNetwork on its own."""
+
+    def test_line(self):
+        """Test that a line of roads is measured end to end."""
+        points = make_points(5)
+        network = RoadNetwork(0)
+        for a, b in zip(points, points[1:]):
+            network.add_road(a, b)
+
+        assert network.longest == 4
+
+    def test_branch_is_not_counted_twice(self):
+        """Test that only one arm of a fork counts towards the longest road."""
+        p = make_points(6)
+        network = RoadNetwork(0)
+        network.add_road(p[0], p[1])
+        network.add_road(p[1], p[2])
+        network.add_road(p[2], p[3])
+        network.add_road(p[2], p[4])
+        network.add_road(p[4], p[5])
+
+        assert network.longest == 4
+
+    def test_loop(self):
+        """Test that a loop can be walked all the way round."""
+        p = make_points(6)
+        network = RoadNetwork(0)
+        for i in range(6):
+            network.add_road(p[i], p[(i + 1) % 6])
+
+        assert network.longest == 6
+
+    def test_joining_components(self):
+        """Test that a road joining two separate segments merges them."""
+        p = make_points(6)
+        network = RoadNetwork(0)
+        network.add_road(p[0], p[1])
+        network.add_road(p[1], p[2])
+        network.add_road(p[3], p[4])
+        network.add_road(p[4], p[5])
+        assert len(network.components) == 2
+        assert network.longest == 2
+
+        network.add_road(p[2], p[3])
+        assert len(network.components) == 1
+        assert network.longest == 5
+
+
+class TestGameLongestRoad:
+    """Test that Game keeps longest road up to date."""
+
+    def test_longest_road_awarded(self):
+        """Test that a road of five segments gets the longest road."""
+        game = Game()
+        build_top_row(game, 0, 4)
+        assert game.players[0].longest_road_length == 4
+        assert game.longest_road_owner == None
+
+        game.add_road(0, game.board.points[0][4], game.board.points[0][5], True)
+        assert game.players[0].get_longest_road() == 5
+        assert game.longest_road_owner == 0
+
+    def test_settlement_cuts_road(self):
+        """Test that another player's settlement breaks a road in two."""
+        game = Game()
+        build_top_row(game, 0, 6)
+        assert game.longest_road_owner == 0
+
+        game.add_settlement(1, game.board.points[0][3], True)
+        assert game.players[0].longest_road_length == 3
+        assert game.longest_road_owner == None
+
+    def test_own_settlement_does_not_cut_road(self):
+        """Test that a player's own settlement does not break their road."""
+        game = Game()
+        build_top_row(game, 0, 6)
+
+        game.add_settlement(0, game.board.points[0][3], True)
+        assert game.players[0].longest_road_length == 6
+        assert game.longest_road_owner == 0
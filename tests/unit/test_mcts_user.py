@@ -0,0 +1,167 @@
+"""
+Unit tests for pycatan.sim.mcts and pycatan.players.mcts_user modules.
+
+Tests the Monte Carlo Tree Search and the MCTSUser that plays with it
+through a GameManager.
+"""
+
+import pytest
+
+from pycatan.core.game import Game
+from pycatan.core.card import ResCard
+from pycatan.core.move import Move, MoveType
+from pycatan.sim import GameFlow, Stage, mcts_search, random_policy
+from pycatan.players import MCTSUser, UserInputError
+from pycatan.management.game_manager import GameManager
+from pycatan.management.actions import ActionType, GamePhase, TurnPhase
+
+
+def post_roll_flow(seed, **kwargs):
+    """Play a game with random moves until the first player has rolled, and give them cards."""
+    flow = GameFlow(Game(num_of_players=2, rng=seed), **kwargs)
+    while flow.stage != Stage.POST_ROLL:
+        flow.apply(random_policy(flow.game, flow.player, flow.get_moves()))
+    flow.game.players[flow.player].add_cards(list(ResCard) * 2)
+    return flow
+
+
+def make_manager(num_players=2, seed=1, iterations=10):
+    """Create a GameManager played by MCTSUsers."""
+    users = [MCTSUser(f"AI {i}", i, iterations=iterations, time_limit=None, seed=i) for i in range(num_players)]
+    manager = GameManager(users, random_seed=seed)
+    for user in users:
+        user.attach(manager)
+    manager.start_game()
+    return manager, users
+
+
+def play_turn(manager):
+    """Let the current user act until their turn ends."""
+    for _ in range(100):
+        if manager._handle_single_turn():
+            manager._advance_to_next_player()
+            return
+    raise AssertionError("The turn did not end")
+
+
+class TestMCTSSearch:
+    """Test the search itself."""
+
+    def test_finds_winning_move(self):
+        """Test that the search builds the city that wins the game."""
+        flow = post_roll_flow(3, victory_points_to_win=3)
+        player = flow.game.players[flow.player]
+        player.remove_cards(list(player.cards))
+        player.add_cards([ResCard.Ore] * 3 + [ResCard.Wheat] * 2)
+
+        result = mcts_search(flow, iterations=200, seed=1)
+
+        assert result.move.type == MoveType.BUILD_CITY
+        assert result.iterations == 200
+        assert result.values[result.move] == 1.0
+
+    def test_is_repeatable(self):
+        """Test that a seeded search gives the same result."""
+        flow = post_roll_flow(4)
+        first = mcts_search(flow, iterations=50, seed=7)
+        second = mcts_search(flow, iterations=50, seed=7)
+
+        assert first.move == second.move
+        assert first.visits == second.visits
+
+    def test_only_searches_given_moves(self):
+        """Test that only the given root moves are chosen between."""
+        flow = post_roll_flow(5)
+        moves = [m for m in flow.get_moves() if m.type != MoveType.END_TURN][:2]
+        moves.append(Move(MoveType.END_TURN, flow.player))
+
+        result = mcts_search(flow, iterations=30, moves=moves, seed=1)
+
+        assert result.move in moves
+        assert set(result.visits) == set(moves)
+        assert sum(result.visits.values()) == 30
+
+    def test_does_not_change_flow(self):
+        """Test that searching leaves the position alone."""
+        flow = post_roll_flow(6)
+        game_hash = flow.game.hash
+        mcts_search(flow, iterations=20, seed=1)
+
+        assert flow.game.hash == game_hash
+        assert flow.stage == Stage.POST_ROLL
+
+    def test_time_limit(self):
+        """Test that a search stops at its time limit."""
+        result = mcts_search(post_roll_flow(7), time_limit=0.05, seed=1)
+
+        assert result.iterations > 0
+        assert result.elapsed < 1.0
+        assert result.rollouts_per_second > 0
+
+    def test_unseeded_flow_in_workers(self):
+        """Test that a flow whose game is unseeded can be searched by worker processes."""
+        flow = GameFlow(Game().fork())
+        result = mcts_search(flow, iterations=8, workers=2, seed=1)
+
+        assert result.iterations == 8
+        assert result.move in flow.get_moves()
+
+    def test_needs_moves(self):
+        """Test that a search needs at least one move."""
+        with pytest.raises(ValueError):
+            mcts_search(post_roll_flow(8), moves=[])
+
+
+class TestMCTSUser:
+    """Test MCTSUser playing through a GameManager."""
+
+    def test_needs_manager(self):
+        """Test that the user cannot search without a GameManager."""
+        user = MCTSUser("AI", 0)
+        with pytest.raises(UserInputError):
+            user.get_input(None, "", ["ROLL_DICE"])
+
+    def test_plays_setup(self, capsys):
+        """Test that every setup action the user chooses is accepted."""
+        manager, users = make_manager()
+        for _ in range(4):
+            play_turn(manager)
+
+        assert manager._current_game_state.game_phase == GamePhase.NORMAL_PLAY
+        for player in manager.game.players:
+            assert player.get_VP() == 2
+            assert len(player.get_roads()) == 2
+
+    def test_respects_allowed_actions(self, capsys):
+        """Test that the user only chooses allowed action types."""
+        manager, users = make_manager()
+        for _ in range(4):
+            play_turn(manager)
+        user = users[manager.current_player_id]
+
+        action = user.get_input(manager.get_full_state(), "", [ActionType.ROLL_DICE.name])
+        assert action.action_type == ActionType.ROLL_DICE
+
+    def test_rejects_trades(self):
+        """Test that trade offers are rejected."""
+        manager, users = make_manager()
+        action = users[1].get_input(manager.get_full_state(), "",
+                                    [ActionType.TRADE_ACCEPT.name, ActionType.TRADE_REJECT.name])
+
+        assert action.action_type == ActionType.TRADE_REJECT
+
+    def test_discards(self, capsys):
+        """Test that the user discards the number of cards it must."""
+        manager, users = make_manager()
+        for _ in range(4):
+            play_turn(manager)
+        manager.game.players[1].add_cards([ResCard.Wood] * 9)
+        manager._current_game_state.dice_rolled = (3, 4)
+        manager._current_game_state.turn_phase = TurnPhase.DISCARD_PHASE
+        manager._current_game_state.players_must_discard = {1: 5}
+
+        action = users[1].get_input(manager.get_full_state(), "", [ActionType.DISCARD_CARDS.name])
+
+        assert action.action_type == ActionType.DISCARD_CARDS
+        assert len(action.parameters['cards']) == 5
+        assert manager._handle_discard_cards(action).success
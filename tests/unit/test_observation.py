@@ -0,0 +1,91 @@
+"""
+Unit tests for pycatan.sim.observation module.
+
+Tests that the ObservationEncoder's planes match the live game.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pycatan.core.game import Game
+from pycatan.sim import GameFlow, ObservationEncoder, Stage, random_policy
+
+
+def played_flow(seed, num_players=4, turns=30):
+    """Play random moves for a number of turns."""
+    flow = GameFlow(Game(num_of_players=num_players, rng=seed), max_turns=turns)
+    while not flow.is_finished:
+        flow.apply(random_policy(flow.game, flow.player, flow.get_moves()))
+    return flow
+
+
+def mask_bits(mask, size):
+    """Unpack a bitmask into a list of 0s and 1s."""
+    return [(mask >> i) & 1 for i in range(size)]
+
+
+class TestObservationEncoder:
+    """Test encoding games into NumPy arrays."""
+
+    def test_board_planes(self):
+        """Test that buildings and roads are encoded from the observing player."""
+        flow = played_flow(1)
+        board = flow.game.board
+        topology = board.get_topology()
+        encoder = ObservationEncoder(topology, 4)
+        planes = encoder.planes(encoder.encode(flow.game, 2))
+
+        for k, p in enumerate([2, 3, 0, 1]):
+            assert planes['points'][k].tolist() == mask_bits(board.settlement_masks.get(p, 0), topology.num_points)
+            assert planes['points'][4 + k].tolist() == mask_bits(board.city_masks.get(p, 0), topology.num_points)
+            assert planes['edges'][k].tolist() == mask_bits(board.road_masks.get(p, 0), topology.num_edges)
+            assert planes['players'][k][0] == len(flow.game.players[p].cards)
+            assert planes['players'][k][3] == flow.game.players[p].victory_points
+
+    def test_tiles_and_harbors(self):
+        """Test the tile types, the robber and the harbors."""
+        flow = played_flow(2, turns=5)
+        board = flow.game.board
+        encoder = ObservationEncoder(board.get_topology(), 4)
+        planes = encoder.planes(encoder.encode(flow.game, 0))
+
+        r, i = board.robber
+        assert np.flatnonzero(planes['tiles'][-1]).tolist() == [board.get_tile_num(board.tiles[r][i])]
+        assert planes['tiles'][:-2].sum(axis=0).tolist() == [1.0] * 19
+        assert planes['points'][8:].sum() == 2 * len(board.harbors)
+
+    def test_hand(self):
+        """Test that only the observing player's own hand is encoded."""
+        flow = played_flow(3)
+        encoder = ObservationEncoder(flow.game.board.get_topology(), 4)
+        for player in range(4):
+            hand = encoder.planes(encoder.encode(flow.game, player))['hand']
+            assert hand[:5].tolist() == flow.game.players[player].cards.counts
+            assert hand[5:].sum() == len(flow.game.players[player].dev_cards)
+
+    def test_writes_into_buffer(self):
+        """Test that rows of a preallocated batch are written in place."""
+        flow = played_flow(4, num_players=3)
+        encoder = ObservationEncoder(flow.game.board.get_topology(), 3)
+        batch = encoder.new_buffer(3)
+        for player in range(3):
+            encoder.encode(flow.game, player, batch[player], Stage.POST_ROLL, 7)
+
+        planes = encoder.planes(batch)
+        assert batch.shape == (3, encoder.size)
+        assert planes['points'].shape == (3, 2 * 3 + 6, 54)
+        assert planes['flow'][:, Stage.POST_ROLL.value].tolist() == [1.0] * 3
+        assert planes['flow'][:, -2].tolist() == [7.0] * 3
+        assert not np.array_equal(batch[0], batch[1])
+
+    def test_forgets_previous_board(self):
+        """Test that encoding a different game does not reuse the last board's tiles."""
+        first, second = played_flow(5, turns=1), played_flow(6, turns=1)
+        encoder = ObservationEncoder(first.game.board.get_topology(), 4)
+        out = encoder.new_buffer()
+
+        encoder.encode(first.game, 0, out)
+        encoder.encode(second.game, 0, out)
+        expected = ObservationEncoder(second.game.board.get_topology(), 4).encode(second.game, 0)
+        assert np.array_equal(out, expected)
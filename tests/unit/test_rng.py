@@ -0,0 +1,153 @@
+"""
+Unit tests for pycatan.core.rng module.
+
+Tests per-game random streams and their use by Game and GameManager.
+"""
+
+import pickle
+import random
+
+import pytest
+
+from pycatan.core.game import Game
+from pycatan.core.rng import GameRandom
+from pycatan.core.card import ResCard
+from pycatan.management.game_manager import GameManager
+from pycatan.players.user import create_test_user
+
+
+def board_layout(game):
+    """Get the tile types, tokens and harbor types of a game's board."""
+    tiles = [(t.type, t.token_num) for row in game.board.tiles for t in row]
+    harbors = [h.type for h in game.board.harbors]
+    return tiles, harbors
+
+
+class TestGameRandom:
+    """Test the random streams themselves."""
+
+    def test_same_seed_same_streams(self):
+        """Test that equal seeds give equal streams."""
+        a = GameRandom(42)
+        b = GameRandom(42)
+
+        assert [a.roll_dice() for _ in range(300)] == [b.roll_dice() for _ in range(300)]
+        assert a.deck.random() == b.deck.random()
+
+    def test_streams_are_independent(self):
+        """Test that using one stream does not change another."""
+        a = GameRandom(42)
+        b = GameRandom(42)
+        for _ in range(10):
+            a.steal.random()
+
+        assert a.roll_dice() == b.roll_dice()
+
+    def test_dice_values(self):
+        """Test that dice stay between 1 and 6."""
+        rng = GameRandom(1)
+        rolls = [rng.roll_dice() for _ in range(1000)]
+
+        assert all(1 <= d <= 6 for roll in rolls for d in roll)
+        assert {sum(roll) for roll in rolls} == set(range(2, 13))
+
+    def test_accepts_random_instance(self):
+        """Test using a random.Random as the parent generator."""
+        a = GameRandom(random.Random(5))
+        b = GameRandom(random.Random(5))
+
+        assert a.roll_dice() == b.roll_dice()
+
+    def test_accepts_numpy_generator(self):
+        """Test using a NumPy Generator as the parent generator."""
+        numpy = pytest.importorskip("numpy")
+        a = GameRandom(numpy.random.default_rng(5))
+        b = GameRandom(numpy.random.default_rng(5))
+
+        assert [a.roll_dice() for _ in range(10)] == [b.roll_dice() for _ in range(10)]
+
+    def test_getstate_and_setstate(self):
+        """Test that streams set to a saved state give the numbers the saved ones did."""
+        a = GameRandom(6)
+        a.roll_dice()
+        a.steal.random()
+        state = a.getstate()
+        expected = [a.roll_dice() for _ in range(300)] + [a.steal.random(), a.deck.random()]
+
+        b = GameRandom(7)
+        b.setstate(state)
+        assert [b.roll_dice() for _ in range(300)] + [b.steal.random(), b.deck.random()] == expected
+        assert b.seed == 6
+
+    def test_pickle_round_trip(self):
+        """Test that games are picklable, seeded or not, and their copies roll as they would."""
+        seeded = Game(rng=3)
+        copy = pickle.loads(pickle.dumps(seeded))
+        assert [copy.get_roll() for _ in range(20)] == [seeded.get_roll() for _ in range(20)]
+
+        random.seed(4)
+        unseeded = pickle.loads(pickle.dumps(Game().fork()))
+        random.seed(4)
+        again = pickle.loads(pickle.dumps(Game().fork()))
+        assert board_layout(unseeded) == board_layout(again)
+        assert [unseeded.get_roll() for _ in range(20)] == [again.get_roll() for _ in range(20)]
+        assert unseeded.rng.dice is not random
+
+    def test_rejects_unknown_seed(self):
+        """Test that unsupported seeds raise a TypeError."""
+        with pytest.raises(TypeError):
+            GameRandom("seed")
+
+    def test_no_seed_uses_global_random(self):
+        """Test that unseeded streams follow random.seed()."""
+        random.seed(3)
+        first = board_layout(Game())
+        random.seed(3)
+        second = board_layout(Game())
+
+        assert first == second
+
+
+class TestGameStreams:
+    """Test that games only use their own streams."""
+
+    def test_seeded_games_have_same_board(self):
+        """Test that the board comes from the game's seed."""
+        assert board_layout(Game(rng=8)) == board_layout(Game(rng=8))
+        assert Game(rng=8).dev_deck == Game(rng=8).dev_deck
+
+    def test_seeded_game_ignores_global_random(self):
+        """Test that a seeded game is unaffected by the module-level generator."""
+        random.seed(1)
+        first = Game(rng=8)
+        first_rolls = [first.get_roll() for _ in range(20)]
+        random.seed(2)
+        second = Game(rng=8)
+        second_rolls = [second.get_roll() for _ in range(20)]
+
+        assert board_layout(first) == board_layout(second)
+        assert first_rolls == second_rolls
+
+    def test_steal_card(self):
+        """Test stealing a random card."""
+        game = Game(rng=1)
+        game.players[1].add_cards([ResCard.Wood, ResCard.Ore])
+
+        card = game.steal_card(0, 1)
+        assert card in (ResCard.Wood, ResCard.Ore)
+        assert game.players[0].has_cards([card])
+        assert len(game.players[1].cards) == 1
+        assert game.steal_card(0, 2) is None
+
+    def test_game_manager_seed_does_not_touch_global_random(self):
+        """Test that GameManager seeds its own game rather than the random module."""
+        users = [create_test_user("Alice", 0), create_test_user("Bob", 1)]
+        random.seed(10)
+        expected = random.random()
+
+        random.seed(10)
+        first = GameManager(users, random_seed=4)
+        assert random.random() == expected
+
+        second = GameManager(users, random_seed=4)
+        assert board_layout(first.game) == board_layout(second.game)
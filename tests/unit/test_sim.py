@@ -0,0 +1,168 @@
+"""
+Unit tests for pycatan.sim module.
+
+Tests the headless SimulationEngine and its built-in policies.
+"""
+
+import random
+
+import pytest
+
+from pycatan.core.card import ResCard
+from pycatan.core.move import Move, MoveType
+from pycatan.core.statuses import Statuses
+from pycatan.sim import SimulationEngine, GameResult, greedy_policy, random_policy, play_game
+from pycatan.sim import run_batch, summarize
+
+
+class TestSimulationEngine:
+    """Test playing complete headless games."""
+
+    def test_requires_policies(self):
+        """Test that an engine needs at least one policy."""
+        with pytest.raises(ValueError, match="At least one policy is required"):
+            SimulationEngine([])
+
+    def test_greedy_game_finishes_with_winner(self):
+        """Test that greedy players finish a game with a winner."""
+        random.seed(3)
+        result = play_game([greedy_policy] * 3)
+
+        assert isinstance(result, GameResult)
+        assert result.winner is not None
+        assert result.victory_points[result.winner] >= 10
+        assert result.turns > 0
+        assert result.moves > result.turns
+        assert result.states == []
+
+    def test_turn_limit(self):
+        """Test that games stop at the turn limit without a winner."""
+        random.seed(1)
+        result = play_game([random_policy] * 2, max_turns=3)
+
+        assert result.turns <= 3
+        assert result.winner is None
+
+    def test_games_are_reproducible(self):
+        """Test that the same seed plays the same game."""
+        random.seed(7)
+        first = play_game([greedy_policy] * 3)
+        random.seed(7)
+        second = play_game([greedy_policy] * 3)
+
+        assert first == second
+
+    def test_greedy_settles_on_best_point(self):
+        """Test that greedy players start on the point with the best dice odds."""
+        engine = SimulationEngine([greedy_policy] * 2)
+        engine._new_game(seed=4)
+        board = engine.game.board
+        pips = {
+            board.get_point_num(point): sum(6 - abs(7 - t.token_num) for t in point.tiles if t.token_num)
+            for row in board.points for point in row
+        }
+
+        move = greedy_policy(engine.game, 0, engine.flow.get_moves())
+        assert pips[move.args[0]] == max(pips.values())
+
+    def test_record_states(self):
+        """Test that states are only recorded when requested."""
+        random.seed(2)
+        result = play_game([greedy_policy] * 2, max_turns=5, record_states=True)
+
+        assert len(result.states) > 0
+        assert len(result.states[-1].players_state) == 2
+
+    def test_setup_places_two_settlements_each(self):
+        """Test the snake draft setup phase."""
+        random.seed(4)
+        engine = SimulationEngine([random_policy] * 3, max_turns=0)
+        engine.play_game()
+
+        for player in engine.game.players:
+            assert player.victory_points == 2
+            assert len(player.get_roads()) == 2
+
+
+class TestBatchRunner:
+    """Test running batches of games."""
+
+    def test_batch_in_process(self):
+        """Test a batch played without worker processes."""
+        results = run_batch(4, [greedy_policy] * 3, workers=1, seed=11)
+
+        assert len(results) == 4
+        assert len({r.seed for r in results}) == 4
+        for r in results:
+            assert r.states == []
+            assert len(r.resources_produced) == 3
+            assert sum(r.resources_produced) > 0
+
+    def test_batch_is_independent_of_worker_count(self):
+        """Test that each game's result only depends on the batch seed."""
+        serial = run_batch(4, [greedy_policy] * 2, workers=1, seed=3)
+        parallel = run_batch(4, [greedy_policy] * 2, workers=2, seed=3, chunk_size=1)
+
+        assert serial == parallel
+
+    def test_single_game_can_be_replayed(self):
+        """Test replaying one game of a batch from its seed."""
+        results = run_batch(3, [greedy_policy] * 2, workers=1, seed=5, max_turns=40)
+        replay = SimulationEngine([greedy_policy] * 2, max_turns=40).play_game(seed=results[2].seed)
+
+        assert replay == results[2]
+
+    def test_summarize(self):
+        """Test aggregating batch results."""
+        results = run_batch(4, [greedy_policy] * 2, workers=1, seed=9, max_turns=40)
+        summary = summarize(results)
+
+        assert summary['games'] == 4
+        assert sum(summary['wins']) + summary['unfinished'] == 4
+        assert summary['average_turns'] > 0
+
+
+class TestLegalMoves:
+    """Test that generated moves are accepted by the Game rules."""
+
+    def setup_method(self):
+        random.seed(5)
+        self.engine = SimulationEngine([greedy_policy] * 3, max_turns=0)
+        self.engine.play_game()
+
+    def test_starting_settlements_respect_distance_rule(self):
+        """Test that setup settlements are never next to a building."""
+        engine = SimulationEngine([random_policy] * 2)
+        engine._new_game()
+        engine.apply(Move(MoveType.PLACE_STARTING_SETTLEMENT, 0, (0,)))
+
+        points = [m.args[0] for m in engine.flow.legal_moves.settlement_moves(1, is_starting=True)]
+        assert 0 not in points
+        assert 1 not in points
+        assert len(points) == 54 - 3
+
+    def test_road_moves_are_valid(self):
+        """Test that every generated road passes Player.road_location_is_valid."""
+        engine = self.engine
+        for move in engine.flow.legal_moves.road_moves(0, is_starting=True):
+            start, end = (engine.game.board.get_point(i) for i in move.args)
+            assert engine.game.players[0].road_location_is_valid(start, end) == Statuses.ALL_GOOD
+
+    def test_bank_trades(self):
+        """Test that 4:1 bank trades are offered and accepted."""
+        engine = self.engine
+        player = engine.game.players[1]
+        player.remove_cards(list(player.cards))
+        player.add_cards([ResCard.Ore] * 4)
+
+        moves = engine.flow.legal_moves.bank_trade_moves(1)
+        assert len(moves) >= 4
+        engine.apply(moves[0])
+        assert len(player.cards) == 4 - moves[0].args[1] + 1
+
+    def test_robber_moves_skip_current_tile(self):
+        """Test that the robber must move to a new tile."""
+        engine = self.engine
+        robber = engine.game.board.robber
+        for move in engine.flow.legal_moves.robber_moves(0):
+            assert engine.game.board.get_tile(move.args[0]).position != robber
@@ -0,0 +1,110 @@
+"""
+Unit tests for the cached GameState built by Game.get_full_state.
+
+Tests that only the parts of the state a move changed are built again,
+that unchanged parts are shared, and that the result always matches a
+state built from scratch.
+"""
+
+import random
+
+from pycatan.core.card import ResCard
+from pycatan.core.game import Game
+from pycatan.core.legal_moves import LegalMoveGenerator
+from pycatan.core.move import Move, MoveType
+from pycatan.sim import SimulationEngine, random_policy
+
+
+def played_game(seed, turns):
+    """Play a short random game and return its Game."""
+    engine = SimulationEngine([random_policy] * 3, max_turns=turns)
+    engine.play_game(seed=seed)
+    return engine.game
+
+
+def fresh_state(game):
+    """Build a game's state without using its cache."""
+    copy = game.fork()
+    copy._snapshot = None
+    return copy.get_full_state()
+
+
+class TestIncrementalState:
+    """Test building game states from the cache."""
+
+    def test_unchanged_state_is_shared(self):
+        """Test that a second call shares every part of the first."""
+        game = played_game(1, 20)
+        first = game.get_full_state()
+        second = game.get_full_state()
+
+        assert second is not first
+        assert second.players_state is not first.players_state
+        assert all(a is b for a, b in zip(first.players_state, second.players_state))
+        assert second.board_state is first.board_state
+
+    def test_only_changed_parts_are_rebuilt(self):
+        """Test that a change to one hand rebuilds only that player."""
+        game = played_game(2, 20)
+        first = game.get_full_state()
+        game.players[1].add_cards([ResCard.Ore])
+        second = game.get_full_state()
+
+        assert second.players_state[1] is not first.players_state[1]
+        assert second.players_state[1].cards.count('ore') == first.players_state[1].cards.count('ore') + 1
+        assert second.players_state[0] is first.players_state[0]
+        assert second.players_state[2] is first.players_state[2]
+        assert second.board_state is first.board_state
+
+    def test_robber_rebuilds_tiles_only(self):
+        """Test that moving the robber shares the buildings and roads."""
+        game = played_game(3, 20)
+        first = game.get_full_state()
+        robber = game.board.get_tile_num(game.board.tiles[game.board.robber[0]][game.board.robber[1]])
+        game.apply(Move(MoveType.ROBBER_MOVE, 0, ((robber + 1) % 19, None)))
+        second = game.get_full_state()
+
+        assert second.board_state is not first.board_state
+        assert second.board_state.robber_position != first.board_state.robber_position
+        assert second.board_state.tiles is not first.board_state.tiles
+        assert second.board_state.buildings is first.board_state.buildings
+        assert second.board_state.roads is first.board_state.roads
+        assert second.board_state.harbors is first.board_state.harbors
+
+    def test_names_do_not_change_shared_states(self):
+        """Test that naming the players does not change earlier states."""
+        game = Game(rng=1)
+        unnamed = game.get_full_state()
+        named = game.get_full_state(['Ann', 'Ben'])
+
+        assert [p.name for p in named.players_state] == ['Ann', 'Ben', 'Player 2']
+        assert [p.name for p in unnamed.players_state] == ['Player 0', 'Player 1', 'Player 2']
+
+    def test_matches_state_built_from_scratch(self):
+        """Test the cached state against a fresh one through random moves and undos."""
+        rng = random.Random(0)
+        for seed in range(3):
+            game = played_game(seed, 10)
+            moves = LegalMoveGenerator(game)
+            tokens = []
+            for _ in range(150):
+                player = rng.randrange(3)
+                game.players[player].add_cards([rng.choice(list(ResCard))] * 2)
+                legal = moves.turn_moves(player) + moves.robber_moves(player)
+                if tokens and rng.random() < 0.3:
+                    game.undo(tokens.pop())
+                elif legal:
+                    tokens.append(game.apply(rng.choice(legal)))
+                if rng.random() < 0.5:
+                    assert game.get_full_state() == fresh_state(game)
+            assert game.get_full_state() == fresh_state(game)
+
+    def test_forks_keep_their_own_state(self):
+        """Test that a fork and its game build their states separately."""
+        game = played_game(4, 20)
+        before = game.get_full_state()
+        fork = game.fork()
+        fork.players[0].add_cards([ResCard.Wood] * 3)
+
+        assert fork.get_full_state() == fresh_state(fork)
+        assert game.get_full_state() == before
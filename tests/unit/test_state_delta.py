@@ -0,0 +1,111 @@
+"""
+Unit tests for GameState.diff and StateDelta.
+
+Tests that applying the delta between two states to the first gives the
+second, including after a JSON round trip, and that deltas hold only
+what changed.
+"""
+
+import json
+import random
+from dataclasses import asdict, replace
+
+from pycatan.core.card import ResCard
+from pycatan.core.legal_moves import LegalMoveGenerator
+from pycatan.management import GameState, StateDelta, GamePhase, TurnPhase
+from pycatan.sim import SimulationEngine, random_policy
+
+
+def played_game(seed, turns):
+    """Play a short random game and return its Game."""
+    engine = SimulationEngine([random_policy] * 3, max_turns=turns)
+    engine.play_game(seed=seed)
+    return engine.game
+
+
+def round_trip(delta):
+    """Send a delta through JSON."""
+    return StateDelta.from_dict(json.loads(json.dumps(delta.to_dict())))
+
+
+class TestStateDelta:
+    """Test diffing and applying game states."""
+
+    def test_unchanged_state_has_empty_delta(self):
+        """Test that a state diffed with itself has no changes."""
+        state = played_game(1, 10).get_full_state()
+        delta = state.diff(state)
+
+        assert delta.is_empty()
+        assert delta.to_dict() == {}
+        assert delta.apply(state) == state
+
+    def test_whole_state_from_empty(self):
+        """Test that diffing against an empty state carries the whole state."""
+        state = played_game(2, 20).get_full_state()
+        delta = state.diff(GameState())
+
+        assert delta.apply(GameState()) == state
+        # JSON has no tuples, so compare the round trip as JSON
+        rebuilt = round_trip(delta).apply(GameState())
+        assert json.dumps(asdict(rebuilt), default=str) == json.dumps(asdict(state), default=str)
+
+    def test_move_changes_only_what_it_touched(self):
+        """Test that a road holds one player's changes and the new road."""
+        game = played_game(3, 20)
+        moves = LegalMoveGenerator(game)
+        game.players[0].add_cards([ResCard.Wood, ResCard.Brick])
+        before = game.get_full_state()
+        road = next(m for m in moves.turn_moves(0) if m.type.name == 'BUILD_ROAD')
+        game.apply(road)
+        after = game.get_full_state()
+
+        delta = after.diff(before)
+        assert set(delta.players) <= {0, 1, 2}
+        assert 'cards' in delta.players[0] and 'roads' in delta.players[0]
+        assert len(delta.roads) == 1 and not delta.removed_roads
+        assert not delta.buildings and delta.robber is None and delta.tiles is None
+        assert round_trip(delta).apply(before) == after
+
+    def test_phase_and_turn_changes(self):
+        """Test that game fields such as the phases are carried."""
+        state = played_game(4, 10).get_full_state()
+        later = replace(state, turn_number=7, current_player=2, game_phase=GamePhase.NORMAL_PLAY,
+                        turn_phase=TurnPhase.DISCARD_PHASE, dice_rolled=(3, 4),
+                        players_must_discard={1: 4})
+        delta = round_trip(later.diff(state))
+
+        assert set(delta.fields) == {'turn_number', 'current_player', 'turn_phase', 'dice_rolled',
+                                     'players_must_discard'}
+        assert delta.apply(state) == later
+
+    def test_random_moves_and_undos(self):
+        """Test deltas between consecutive states through random moves and undos."""
+        rng = random.Random(0)
+        for seed in range(3):
+            game = played_game(seed, 10)
+            moves = LegalMoveGenerator(game)
+            tokens = []
+            state = game.get_full_state()
+            for _ in range(100):
+                player = rng.randrange(3)
+                game.players[player].add_cards([rng.choice(list(ResCard))] * 2)
+                legal = moves.turn_moves(player) + moves.robber_moves(player)
+                if tokens and rng.random() < 0.3:
+                    game.undo(tokens.pop())
+                elif legal:
+                    tokens.append(game.apply(rng.choice(legal)))
+                new_state = game.get_full_state()
+                assert round_trip(new_state.diff(state)).apply(state) == new_state
+                state = new_state
+
+    def test_delta_is_much_smaller_than_state(self):
+        """Test that the delta for one move is a small part of the whole state."""
+        game = played_game(5, 60)
+        before = game.get_full_state()
+        game.players[1].add_cards([ResCard.Ore])
+        after = game.get_full_state()
+
+        full = json.dumps(asdict(after), default=str)
+        delta = json.dumps(after.diff(before).to_dict())
+        assert len(delta) * 10 < len(full)
@@ -0,0 +1,94 @@
+"""
+Unit tests for pycatan.sim.vector_env module.
+
+Tests stepping many CatanEnv games together, in this process and in
+worker processes sharing memory.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pycatan.sim import VectorCatanEnv
+
+
+def random_actions(rng, masks):
+    """Choose a random legal action for every game."""
+    return (rng.random(masks.shape) * masks).argmax(axis=1)
+
+
+def play(env, steps, seed=1):
+    """Step every game with random legal actions, returning everything the env returned."""
+    rng = np.random.default_rng(seed)
+    observations, info = env.reset(seed=seed)
+    history = []
+    for _ in range(steps):
+        result = env.step(random_actions(rng, info['action_mask']))
+        info = result[4]
+        history.append(result)
+    return history
+
+
+class TestVectorCatanEnv:
+    """Test stepping games in lockstep."""
+
+    def test_stacked_arrays(self):
+        """Test that results are stacked over the games."""
+        with VectorCatanEnv(4, num_players=3) as env:
+            observations, info = env.reset(seed=1)
+            assert observations.shape == (4, env.observation_size)
+            assert info['action_mask'].shape == (4, env.action_space.n)
+            assert info['action_mask'].any(axis=1).all()
+
+            observations, rewards, terminated, truncated, info = env.step(
+                random_actions(np.random.default_rng(0), info['action_mask']))
+            assert observations.shape == (4, env.observation_size)
+            assert rewards.shape == terminated.shape == truncated.shape == (4,)
+            assert info['player'].shape == info['winner'].shape == (4,)
+
+    def test_auto_reset(self):
+        """Test that finished games are reset in the same step."""
+        with VectorCatanEnv(3, num_players=2, max_turns=5) as env:
+            history = play(env, 200)
+
+        finished = [(step, i) for step, result in enumerate(history)
+                    for i in np.flatnonzero(result[2] | result[3])]
+        assert finished
+        for step, i in finished:
+            observations, rewards, terminated, truncated, info = history[step]
+            assert info['action_mask'][i].any()
+            assert not np.array_equal(info['final_observation'][i], observations[i])
+
+    def test_games_are_seeded(self):
+        """Test that each env plays a different game, and a seed replays them."""
+        with VectorCatanEnv(2, num_players=2) as env:
+            first, _ = env.reset(seed=3)
+            again, _ = env.reset(seed=3)
+
+        assert np.array_equal(first, again)
+        assert not np.array_equal(first[0], first[1])
+
+    def test_subprocess_matches_inprocess(self):
+        """Test that the subprocess backend plays exactly the same games."""
+        with VectorCatanEnv(4, num_players=2, max_turns=10) as env:
+            expected = play(env, 60)
+        with VectorCatanEnv(4, backend='subprocess', workers=2, num_players=2, max_turns=10) as env:
+            actual = play(env, 60)
+
+        for a, b in zip(expected, actual):
+            for x, y in zip(a[:4], b[:4]):
+                assert np.array_equal(x, y)
+            for key in a[4]:
+                assert np.array_equal(a[4][key], b[4][key])
+
+    def test_subprocess_errors(self):
+        """Test that an illegal action in a worker is raised in the parent."""
+        with VectorCatanEnv(2, backend='subprocess', workers=2, num_players=2) as env:
+            _, info = env.reset(seed=1)
+            with pytest.raises(ValueError):
+                env.step([env.action_space.end_turn] * 2)
+
+    def test_unknown_backend(self):
+        """Test that only the known backends can be used."""
+        with pytest.raises(ValueError):
+            VectorCatanEnv(2, backend='threads')
@@ -0,0 +1,128 @@
+"""
+Unit tests for pycatan.core.zobrist module.
+
+Tests that the incremental Zobrist hash always matches a hash computed from
+scratch, and tests the TranspositionTable.
+"""
+
+import random
+
+import pytest
+
+from pycatan.core.game import Game
+from pycatan.core.card import ResCard, DevCard
+from pycatan.core.move import Move, MoveType
+from pycatan.core.legal_moves import LegalMoveGenerator
+from pycatan.core.zobrist import TranspositionTable, ZobristKeys
+from pycatan.sim import SimulationEngine, random_policy
+
+
+class CheckedEngine(SimulationEngine):
+    """SimulationEngine that checks the hash after every move."""
+
+    def apply(self, move):
+        super().apply(move)
+        assert self.game.hash == self.game.compute_hash(), move
+
+
+class TestZobristHash:
+    """Test the hash kept by Game."""
+
+    def test_hash_matches_full_recompute(self):
+        """Test the incremental hash after every move of several games."""
+        engine = CheckedEngine([random_policy] * 3, max_turns=150)
+        for seed in range(4):
+            engine.play_game(seed=seed)
+
+    def test_undo_restores_hash(self):
+        """Test that undoing moves gives back the old hash."""
+        rng = random.Random(2)
+        engine = SimulationEngine([random_policy] * 3, max_turns=20)
+        engine.play_game(seed=2)
+        game = engine.game
+        moves = LegalMoveGenerator(game)
+        for p in game.players:
+            p.add_cards(list(ResCard) * 6)
+            p.add_dev_card(DevCard.Knight)
+
+        hashes = []
+        tokens = []
+        for i in range(60):
+            player = i % 3
+            hashes.append(game.hash)
+            tokens.append(game.apply(rng.choice(moves.turn_moves(player) + moves.robber_moves(player))))
+            assert game.hash == game.compute_hash()
+
+        while tokens:
+            game.undo(tokens.pop())
+            assert game.hash == hashes.pop()
+
+    def test_transposition(self):
+        """Test that the same position reached in a different order has the same hash."""
+        game = Game(rng=5)
+        fork = game.fork()
+        moves = LegalMoveGenerator(game)
+        first, second = [m.args[0] for m in moves.settlement_moves(0, is_starting=True)][0:30:29]
+
+        game.apply(Move(MoveType.PLACE_STARTING_SETTLEMENT, 0, (first,)))
+        game.apply(Move(MoveType.PLACE_STARTING_SETTLEMENT, 0, (second,)))
+        fork.apply(Move(MoveType.PLACE_STARTING_SETTLEMENT, 0, (second,)))
+        fork.apply(Move(MoveType.PLACE_STARTING_SETTLEMENT, 0, (first,)))
+
+        assert game.hash == fork.hash
+        game.players[1].add_cards([ResCard.Ore])
+        assert game.hash != fork.hash
+
+    def test_turn_and_phase(self):
+        """Test that whose turn it is and the phase change the hash."""
+        game = Game(rng=1)
+
+        assert game.get_hash() == game.hash
+        assert game.get_hash(0) != game.get_hash(1)
+        assert game.get_hash(0, phase=1) != game.get_hash(0, phase=2)
+
+    def test_keys_are_shared(self):
+        """Test that games of the same size share their keys."""
+        assert Game(rng=1).zobrist is Game(rng=2).zobrist
+        assert ZobristKeys(54, 72, 19, 3).robber == Game().zobrist.robber
+
+
+class TestTranspositionTable:
+    """Test the TranspositionTable."""
+
+    def test_get_and_put(self):
+        """Test storing and finding values."""
+        table = TranspositionTable(10)
+        table.put(1, "a")
+
+        assert table.get(1) == "a"
+        assert table.get(2, "missing") == "missing"
+        assert (table.hits, table.misses) == (1, 1)
+        assert 1 in table and len(table) == 1
+
+    def test_least_recently_used_is_removed(self):
+        """Test that a full table removes the entry used longest ago."""
+        table = TranspositionTable(2)
+        table.put(1, "a")
+        table.put(2, "b")
+        table.get(1)
+        table.put(3, "c")
+
+        assert 1 in table and 3 in table
+        assert 2 not in table
+
+    def test_depth(self):
+        """Test that deeper entries are not replaced by shallower ones."""
+        table = TranspositionTable(4)
+        table.put(1, "deep", depth=5)
+
+        assert not table.put(1, "shallow", depth=2)
+        assert table.get(1) == "deep"
+        assert table.get(1, min_depth=6) is None
+        assert table.put(1, "deeper", depth=6)
+        assert table.get(1) == "deeper"
+
+    def test_bad_size(self):
+        """Test that the table needs room for at least one entry."""
+        with pytest.raises(ValueError):
+            TranspositionTable(0)